@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from med_index import active_range
+
+TOTAL_LABEL = "전체"
+
+
+# ===================== 예정 복용 펼치기 =====================
+def expand_schedule(meds, start, end):
+    """[start, end] 기간의 예정 복용을 한 표로 (스케줄마다 날짜 × 시간을 배열 연산으로 생성)"""
+    frames = []
+    for med in meds:
+        active = active_range(med, start, end)
+        times = sorted(med.get("times", []))
+        if active is None or not times:
+            continue
+        days = pd.date_range(active[0], active[1], freq="D").strftime("%Y-%m-%d").to_numpy()
+        frames.append(pd.DataFrame({
+            "med_id": med["id"],
+            "drug": med["drug"],
+            "date": np.repeat(days, len(times)),
+            "time": np.tile(times, len(days)),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["med_id", "drug", "date", "time"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# ===================== 연속 기록 =====================
+def _streaks(done_by_day):
+    """(그룹, 날짜) 인덱스의 '그날 모두 복용' 여부 → 그룹별 (현재 연속, 최장 연속) 일수"""
+    if done_by_day.empty:
+        return pd.DataFrame(columns=["current", "longest"])
+    done = done_by_day.astype(int)
+    group = done_by_day.index.get_level_values(0)
+    # 놓친 날마다 새 구간이 시작되므로 누적 미완료 수가 구간 번호가 된다
+    run_id = (1 - done).groupby(group).cumsum()
+    run_len = done.groupby([group, run_id.to_numpy()]).cumsum()
+    return pd.DataFrame({
+        "current": run_len.groupby(group).last(),
+        "longest": run_len.groupby(group).max(),
+    })
+
+
+# ===================== 순응도 리포트 =====================
+def adherence_report(meds, log_df, start, end, now):
+    """약별 + 전체 순응도 요약표와 놓친 복용 목록.
+
+    log_df: date, med_id, time, taken_at 컬럼의 복약 기록
+    now: 아직 시간이 안 된 복용을 놓침으로 세지 않기 위한 기준 시각 (naive datetime)
+    """
+    plan = expand_schedule(meds, start, end)
+    plan["due_at"] = pd.to_datetime(plan["date"] + " " + plan["time"], errors="coerce")
+    # 시간이 지난 복용만 평가 (시간 형식이 잘못된 건 날짜 기준)
+    due_day = pd.to_datetime(plan["date"])
+    plan = plan[plan["due_at"].fillna(due_day) <= pd.Timestamp(now)]
+
+    log = log_df[["date", "med_id", "time", "taken_at"]].drop_duplicates(["date", "med_id", "time"])
+    plan = plan.merge(log, on=["date", "med_id", "time"], how="left")
+    plan["taken"] = plan["taken_at"].notna()
+    delay = (pd.to_datetime(plan["taken_at"], errors="coerce") - plan["due_at"]).dt.total_seconds() / 60
+    plan["delay_min"] = delay.where(plan["taken"])
+
+    # 약별 행과 전체 행을 같은 집계로 계산
+    both = pd.concat([plan, plan.assign(drug=TOTAL_LABEL)], ignore_index=True)
+    summary = both.groupby("drug", sort=False).agg(
+        scheduled=("taken", "size"),
+        taken=("taken", "sum"),
+        avg_delay=("delay_min", "mean"),
+    )
+    done_by_day = both.groupby(["drug", "date"], sort=True)["taken"].all()
+    summary = summary.join(_streaks(done_by_day))
+
+    summary = summary.reset_index()
+    result = pd.DataFrame({
+        "약": summary["drug"],
+        "예정": summary["scheduled"].astype(int),
+        "복용": summary["taken"].astype(int),
+        "순응도(%)": np.round(summary["taken"] / summary["scheduled"].where(summary["scheduled"] > 0) * 100, 1),
+        "놓침": (summary["scheduled"] - summary["taken"]).astype(int),
+        "현재 연속(일)": summary["current"].fillna(0).astype(int),
+        "최장 연속(일)": summary["longest"].fillna(0).astype(int),
+        "평균 지연(분)": np.round(summary["avg_delay"], 1),
+    })
+
+    missed = plan.loc[~plan["taken"], ["date", "time", "drug"]].sort_values(["date", "time"])
+    missed.columns = ["날짜", "시간", "약"]
+    return result, missed.reset_index(drop=True)
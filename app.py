@@ -1,72 +1,56 @@
-import os
-import json
+from time import perf_counter
+
+# 이번 실행의 시작 시각 (import / 첫 화면까지 걸린 시간 측정용)
+RUN_STARTED = perf_counter()
+
+import io
 import uuid
-import hashlib
 from datetime import datetime, date, time, timedelta
-from dateutil import tz
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+
+from storage import get_store, set_aside_files
+from auth import KdfBusy, hash_password, verify_password, needs_rehash
+from adherence import adherence_report
+from event_index import REPEAT_LABELS
+from bulk_io import DATASET_LABELS, FORMATS, CHUNK_ROWS, detect_format, read_chunks, import_rows, export_rows
+from log_schema import memory_report
+from rollup import FREQ_LABELS
+from timing import (
+    mark_startup, startup_stats, load_stats, span, traced, begin_run, set_run_page, end_run,
+    profiling_enabled, set_profiling, run_stats, clear_runs, last_profile,
+)
+from reminders import TOAST_POLL_SEC, reminder_scheduler, session_inbox, reminder_message
+from timezones import DEFAULT_TZ, TIMEZONE_CHOICES, user_zone, now_in
+from fleet import fleet_stats
 # from cookies_manager import CookieManager # ❌ 쿠키 라이브러리 임포트 제거
 
 # ===================== 기본 설정 =====================
 st.set_page_config(page_title="PetMate", page_icon="🐾", layout="wide")
 
-DATA_DIR = "data"
-USER_FILE = os.path.join(DATA_DIR, "users.json")
-PET_FILE = os.path.join(DATA_DIR, "pets.json")
-FEED_FILE = os.path.join(DATA_DIR, "feed_log.csv")
-WATER_FILE = os.path.join(DATA_DIR, "water_log.csv")
-MED_FILE = os.path.join(DATA_DIR, "med_schedule.json")
-MED_LOG_FILE = os.path.join(DATA_DIR, "med_log.json")
-HOSP_FILE = os.path.join(DATA_DIR, "hospital_events.json")
-UNSAFE_FILE = os.path.join(DATA_DIR, "unsafe_db.json")
+# 콜드 스타트 계측 (프로세스의 첫 실행만 기록): import까지 걸린 시간
+mark_startup("import_ms", (perf_counter() - RUN_STARTED) * 1000)
 
-os.makedirs(DATA_DIR, exist_ok=True)
+# 실행별 계측 시작 (꺼져 있으면 아무것도 하지 않음). 관리자 화면에서 예약한 cProfile은 이번 실행에 적용
+begin_run(profile=st.session_state.pop("profile_next_run", False))
 
 
 # ===================== 유틸 함수 =====================
-def load_json(path, default):
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return default
-    return default
-
-
-def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
-def load_csv(path, cols):
-    if os.path.exists(path):
-        try:
-            df = pd.read_csv(path)
-            if set(df.columns) != set(cols):
-                return pd.DataFrame(columns=cols)
-            return df
-        except:
-            return pd.DataFrame(columns=cols)
-    return pd.DataFrame(columns=cols)
-
-
-def save_csv(path, df):
-    df.to_csv(path, index=False)
-
-
+# "오늘"과 복약 기록/병원 일정의 날짜는 모두 로그인한 사용자의 시간대(user_tz) 기준
 def local_today():
-    return datetime.now(tz.gettz("Asia/Seoul")).date()
+    return now_in(user_tz).date()
 
 
 def local_now():
-    return datetime.now(tz.gettz("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+    return now_in(user_tz).strftime("%Y-%m-%d %H:%M:%S")
+
 
+def mark_first_paint():
+    """첫 화면(로그인 화면 또는 상단 바)을 그린 시점까지의 시간"""
+    mark_startup("first_paint_ms", (perf_counter() - RUN_STARTED) * 1000)
 
-def hash_password(pw: str):
-    return hashlib.sha256(pw.encode()).hexdigest()
 
 # 관리자 역할 확인 함수
 def is_admin(username: str):
@@ -91,34 +75,14 @@ if "user" not in st.session_state:
 # ❌ 쿠키 로드/복구 로직 제거
 
 
-# ===================== 데이터 로딩 =====================
-if "pets" not in st.session_state:
-    st.session_state.pets = load_json(PET_FILE, [])
-
-if "med_schedule" not in st.session_state:
-    st.session_state.med_schedule = load_json(MED_FILE, [])
-
-if "hospital_events" not in st.session_state:
-    st.session_state.hospital_events = load_json(HOSP_FILE, [])
-
-if "med_log" not in st.session_state:
-    st.session_state.med_log = load_json(MED_LOG_FILE, {})
-
-if "unsafe_db" not in st.session_state:
-    default_unsafe = [
-        {"category": "음식", "name": "초콜릿", "risk": "고위험", "why": "카카오 테오브로민 독성"},
-        {"category": "음식", "name": "포도", "risk": "고위험", "why": "급성 신장손상"},
-        {"category": "식물", "name": "스파티필름", "risk": "주의", "why": "독성 수산칼슘"},
-    ]
-    st.session_state.unsafe_db = load_json(UNSAFE_FILE, default_unsafe)
+# ===================== 데이터 저장소 =====================
+# 💡 파일(JSON/CSV) 또는 SQLite 저장소. 읽기 결과는 여러 세션이 공유하는 뷰이므로
+#    직접 수정하지 말고 항상 저장소 메서드로 추가/수정/삭제한다.
+# 💡 로그인한 사용자의 반려동물/기록만 다루는 저장소 (로그인 전에는 회원 조회용)
+store = get_store(st.session_state.user)
 
-feed_cols = ["log_id", "pet_id", "date", "amount_g", "memo"]
-water_cols = ["log_id", "pet_id", "date", "amount_ml", "memo"]
-
-if "feed_df" not in st.session_state:
-    st.session_state.feed_df = load_csv(FEED_FILE, feed_cols)
-if "water_df" not in st.session_state:
-    st.session_state.water_df = load_csv(WATER_FILE, water_cols)
+# 로그인한 사용자의 시간대 (실행마다 한 번 조회, 시간대 객체는 프로세스에서 한 번만 만든다)
+user_tz = user_zone(store.find_user(st.session_state.user)) if st.session_state.user else DEFAULT_TZ
 
 
 # ===================== 로그인 화면 =====================
@@ -127,8 +91,7 @@ if "water_df" not in st.session_state:
 def login_page():
     st.title("🐾 PetMate 로그인")
     st.info("로그인하면 모든 기능을 이용할 수 있어요!")
-
-    users = load_json(USER_FILE, [])
+    mark_first_paint()
 
     tab_login, tab_signup = st.tabs(["로그인", "회원가입"])
 
@@ -137,8 +100,16 @@ def login_page():
         username = st.text_input("아이디")
         password = st.text_input("비밀번호", type="password")
         if st.button("로그인"):
-            hashed = hash_password(password)
-            if any(u["username"] == username and u["password"] == hashed for u in users):
+            user = store.find_user(username)
+            try:
+                ok = verify_password(password, user["password"] if user else None)
+                # 예전 SHA-256 / 이전 비용 설정의 해시는 로그인할 때 새 해시로 교체
+                if ok and needs_rehash(user["password"]):
+                    store.set_password(username, hash_password(password))
+            except KdfBusy as e:
+                st.warning(str(e))
+                st.stop()
+            if ok:
                 set_cookie(username)
                 st.success("로그인 성공!")
                 st.rerun()
@@ -152,12 +123,16 @@ def login_page():
         if st.button("회원가입"):
             if not new_user or not new_pass:
                 st.error("아이디/비밀번호를 입력하세요.")
-            elif any(u["username"] == new_user for u in users):
+            elif store.find_user(new_user):
                 st.error("이미 존재하는 아이디입니다.")
             else:
-                users.append({"username": new_user, "password": hash_password(new_pass)})
-                save_json(USER_FILE, users)
-                st.success("회원가입 완료! 로그인해주세요.")
+                try:
+                    store.add_user({"username": new_user, "password": hash_password(new_pass)})
+                    st.success("회원가입 완료! 로그인해주세요.")
+                except KdfBusy as e:
+                    st.warning(str(e))
+                except ValueError as e:
+                    st.error(str(e))
 
     st.stop()
 
@@ -171,9 +146,28 @@ col_user, col_logout = st.columns([6, 1])
 with col_user:
     st.write(f"👋 **{st.session_state.user}님 환영합니다!**")
 with col_logout:
-    if st.button("로그아웃"):
-        clear_cookie()
-        st.rerun()
+    st.button("로그아웃", on_click=clear_cookie)
+mark_first_paint()
+
+# 운영 지표: 그날 첫 접속만 활동 기록에 남는다
+fleet = fleet_stats()
+fleet.record_visit(st.session_state.user)
+
+
+# ===================== 알림 =====================
+# 복약/병원 알림은 백그라운드 스케줄러가 시간에 맞춰 울리고,
+# 화면을 열어 둔 동안에는 이 사용자 앞으로 온 알림을 토스트로 보여 준다
+reminders = reminder_scheduler()
+
+
+@st.fragment(run_every=TOAST_POLL_SEC)
+def reminder_toasts():
+    for reminder in session_inbox().drain(st.session_state.user):
+        st.toast(reminder_message(reminder))
+
+
+if reminders is not None:
+    reminder_toasts()
 
 
 # ===================== 메뉴 =====================
@@ -199,6 +193,18 @@ page = st.sidebar.radio(
     "이동하기",
     tuple(menu_options),
 )
+set_run_page(page)
+
+
+# 사용자 시간대: 바꾸면 회원 정보에 저장되고 다음 실행부터 날짜/알림 기준이 바뀐다
+def save_timezone(key):
+    store.set_timezone(st.session_state.user, st.session_state[key])
+
+
+tz_options = TIMEZONE_CHOICES if user_tz in TIMEZONE_CHOICES else [user_tz] + TIMEZONE_CHOICES
+tz_key = f"user_tz_{st.session_state.user}"
+st.sidebar.selectbox("🌐 시간대", tz_options, index=tz_options.index(user_tz), key=tz_key,
+                     on_change=save_timezone, args=(tz_key,))
 # ========================= 권장량 계산 =========================
 def recommended_food_grams(species: str, weight_kg: float):
     if weight_kg <= 0:
@@ -219,9 +225,58 @@ def recommended_water_ml(weight_kg: float):
     return int(weight_kg * 60) if weight_kg > 0 else 0
 
 
+def recommended_targets(species, weights):
+    """여러 마리의 (권장 사료량 g, 간식 상한 g, 권장 급수량 ml)을 한 번에 계산.
+
+    recommended_food_grams / recommended_water_ml과 같은 공식을 NumPy 배열 연산으로 적용한다.
+    """
+    species = np.char.lower(np.asarray(species, dtype=str))
+    weights = np.asarray(weights, dtype=float)
+    valid = weights > 0
+
+    is_dog = np.isin(species, ["개", "강아지", "dog"])
+    kcal = np.where(is_dog, weights * 30 + 70, 60 * weights)
+    grams = np.where(valid, np.round(kcal / 3.5), 0).astype(int)
+    snack_limit = np.round(grams * 0.1).astype(int)
+    water_ml = np.where(valid, np.trunc(weights * 60), 0).astype(int)
+    return grams, snack_limit, water_ml
+
+
+def pets_intake_overview(pets, start: date, end: date):
+    """전체 반려동물의 기간 내 권장량 대비 실제 섭취량 표"""
+    pets_df = pd.DataFrame(pets, columns=["id", "name", "species", "weight_kg"])
+    pets_df["weight_kg"] = pd.to_numeric(pets_df["weight_kg"], errors="coerce").fillna(0)
+    days = (end - start).days + 1
+
+    grams, snack_limit, water_ml = recommended_targets(pets_df["species"], pets_df["weight_kg"])
+    eaten = store.log_totals_by_pet("feed", start.isoformat(), end.isoformat())
+    drank = store.log_totals_by_pet("water", start.isoformat(), end.isoformat())
+    eaten = eaten.reindex(pets_df["id"], fill_value=0).to_numpy()
+    drank = drank.reindex(pets_df["id"], fill_value=0).to_numpy()
+
+    food_target = grams * days
+    water_target = water_ml * days
+    with np.errstate(divide="ignore", invalid="ignore"):
+        food_rate = np.where(food_target > 0, eaten / food_target * 100, np.nan)
+        water_rate = np.where(water_target > 0, drank / water_target * 100, np.nan)
+
+    return pd.DataFrame({
+        "이름": pets_df["name"],
+        "종": pets_df["species"],
+        "체중(kg)": pets_df["weight_kg"],
+        "권장 사료(g/일)": grams,
+        "간식 상한(g/일)": snack_limit,
+        "사료 섭취(g)": eaten.astype(int),
+        "사료 달성률(%)": np.round(food_rate, 1),
+        "권장 급수(ml/일)": water_ml,
+        "급수량(ml)": drank.astype(int),
+        "급수 달성률(%)": np.round(water_rate, 1),
+    })
+
+
 # ========================= 공통 반려동물 선택 위젯 =========================
 def pet_selector(label="반려동물 선택"):
-    pets = [p for p in st.session_state.pets if p.get("name")]
+    pets = [p for p in store.pets() if p.get("name")]
     if not pets:
         st.info("먼저 '반려동물 프로필'에서 등록하세요!")
         return None
@@ -231,6 +286,50 @@ def pet_selector(label="반려동물 선택"):
     return options[choice]
 
 
+# ========================= 공통 기록 목록 위젯 =========================
+PAGE_SIZES = [20, 50, 100]
+
+# 위험 정보 검색 결과 최대 표시 건수
+SEARCH_LIMIT = 200
+
+
+def log_record_table(kind, view_df, label):
+    """기록을 현재 페이지만큼만 그리고, 선택한 행들을 한 번에 삭제"""
+    total = len(view_df)
+    col_size, col_page, col_info = st.columns([2, 2, 3])
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", PAGE_SIZES, key=f"{kind}_page_size")
+    n_pages = max(1, -(-total // page_size))
+    with col_page:
+        # 페이지 수가 바뀌면(삭제/기간 변경) 첫 페이지부터 다시 보여준다
+        page_no = st.number_input("페이지", min_value=1, max_value=n_pages, value=1, step=1,
+                                  key=f"{kind}_page_{n_pages}")
+    with col_info:
+        st.caption(f"총 {total}건 · {n_pages}페이지")
+
+    window = view_df.iloc[(page_no - 1) * page_size: page_no * page_size]
+    edited = st.data_editor(
+        window.assign(선택=False),
+        column_config={
+            "log_id": None,
+            "날짜": st.column_config.DateColumn("날짜", format="YYYY-MM-DD"),
+            "선택": st.column_config.CheckboxColumn("선택"),
+        },
+        disabled=list(window.columns),
+        hide_index=True,
+        key=f"{kind}_editor_{page_no}_{page_size}",
+    )
+
+    def delete_selected(log_ids):
+        # 콜백에서 지우면 이어지는 (조각) 실행이 바로 삭제된 결과를 그린다
+        store.delete_logs(kind, log_ids)
+        st.toast(f"{label} 기록 {len(log_ids)}건 삭제 완료!")
+
+    selected = edited.loc[edited["선택"], "log_id"].tolist()
+    st.button(f"선택 삭제 ({len(selected)}건)", key=f"del_{kind}_selected", disabled=not selected,
+              on_click=delete_selected, args=(selected,))
+
+
 # ========================= 1) 대시보드 =========================
 if page == "대시보드":
     st.header("📊 오늘 한눈에 보기")
@@ -257,10 +356,7 @@ if page == "대시보드":
                 pet["species"], float(pet.get("weight_kg", 0))
             )
             today = local_today().isoformat()
-            eaten = st.session_state.feed_df[
-                (st.session_state.feed_df["pet_id"] == pet["id"])
-                & (st.session_state.feed_df["date"] == today)
-            ]["amount_g"].sum()
+            eaten = store.log_total("feed", pet["id"], today)
 
             st.write(f"권장량: **{grams} g** / 간식 상한: **{snack_limit} g**")
             # 권장량 계산 수식 표시
@@ -280,10 +376,7 @@ if page == "대시보드":
         with col3:
             st.subheader("물 급수")
             wml = recommended_water_ml(float(pet.get("weight_kg", 0)))
-            drank = st.session_state.water_df[
-                (st.session_state.water_df["pet_id"] == pet["id"])
-                & (st.session_state.water_df["date"] == today)
-            ]["amount_ml"].sum()
+            drank = store.log_total("water", pet["id"], today)
 
             st.write(f"권장량: **{wml} ml**")
             # 권장량 계산 수식 표시
@@ -300,30 +393,21 @@ if page == "대시보드":
         # 복약
         today_str = local_today().isoformat()
         
-        # pet_id와 date를 조합한 키로 복약 기록 가져오기
-        today_med_log_key = f"{pet['id']}_{today_str}"
-        today_med_logs = st.session_state.med_log.get(today_med_log_key, {})
+        # pet_id와 date로 오늘 복약 기록 가져오기
+        today_med_logs = store.med_day_log(pet["id"], today_str)
         
         meds_today = []
-        for m in st.session_state.med_schedule:
-            if m["pet_id"] != pet["id"]:
-                continue
-
-            start_ok = not m.get("start") or m["start"] <= today_str
-            end_ok = not m.get("end") or today_str <= m["end"]
-
-            if start_ok and end_ok:
-                for t in m.get("times", []):
-                    med_id = m["id"]
-                    log_key = f"{med_id}_{t}"
-                    is_taken = log_key in today_med_logs
-                    meds_today.append({
-                        "id": med_id,
-                        "시간": t,
-                        "약": m["drug"],
-                        "용량": f"{m['dose']}{m['unit']}",
-                        "복용여부": "✅ 완료" if is_taken else "❌ 미완료"
-                    })
+        # 오늘 유효한 스케줄만 인덱스에서 펼쳐 온다 (시간 순)
+        for o in store.med_occurrences(pet["id"], today_str):
+            m, t = o["med"], o["time"]
+            is_taken = f"{m['id']}_{t}" in today_med_logs
+            meds_today.append({
+                "id": m["id"],
+                "시간": t,
+                "약": m["drug"],
+                "용량": f"{m['dose']}{m['unit']}",
+                "복용여부": "✅ 완료" if is_taken else "❌ 미완료"
+            })
 
         if meds_today:
             st.write("📌 복약 예정")
@@ -333,10 +417,7 @@ if page == "대시보드":
             st.write("오늘 복약 일정 없음")
 
         # 병원 일정
-        events = [
-            e for e in st.session_state.hospital_events
-            if e["pet_id"] == pet["id"] and e["dt"].startswith(today_str)
-        ]
+        events = store.hospital_events_on(pet["id"], today_str)
 
         if events:
             st.write("📌 병원 방문")
@@ -346,6 +427,23 @@ if page == "대시보드":
         else:
             st.write("오늘 병원 일정 없음")
 
+        # ------ 전체 반려동물 현황 ------
+        st.divider()
+        st.subheader("🐾 전체 반려동물 현황")
+        o1, o2 = st.columns(2)
+        with o1:
+            overview_start = st.date_input("시작일", value=local_today() - timedelta(days=6), key="overview_start")
+        with o2:
+            overview_end = st.date_input("종료일", value=local_today(), key="overview_end")
+
+        if overview_start > overview_end:
+            st.error("시작일이 종료일보다 늦습니다.")
+        else:
+            st.dataframe(
+                pets_intake_overview(store.pets(), overview_start, overview_end),
+                hide_index=True,
+            )
+
 
 # ========================= 2) 반려동물 프로필 =========================
 elif page == "반려동물 프로필":
@@ -375,41 +473,53 @@ elif page == "반려동물 프로필":
                     "weight_kg": float(weight),
                     "notes": notes.strip()
                 }
-                st.session_state.pets.append(new_pet)
-                save_json(PET_FILE, st.session_state.pets)
+                store.add_pet(new_pet)
+                # 목록은 이 아래에서 그려지므로 다시 실행할 필요가 없다
                 st.success(f"{name} 등록 완료!")
-                st.rerun()
 
     # ---------------------- 목록/편집 ----------------------
+    def save_pet(p):
+        # 저장 버튼 콜백: 편집 중인 값은 위젯 키로 session_state에서 읽는다
+        ss = st.session_state
+        store.update_pet(dict(
+            p,
+            name=ss[f"name_{p['id']}"],
+            species=ss[f"species_{p['id']}"],
+            breed=ss[f"breed_{p['id']}"],
+            birth=ss[f"birth_{p['id']}"],
+            weight_kg=ss[f"weight_{p['id']}"],
+            notes=ss[f"notes_{p['id']}"],
+        ))
+        st.toast("저장 완료!")
+
+    def delete_pet(pet_id):
+        store.delete_pet(pet_id)
+        st.toast("삭제되었습니다.")
+
     st.subheader("등록된 반려동물")
-    if not st.session_state.pets:
+    pets = store.pets()
+    if not pets:
         st.info("아직 등록된 반려동물이 없습니다.")
     else:
-        for p in st.session_state.pets:
+        for p in pets:
             with st.expander(f"{p['name']} ({p['species']})"):
                 colA, colB = st.columns([2, 1])
+                # 공유 캐시 객체는 그대로 두고, 저장 시 위젯 값으로 편집본을 만든다
                 with colA:
-                    p["name"] = st.text_input("이름", p["name"], key=f"name_{p['id']}")
-                    p["species"] = st.selectbox("종류", ["개", "고양이", "기타"],
-                                                 index=["개","고양이","기타"].index(p["species"]),
-                                                 key=f"species_{p['id']}")
-                    p["breed"] = st.text_input("품종", p["breed"], key=f"breed_{p['id']}")
-                    p["birth"] = st.text_input("생일(YYYY-MM-DD)", p["birth"], key=f"birth_{p['id']}")
-                    p["weight_kg"] = st.number_input("체중(kg)", value=float(p.get("weight_kg", 0)),
-                                                     step=0.1, key=f"weight_{p['id']}")
-                    p["notes"] = st.text_area("메모", value=p.get("notes", ""), key=f"notes_{p['id']}")
+                    st.text_input("이름", p["name"], key=f"name_{p['id']}")
+                    st.selectbox("종류", ["개", "고양이", "기타"],
+                                 index=["개","고양이","기타"].index(p["species"]),
+                                 key=f"species_{p['id']}")
+                    st.text_input("품종", p["breed"], key=f"breed_{p['id']}")
+                    st.text_input("생일(YYYY-MM-DD)", p["birth"], key=f"birth_{p['id']}")
+                    st.number_input("체중(kg)", value=float(p.get("weight_kg", 0)),
+                                    step=0.1, key=f"weight_{p['id']}")
+                    st.text_area("메모", value=p.get("notes", ""), key=f"notes_{p['id']}")
 
                 with colB:
-                    if st.button("저장", key=f"save_{p['id']}"):
-                        save_json(PET_FILE, st.session_state.pets)
-                        st.success("저장 완료!")
-                        st.rerun()
-
-                    if st.button("삭제", key=f"delete_{p['id']}"):
-                        st.session_state.pets = [x for x in st.session_state.pets if x["id"] != p["id"]]
-                        save_json(PET_FILE, st.session_state.pets)
-                        st.warning("삭제되었습니다.")
-                        st.rerun()
+                    # 콜백에서 저장/삭제하므로 클릭 한 번에 스크립트도 한 번만 실행된다
+                    st.button("저장", key=f"save_{p['id']}", on_click=save_pet, args=(p,))
+                    st.button("삭제", key=f"delete_{p['id']}", on_click=delete_pet, args=(p["id"],))
 
 
 # ========================= 3) 사료 / 급수 기록 =========================
@@ -452,8 +562,7 @@ elif page == "사료/급수 기록":
                         "amount_g": [int(food_g)],
                         "memo": [food_memo.strip()],
                     })
-                    st.session_state.feed_df = pd.concat([st.session_state.feed_df, new_food], ignore_index=True)
-                    save_csv(FEED_FILE, st.session_state.feed_df)
+                    store.add_log("feed", new_food)
 
                 # 물 추가
                 if water_ml > 0:
@@ -464,11 +573,10 @@ elif page == "사료/급수 기록":
                         "amount_ml": [int(water_ml)],
                         "memo": [water_memo.strip()],
                     })
-                    st.session_state.water_df = pd.concat([st.session_state.water_df, new_water], ignore_index=True)
-                    save_csv(WATER_FILE, st.session_state.water_df)
+                    store.add_log("water", new_water)
 
+                # 오늘 요약/기록 조회는 이 아래에서 그려지므로 다시 실행할 필요가 없다
                 st.success(f"[{log_date}] 날짜의 기록이 저장되었습니다!")
-                st.rerun()
 
         # -------- 오늘 요약 --------
         st.subheader("오늘 요약")
@@ -479,8 +587,8 @@ elif page == "사료/급수 기록":
         wml = recommended_water_ml(float(pet.get("weight_kg", 0)))
         today = local_today().isoformat()
         
-        eaten = st.session_state.feed_df[(st.session_state.feed_df["pet_id"] == pet["id"]) & (st.session_state.feed_df["date"] == today)]["amount_g"].sum()
-        drank = st.session_state.water_df[(st.session_state.water_df["pet_id"] == pet["id"]) & (st.session_state.water_df["date"] == today)]["amount_ml"].sum()
+        eaten = store.log_total("feed", pet["id"], today)
+        drank = store.log_total("water", pet["id"], today)
 
         colA, colB = st.columns(2)
         with colA:
@@ -489,73 +597,59 @@ elif page == "사료/급수 기록":
             st.metric("급수량", f"{int(drank)} ml", help=f"권장: {wml} ml")
 
         # -------- 기간별 조회 --------
-        st.subheader("기록 조회")
-        d1, d2 = st.columns(2)
-        with d1:
-            start = st.date_input("시작일", value=local_today() - timedelta(days=7), key="feed_start_date")
-        with d2:
-            end = st.date_input("종료일", value=local_today(), key="feed_end_date")
-
-        mask_food = (
-            (st.session_state.feed_df["pet_id"] == pet["id"]) &
-            (st.session_state.feed_df["date"] >= start.isoformat()) &
-            (st.session_state.feed_df["date"] <= end.isoformat())
-        )
-        mask_water = (
-            (st.session_state.water_df["pet_id"] == pet["id"]) &
-            (st.session_state.water_df["date"] >= start.isoformat()) &
-            (st.session_state.water_df["date"] <= end.isoformat())
-        )
+        # 기간/차트 단위/페이지 변경은 이 조각만 다시 실행한다
+        @st.fragment
+        @traced("조각: 기록 조회")
+        def record_history():
+            st.subheader("기록 조회")
+            d1, d2 = st.columns(2)
+            with d1:
+                start = st.date_input("시작일", value=local_today() - timedelta(days=7), key="feed_start_date")
+            with d2:
+                end = st.date_input("종료일", value=local_today(), key="feed_end_date")
+            # 차트는 미리 집계해 둔 일/주/월 합계를 읽는다 (원본 로그를 다시 묶지 않음)
+            chart_freq = st.radio("차트 단위", list(FREQ_LABELS), format_func=FREQ_LABELS.get,
+                                  horizontal=True, key="chart_freq")
+
+            # 💡 (pet_id, 기간) 범위 조회: 필요한 행만 가져온다
+            feed_range_df = store.log_range("feed", pet["id"], start.isoformat(), end.isoformat())
+            water_range_df = store.log_range("water", pet["id"], start.isoformat(), end.isoformat())
         
-        # 사료/간식 기록 및 삭제 기능
-        st.write("🍖 사료/간식 기록")
-        food_view_df = st.session_state.feed_df.loc[mask_food, ["log_id", "date", "amount_g", "memo"]].sort_values("date", ascending=False)
-        food_view_df = food_view_df.rename(columns={"date": "날짜", "amount_g": "양(g)", "memo": "메모"})
+            # 사료/간식 기록 및 삭제 기능
+            st.write("🍖 사료/간식 기록")
+            food_view_df = feed_range_df[["log_id", "date", "amount_g", "memo"]].sort_values("date", ascending=False)
+            food_view_df = food_view_df.rename(columns={"date": "날짜", "amount_g": "양(g)", "memo": "메모"})
         
-        if not food_view_df.empty:
-            # 💡 차트 데이터 준비 및 표시
-            food_chart_df = food_view_df.groupby('날짜')['양(g)'].sum().reset_index()
-            food_chart_df = food_chart_df.set_index('날짜')
-            st.line_chart(food_chart_df, use_container_width=True) # ⬅️ 사료 섭취량 차트 표시
-
-            for index, row in food_view_df.iterrows():
-                col_food_data, col_food_del = st.columns([6, 1])
-                with col_food_data:
-                    st.text(f"[{row['날짜']}] {row['양(g)']}g ({row['메모']})")
-                with col_food_del:
-                    if st.button("삭제", key=f"del_food_{row['log_id']}"):
-                        st.session_state.feed_df = st.session_state.feed_df[st.session_state.feed_df["log_id"] != row["log_id"]]
-                        save_csv(FEED_FILE, st.session_state.feed_df)
-                        st.warning("사료 기록 삭제 완료!")
-                        st.rerun()
-        else:
-            st.info("기록 없음")
+            if not food_view_df.empty:
+                # 💡 차트 데이터 준비 및 표시
+                food_chart_df = store.log_rollup("feed", pet["id"], start.isoformat(), end.isoformat(), chart_freq)
+                food_chart_df = food_chart_df.rename("양(g)").to_frame()
+                with span("chart"):
+                    st.line_chart(food_chart_df, use_container_width=True) # ⬅️ 사료 섭취량 차트 표시
+
+                log_record_table("feed", food_view_df, "사료")
+            else:
+                st.info("기록 없음")
             
-        st.divider()
-
-        # 급수 기록 및 삭제 기능
-        st.write("💧 급수 기록")
-        water_view_df = st.session_state.water_df.loc[mask_water, ["log_id", "date", "amount_ml", "memo"]].sort_values("date", ascending=False)
-        water_view_df = water_view_df.rename(columns={"date": "날짜", "amount_ml": "양(ml)", "memo": "메모"})
-
-        if not water_view_df.empty:
-            # 💡 차트 데이터 준비 및 표시
-            water_chart_df = water_view_df.groupby('날짜')['양(ml)'].sum().reset_index()
-            water_chart_df = water_chart_df.set_index('날짜')
-            st.line_chart(water_chart_df, use_container_width=True) # ⬅️ 급수량 차트 표시
+            st.divider()
+
+            # 급수 기록 및 삭제 기능
+            st.write("💧 급수 기록")
+            water_view_df = water_range_df[["log_id", "date", "amount_ml", "memo"]].sort_values("date", ascending=False)
+            water_view_df = water_view_df.rename(columns={"date": "날짜", "amount_ml": "양(ml)", "memo": "메모"})
+
+            if not water_view_df.empty:
+                # 💡 차트 데이터 준비 및 표시
+                water_chart_df = store.log_rollup("water", pet["id"], start.isoformat(), end.isoformat(), chart_freq)
+                water_chart_df = water_chart_df.rename("양(ml)").to_frame()
+                with span("chart"):
+                    st.line_chart(water_chart_df, use_container_width=True) # ⬅️ 급수량 차트 표시
             
-            for index, row in water_view_df.iterrows():
-                col_water_data, col_water_del = st.columns([6, 1])
-                with col_water_data:
-                    st.text(f"[{row['날짜']}] {row['양(ml)']}ml ({row['메모']})")
-                with col_water_del:
-                    if st.button("삭제", key=f"del_water_{row['log_id']}"):
-                        st.session_state.water_df = st.session_state.water_df[st.session_state.water_df["log_id"] != row["log_id"]]
-                        save_csv(WATER_FILE, st.session_state.water_df)
-                        st.warning("급수 기록 삭제 완료!")
-                        st.rerun()
-        else:
-            st.info("기록 없음")
+                log_record_table("water", water_view_df, "급수")
+            else:
+                st.info("기록 없음")
+
+        record_history()
 
 
 # ========================= 4) 복약 알림 =========================
@@ -565,108 +659,139 @@ elif page == "복약 알림":
     pet = pet_selector()
     if pet:
         today_str = local_today().isoformat()
-        log_key_date = f"{pet['id']}_{today_str}"
+        meds = store.med_schedules(pet["id"])
+
+        def toggle_med_taken(med_id, time_str, key):
+            # 체크박스 on_change 콜백: 위젯 값대로 복용 기록/취소 (이후 복약 현황 조각만 다시 실행)
+            taken_at = local_now() if st.session_state[key] else None
+            store.set_med_taken(pet["id"], today_str, med_id, time_str, taken_at)
+
+        # 체크 토글과 리포트 기간 변경은 이 조각만 다시 실행한다
+        @st.fragment
+        @traced("조각: 복약 현황")
+        def med_status():
+            # 오늘 복약 기록 로드. 없으면 빈 딕셔너리
+            today_med_logs = store.med_day_log(pet["id"], today_str)
+
+            # -------- 오늘 복약 체크 --------
+            st.subheader("🔔 오늘 복약 확인")
+            meds_today_list = []
+            for o in store.med_occurrences(pet["id"], today_str):
+                m, t = o["med"], o["time"]
+                meds_today_list.append({
+                    "id": m['id'],
+                    "time": t,
+                    "drug": m['drug'],
+                    "dose": m['dose'],
+                    "unit": m['unit'],
+                    "is_taken": f"{m['id']}_{t}" in today_med_logs
+                })
         
-        # 오늘 복약 기록 로드. 없으면 빈 딕셔너리
-        today_med_logs = st.session_state.med_log.get(log_key_date, {})
-
-        def update_med_log(med_id, time_str, is_taken):
-            # 복약 상태 업데이트 함수
-            log_key_med_time = f"{med_id}_{time_str}"
-            if log_key_date not in st.session_state.med_log:
-                st.session_state.med_log[log_key_date] = {}
-            
-            if is_taken:
-                st.session_state.med_log[log_key_date][log_key_med_time] = local_now()
-            elif log_key_med_time in st.session_state.med_log[log_key_date]:
-                del st.session_state.med_log[log_key_date][log_key_med_time]
-            
-            save_json(MED_LOG_FILE, st.session_state.med_log)
-            st.rerun()
-
-        # -------- 오늘 복약 체크 --------
-        st.subheader("🔔 오늘 복약 확인")
-        meds = [m for m in st.session_state.med_schedule if m["pet_id"] == pet["id"]]
-        meds_today_list = []
-        for m in meds:
-            start_ok = not m.get("start") or m["start"] <= today_str
-            end_ok = not m.get("end") or today_str <= m["end"]
-            
-            if start_ok and end_ok:
-                for t in sorted(m.get("times", [])):
-                    med_time_key = f"{m['id']}_{t}"
-                    is_taken = med_time_key in today_med_logs
-                    
-                    meds_today_list.append({
-                        "id": m['id'],
-                        "time": t,
-                        "drug": m['drug'],
-                        "dose": m['dose'],
-                        "unit": m['unit'],
-                        "is_taken": is_taken
-                    })
-        
-        if meds_today_list:
-            for item in meds_today_list:
-                col_time, col_drug, col_check = st.columns([1, 4, 1]) 
+            if meds_today_list:
+                for item in meds_today_list:
+                    col_time, col_drug, col_check = st.columns([1, 4, 1]) 
                 
-                with col_time:
-                    st.markdown(f"**{item['time']}**")
+                    with col_time:
+                        st.markdown(f"**{item['time']}**")
                 
-                with col_drug:
-                    st.write(f"{item['drug']} ({item['dose']}{item['unit']})")
-
-                with col_check:
-                    # 체크박스 변경 시 update_med_log 함수 호출
-                    if st.checkbox("복용 완료", value=item['is_taken'], 
-                                   key=f"med_check_{item['id']}_{item['time']}"):
-                        if not item['is_taken']:
-                            update_med_log(item['id'], item['time'], True)
-                    elif item['is_taken']:
-                        update_med_log(item['id'], item['time'], False)
-        else:
-            st.info("오늘 복약 일정이 없습니다.")
+                    with col_drug:
+                        st.write(f"{item['drug']} ({item['dose']}{item['unit']})")
+
+                    with col_check:
+                        # 체크박스 변경 시 toggle_med_taken 콜백 호출
+                        check_key = f"med_check_{item['id']}_{item['time']}"
+                        st.checkbox("복용 완료", value=item['is_taken'], key=check_key,
+                                    on_change=toggle_med_taken, args=(item['id'], item['time'], check_key))
+            else:
+                st.info("오늘 복약 일정이 없습니다.")
+
+            # -------- 앞으로의 복약 일정 --------
+            with st.expander("📅 앞으로 30일 복약 일정"):
+                upcoming = store.med_occurrences(
+                    pet["id"], today_str, (local_today() + timedelta(days=30)).isoformat()
+                )
+                if upcoming:
+                    st.dataframe(
+                        pd.DataFrame([{
+                            "날짜": o["date"],
+                            "시간": o["time"],
+                            "약": o["med"]["drug"],
+                            "용량": f"{o['med']['dose']}{o['med']['unit']}",
+                        } for o in upcoming]),
+                        hide_index=True,
+                    )
+                else:
+                    st.write("예정된 복약 일정 없음")
+
+            # -------- 복약 순응도 리포트 --------
+            with st.expander("📊 복약 순응도 리포트"):
+                colA, colB = st.columns(2)
+                with colA:
+                    report_start = st.date_input("시작일", value=local_today() - timedelta(days=29), key="adherence_start")
+                with colB:
+                    report_end = st.date_input("종료일", value=local_today(), key="adherence_end")
+
+                summary, missed = adherence_report(
+                    meds,
+                    store.med_log_range(pet["id"], report_start.isoformat(), report_end.isoformat()),
+                    report_start.isoformat(),
+                    report_end.isoformat(),
+                    datetime.strptime(local_now(), "%Y-%m-%d %H:%M:%S"),
+                )
+                if summary.empty:
+                    st.write("기간 내 복약 일정 없음")
+                else:
+                    st.dataframe(summary, hide_index=True)
+                    st.caption(f"놓친 복용 {len(missed)}건")
+                    if not missed.empty:
+                        st.dataframe(missed, hide_index=True)
+
+        med_status()
 
         st.divider()
 
         # -------- 새 스케줄 추가 --------
+        # 제출 콜백에서 저장하면 이번 실행의 오늘 복약 / 스케줄 목록에 바로 반영된다 (다시 실행 불필요)
+        def add_med_schedule(pet_id):
+            form = st.session_state
+            valid_times = [t.strip() for t in form.med_times.split(",") if t.strip()]
+            if not form.med_drug.strip() or not valid_times:
+                st.toast("약 이름과 복용 시간은 필수입니다.", icon="⚠️")
+                return
+            store.add_med_schedule({
+                "id": str(uuid.uuid4()),
+                "pet_id": pet_id,
+                "drug": form.med_drug.strip(),
+                "dose": form.med_dose.strip(),
+                "unit": form.med_unit.strip(),
+                "times": valid_times,
+                "start": form.med_start.isoformat(),
+                "end": form.med_end.isoformat() if form.med_end else "",
+                "notes": form.med_notes.strip(),
+            })
+            st.toast("복약 스케줄이 추가되었습니다!")
+
         st.subheader("새 복약 스케줄 추가")
         with st.form("med_form", clear_on_submit=True):
-            drug = st.text_input("약 이름*")
-            dose = st.text_input("용량")
-            unit = st.text_input("단위(정, mg 등)")
-            times_str = st.text_input("복용 시간(HH:MM, 콤마 구분)", placeholder="08:00, 20:00")
+            st.text_input("약 이름*", key="med_drug")
+            st.text_input("용량", key="med_dose")
+            st.text_input("단위(정, mg 등)", key="med_unit")
+            st.text_input("복용 시간(HH:MM, 콤마 구분)", placeholder="08:00, 20:00", key="med_times")
             colA, colB = st.columns(2)
             with colA:
-                start = st.date_input("시작일", value=local_today())
+                st.date_input("시작일", value=local_today(), key="med_start")
             with colB:
-                end = st.date_input("종료일 (선택)", value=None)
-            notes = st.text_area("메모")
+                st.date_input("종료일 (선택)", value=None, key="med_end")
+            st.text_area("메모", key="med_notes")
 
-            ok = st.form_submit_button("추가")
-
-            if ok:
-                valid_times = [t.strip() for t in times_str.split(",") if t.strip()]
-                if not drug.strip() or not valid_times:
-                    st.error("약 이름과 복용 시간은 필수입니다.")
-                else:
-                    new_med = {
-                        "id": str(uuid.uuid4()),
-                        "pet_id": pet["id"],
-                        "drug": drug.strip(),
-                        "dose": dose.strip(),
-                        "unit": unit.strip(),
-                        "times": valid_times,
-                        "start": start.isoformat(),
-                        "end": end.isoformat() if end else "",
-                        "notes": notes.strip(),
-                    }
-                    st.session_state.med_schedule.append(new_med)
-                    save_json(MED_FILE, st.session_state.med_schedule)
-                    st.success("복약 스케줄이 추가되었습니다!")
-                    st.rerun()
+            st.form_submit_button("추가", on_click=add_med_schedule, args=(pet["id"],))
 
         # -------- 등록된 스케줄 목록 --------
+        def delete_med_schedule(med):
+            # 스케줄과 해당 스케줄의 복약 기록을 함께 삭제
+            store.delete_med_schedule(med)
+            st.toast("스케줄이 삭제되었습니다.")
+
         st.subheader("등록된 스케줄 관리")
         if not meds:
             st.info("등록된 복약 스케줄 없음")
@@ -678,25 +803,7 @@ elif page == "복약 알림":
                     if m["notes"]:
                         st.caption(m["notes"])
 
-                    if st.button("삭제", key=f"del_med_{m['id']}"):
-                        st.session_state.med_schedule = [
-                            x for x in st.session_state.med_schedule if x["id"] != m["id"]
-                        ]
-                        save_json(MED_FILE, st.session_state.med_schedule)
-                        
-                        keys_to_delete = [k for k in st.session_state.med_log if k.startswith(pet["id"])]
-                        for key in keys_to_delete:
-                            st.session_state.med_log[key] = {
-                                log_key: log_value 
-                                for log_key, log_value in st.session_state.med_log[key].items() 
-                                if not log_key.startswith(m['id'])
-                            }
-                            if not st.session_state.med_log[key]:
-                                del st.session_state.med_log[key]
-                        save_json(MED_LOG_FILE, st.session_state.med_log)
-                        
-                        st.warning("스케줄이 삭제되었습니다.")
-                        st.rerun()
+                    st.button("삭제", key=f"del_med_{m['id']}", on_click=delete_med_schedule, args=(m,))
 
 
 # ========================= 5) 병원 일정 =========================
@@ -717,6 +824,7 @@ elif page == "병원 일정":
                 t = st.time_input("시간", value=time(10, 0))
 
             place = st.text_input("장소")
+            repeat = st.selectbox("반복", list(REPEAT_LABELS), format_func=REPEAT_LABELS.get)
             notes = st.text_area("메모")
 
             ok = st.form_submit_button("추가")
@@ -733,86 +841,93 @@ elif page == "병원 일정":
                         "dt": dt_iso,
                         "place": place.strip(),
                         "notes": notes.strip(),
+                        "repeat": repeat,
                     }
-                    st.session_state.hospital_events.append(new_event)
-                    save_json(HOSP_FILE, st.session_state.hospital_events)
+                    store.add_hospital_event(new_event)
+                    # 일정 목록은 이 아래에서 그려지므로 다시 실행할 필요가 없다
                     st.success("일정이 추가되었습니다!")
-                    st.rerun()
 
-        # -------- 일정 목록 --------
+        def format_dt(dt):
+            try:
+                return datetime.fromisoformat(dt).strftime("%Y-%m-%d %H:%M")
+            except ValueError:
+                return dt
+
+        # -------- 다가오는 일정 (반복 일정은 가까운 회차만 펼침) --------
         st.subheader("다가오는 일정")
-        events = [
-            e for e in st.session_state.hospital_events
-            if e["pet_id"] == pet["id"]
-        ]
-        events = sorted(events, key=lambda x: x["dt"])
+        upcoming = store.upcoming_hospital_events(pet["id"], local_today().isoformat(), 10)
+        if not upcoming:
+            st.info("다가오는 일정이 없습니다.")
+        else:
+            for e in upcoming:
+                st.write(f"**{format_dt(e['dt'])}** — **{e['title']}** ({e.get('place', '장소 미정')})")
+
+        # -------- 일정 목록 --------
+        def delete_hospital_event(event_id):
+            store.delete_hospital_event(event_id)
+            st.toast("삭제되었습니다.")
+
+        st.subheader("등록된 일정 관리")
+        events = store.hospital_events(pet["id"])  # 일시 순 정렬
 
         if not events:
             st.info("등록된 일정이 없습니다.")
         else:
             for e in events:
-                try:
-                    dt_obj = datetime.fromisoformat(e["dt"])
-                    dt_kst = dt_obj.strftime("%Y-%m-%d %H:%M")
-                except ValueError:
-                    dt_kst = e["dt"]
-
-                st.write(f"**{dt_kst}** — **{e['title']}** ({e.get('place', '장소 미정')})")
+                repeat_label = f" · 🔁 {REPEAT_LABELS[e['repeat']]}" if e.get("repeat") else ""
+                st.write(f"**{format_dt(e['dt'])}**{repeat_label} — **{e['title']}** ({e.get('place', '장소 미정')})")
                 if e.get("notes"):
                     st.caption(e["notes"])
 
-                if st.button("삭제", key=f"del_evt_{e['id']}"):
-                    st.session_state.hospital_events = [
-                        x for x in st.session_state.hospital_events if x["id"] != e["id"]
-                    ]
-                    save_json(HOSP_FILE, st.session_state.hospital_events)
-                    st.warning("삭제되었습니다.")
-                    st.rerun()
+                st.button("삭제", key=f"del_evt_{e['id']}", on_click=delete_hospital_event, args=(e["id"],))
 
 
 # ========================= 6) 위험 정보 검색 =========================
 elif page == "위험 정보 검색":
     st.header("⚠️ 위험 음식 / 식물 / 물품 검색")
 
-    query = st.text_input("검색어 입력")
-
-    db = pd.DataFrame(st.session_state.unsafe_db)
-
-    if query.strip():
-        # 이름, 분류, 이유 필드 전체에서 검색
-        mask = (
-            db["name"].str.contains(query, case=False, na=False) |
-            db["category"].str.contains(query, case=False, na=False) |
-            db["why"].str.contains(query, case=False, na=False)
-        )
-        view = db[mask]
-    else:
-        view = db
+    # 검색어 입력은 이 조각만 다시 실행한다
+    @st.fragment
+    @traced("조각: 위험 정보 검색")
+    def unsafe_search():
+        query = st.text_input("검색어 입력")
+
+        columns = {"category": "분류", "name": "이름", "risk": "위험도", "why": "이유"}
+        if query.strip():
+            # 이름, 분류, 이유 필드 전체에서 색인으로 검색 (관련도 순, 상위 SEARCH_LIMIT건)
+            results = store.search_unsafe(query, limit=SEARCH_LIMIT)
+            view = pd.DataFrame(results, columns=list(columns)).rename(columns=columns)
+            st.caption(f"검색 결과 {len(view)}건" + (f" (상위 {SEARCH_LIMIT}건)" if len(view) == SEARCH_LIMIT else ""))
+            st.dataframe(view, hide_index=True)
+        else:
+            view = pd.DataFrame(store.unsafe_items(), columns=list(columns)).rename(columns=columns)
+            st.dataframe(view.sort_values(["분류", "위험도"]))
 
-    view = view.rename(columns={"category": "분류", "name": "이름", "risk": "위험도", "why": "이유"})
-    st.dataframe(view.sort_values(["분류", "위험도"]))
+    unsafe_search()
 
     # ------ 항목 추가 ------
+    # 제출 콜백에서 저장하면 위의 검색 결과에 바로 반영된다 (다시 실행 불필요)
+    def add_unsafe_item():
+        form = st.session_state
+        if not form.unsafe_name.strip() or not form.unsafe_why.strip():
+            st.toast("이름과 이유는 필수입니다.", icon="⚠️")
+            return
+        store.add_unsafe_item({
+            "category": form.unsafe_category,
+            "name": form.unsafe_name.strip(),
+            "risk": form.unsafe_risk,
+            "why": form.unsafe_why.strip(),
+        })
+        st.toast("추가 완료!")
+
     with st.expander("항목 추가"):
         with st.form("unsafe_add", clear_on_submit=True):
-            cat = st.selectbox("분류", ["음식", "식물", "물품"])
-            nm = st.text_input("이름")
-            rk = st.selectbox("위험도", ["주의", "중간-고위험", "고위험"])
-            why = st.text_area("이유")
-
-            if st.form_submit_button("추가"):
-                if not nm.strip() or not why.strip():
-                    st.error("이름과 이유는 필수입니다.")
-                else:
-                    st.session_state.unsafe_db.append({
-                        "category": cat,
-                        "name": nm.strip(),
-                        "risk": rk,
-                        "why": why.strip(),
-                    })
-                    save_json(UNSAFE_FILE, st.session_state.unsafe_db)
-                    st.success("추가 완료!")
-                    st.rerun()
+            st.selectbox("분류", ["음식", "식물", "물품"], key="unsafe_category")
+            st.text_input("이름", key="unsafe_name")
+            st.selectbox("위험도", ["주의", "중간-고위험", "고위험"], key="unsafe_risk")
+            st.text_area("이유", key="unsafe_why")
+
+            st.form_submit_button("추가", on_click=add_unsafe_item)
 
 # ========================= 8) 관리자 대시보드 =========================
 elif page == "관리자 대시보드":
@@ -823,49 +938,137 @@ elif page == "관리자 대시보드":
 
     st.header("👑 관리자 대시보드")
 
-    # 1. 시스템 상태 요약
-    st.subheader("시스템 데이터 요약")
-    colA, colB, colC = st.columns(3)
-    with colA:
-        st.metric("총 반려동물 수", len(st.session_state.pets))
-    with colB:
-        st.metric("총 복약 스케줄", len(st.session_state.med_schedule))
-    with colC:
-        st.metric("총 사료 로그 항목", len(st.session_state.feed_df))
-    
+    # 읽을 수 없어 옮겨 둔 CSV (복구는 수동)
+    for item in set_aside_files():
+        st.warning(f"손상된 파일을 옮겨 두었습니다: {item['path']} → {item['backup']} ({item['error']})")
+
+    # 1. 운영 지표 (활동 기록의 증분 집계라 회원/기록이 많아도 전체를 다시 읽지 않음)
+    FLEET_DAYS = 30
+    fleet_agg = fleet.aggregates()
+    today_key = now_in(DEFAULT_TZ).date().isoformat()
+    user_total, _ = store.user_page("", 0, 0)
+
+    st.subheader("운영 지표")
+    colA, colB, colC, colD = st.columns(4)
+    colA.metric("총 회원 수", user_total)
+    colB.metric("총 반려동물 수", sum(fleet_agg["pets"].values()))
+    colC.metric("오늘 활성 사용자", len(fleet_agg["dau"].get(today_key, ())))
+    colD.metric("오늘 기록 수", fleet_agg["entries"].get(today_key, 0))
+
+    col_dau, col_entries = st.columns(2)
+    with col_dau:
+        st.caption(f"일일 활성 사용자 (최근 {FLEET_DAYS}일)")
+        st.bar_chart(fleet.dau(FLEET_DAYS).rename("활성 사용자"))
+    with col_entries:
+        st.caption(f"일별 사료/급수 기록 수 (최근 {FLEET_DAYS}일, 삭제 차감)")
+        st.bar_chart(fleet.entries(FLEET_DAYS).rename("기록 수"))
+
+    col_pets, col_size = st.columns(2)
+    with col_pets:
+        st.caption("반려동물이 많은 사용자 (상위 20명)")
+        top_pets = sorted(fleet_agg["pets"].items(), key=lambda kv: -kv[1])[:20]
+        if top_pets:
+            st.dataframe(pd.DataFrame(top_pets, columns=["사용자", "반려동물 수"]), hide_index=True)
+        else:
+            st.caption("등록된 반려동물이 없습니다.")
+    with col_size:
+        size_df, size_days = fleet.storage_report()
+        st.caption(f"데이터셋별 저장 용량 (증가량은 최근 {size_days}일 평균)" if size_days
+                   else "데이터셋별 저장 용량 (증가량은 내일부터 표시)")
+        st.dataframe(size_df, hide_index=True)
+
+    # 콜드 스타트 / 데이터셋 로드 시간 (이 서버 프로세스 기준)
+    with st.expander("⏱️ 시작 / 데이터 로드 시간"):
+        startup = startup_stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("import (ms)", startup.get("import_ms", "-"))
+        c2.metric("첫 화면 (ms)", startup.get("first_paint_ms", "-"))
+        c3.metric("첫 페이지 완료 (ms)", startup.get("first_page_ms", "-"))
+        loads = load_stats()
+        if loads:
+            st.dataframe(pd.DataFrame(loads), hide_index=True)
+        else:
+            st.caption("아직 파일에서 읽은 데이터셋이 없습니다. (SQLite는 필요한 행만 조회)")
+
+    # 실행별 계측: 최근 실행들의 페이지/구간별 p50/p95/p99 (이 서버 프로세스 기준)
+    def toggle_profiling():
+        set_profiling(st.session_state.profiling_on)
+
+    def arm_profile():
+        st.session_state.profile_armed = True
+
+    with st.expander("📈 실행 계측 (p50 / p95 / p99)"):
+        st.toggle("계측 켜기", value=profiling_enabled(), key="profiling_on", on_change=toggle_profiling)
+        page_rows, span_rows = run_stats()
+        if page_rows:
+            st.caption(f"최근 실행 {sum(r['실행 수'] for r in page_rows)}회")
+            st.dataframe(pd.DataFrame(page_rows), hide_index=True)
+            st.dataframe(pd.DataFrame(span_rows), hide_index=True)
+        else:
+            st.caption("기록된 실행이 없습니다. 계측을 켜고 페이지를 이동해 보세요.")
+
+        col_clear, col_profile = st.columns(2)
+        col_clear.button("기록 비우기", on_click=clear_runs)
+        col_profile.button("다음 실행 cProfile", on_click=arm_profile,
+                           help="버튼을 누른 뒤의 다음 조작(페이지 이동 등) 한 번을 cProfile로 잽니다.")
+        profile = last_profile()
+        if profile:
+            st.caption(f"{profile['at']} · {profile['page']} · {profile['total_ms']} ms")
+            st.code(profile["text"])
+
+    # 백그라운드 알림 스케줄러에 예약된 다음 알림들
+    with st.expander("⏰ 예약된 알림"):
+        if reminders is None:
+            st.caption("알림 스케줄러가 꺼져 있습니다. (PETMATE_REMINDERS=0)")
+        else:
+            st.write(f"예약된 알림: **{reminders.pending_count()}**건")
+            if not reminders.loaded.is_set():
+                st.caption("서버 시작 후 전체 일정을 불러오는 중입니다.")
+            upcoming_reminders = reminders.upcoming(20)
+            if upcoming_reminders:
+                st.dataframe(pd.DataFrame([{
+                    "일시": r["at"].replace("T", " "),
+                    "종류": "복약" if r["kind"] == "med" else "병원",
+                    "사용자": r["owner"],
+                    "내용": r["title"],
+                } for r in upcoming_reminders]), hide_index=True)
+
     st.divider()
 
-    # 2. 사용자 관리 섹션
+    # 2. 사용자 관리 섹션: 아이디 검색 + 페이지 단위 조회 (회원이 많아도 한 페이지만 그림)
     st.subheader("회원 관리")
-    users = load_json(USER_FILE, [])
-
-    if not users:
-        st.info("등록된 회원이 없습니다.")
+    USER_PAGE_SIZE = 20
+
+    def reset_user_page():
+        st.session_state.user_page_no = 1
+
+    user_query = st.text_input("아이디 검색", key="user_query", on_change=reset_user_page).strip()
+    match_total, _ = store.user_page(user_query, 0, 0)
+    page_count = max(1, -(-match_total // USER_PAGE_SIZE))
+    if st.session_state.get("user_page_no", 1) > page_count:
+        st.session_state.user_page_no = page_count
+    page_no = st.number_input(f"페이지 (전체 {page_count})", min_value=1, max_value=page_count,
+                              step=1, key="user_page_no")
+    match_total, page_users = store.user_page(user_query, (page_no - 1) * USER_PAGE_SIZE, USER_PAGE_SIZE)
+
+    if not match_total:
+        st.info("검색된 회원이 없습니다." if user_query else "등록된 회원이 없습니다.")
     else:
-        st.write(f"총 회원 수: **{len(users)}**")
-        
-        # 관리자 계정 제외한 사용자 목록 표시
-        user_list_to_display = [u for u in users if u["username"] != st.session_state.user]
-        
-        if user_list_to_display:
-            st.warning("⚠️ 사용자 삭제 시 복구가 불가능하며, 해당 사용자의 반려동물 데이터는 남습니다. (수동 삭제 필요)")
-            
-            for u in user_list_to_display:
-                col_user, col_del = st.columns([6, 1])
-                
-                with col_user:
-                    st.write(f"**ID:** **{u['username']}** (일반 사용자)")
-                
-                with col_del:
-                    if st.button("삭제", key=f"delete_user_{u['username']}"):
-                        # 1) 사용자 데이터 삭제
-                        users = [x for x in users if x["username"] != u["username"]]
-                        save_json(USER_FILE, users)
-                        
-                        st.success(f"사용자 '{u['username']}'가 삭제되었습니다. 해당 사용자의 반려동물 데이터는 'pets.json' 파일에 남아있습니다.")
-                        st.rerun()
-        else:
-             st.info("관리자를 제외한 사용자가 없습니다.")
+        st.write(f"검색된 회원 수: **{match_total}**" if user_query else f"총 회원 수: **{match_total}**")
+        st.warning("⚠️ 사용자 삭제 시 복구가 불가능하며, 해당 사용자의 반려동물 데이터는 남습니다. (수동 삭제 필요)")
+
+        def delete_user(username):
+            store.delete_user(username)
+            st.toast(f"사용자 '{username}'가 삭제되었습니다. 해당 사용자의 반려동물 데이터는 'data/users/{username}/' 폴더에 남아있습니다.")
+
+        for u in page_users:
+            col_user, col_pets, col_seen, col_del = st.columns([4, 1, 2, 1])
+            col_user.write(f"**ID:** **{u['username']}**" + (" (관리자)" if is_admin(u["username"]) else ""))
+            col_pets.write(f"🐾 {fleet_agg['pets'].get(u['username'], 0)}")
+            col_seen.write(f"최근 접속: {fleet_agg['last_seen'].get(u['username'], '-')}")
+            # 관리자 계정은 삭제 버튼 없음
+            if u["username"] != st.session_state.user:
+                col_del.button("삭제", key=f"delete_user_{u['username']}", on_click=delete_user, args=(u["username"],))
 
 
 # ========================= 7) 데이터 관리 =========================
@@ -874,49 +1077,92 @@ elif page == "데이터 관리":
 
     st.write("⚠ 데이터 초기화 시 복구가 불가능합니다.")
 
+    def reset_logs():
+        store.reset_logs()
+        st.toast("사료/급수 로그 초기화 완료!")
+
+    def reset_profiles():
+        store.reset_profiles()
+        st.toast("프로필 / 복약 / 병원 데이터 초기화 완료!")
+
+    def reset_unsafe_items():
+        # 위험 정보는 모든 회원이 함께 쓰므로 관리자만 초기화할 수 있다
+        if not is_admin(st.session_state.user):
+            return
+        default_unsafe_reset = [{"category": "음식", "name": "초콜릿", "risk": "고위험", "why": "카카오 테오브로민 독성"}]
+        store.reset_unsafe_items(default_unsafe_reset)
+        st.toast("위험 정보 초기화 완료!")
+
     colA, colB = st.columns(2)
 
     with colA:
-        if st.button("사료/급수 로그 초기화"):
-            st.session_state.feed_df = pd.DataFrame(columns=feed_cols)
-            st.session_state.water_df = pd.DataFrame(columns=water_cols)
-            save_csv(FEED_FILE, st.session_state.feed_df)
-            save_csv(WATER_FILE, st.session_state.water_df)
-            st.success("사료/급수 로그 초기화 완료!")
-            st.rerun()
+        st.button("사료/급수 로그 초기화", on_click=reset_logs)
+
+        # 삭제 표시(톰스톤)만 남은 로그를 본 파일에 반영 (SQLite는 VACUUM)
+        if st.button("사료/급수 로그 압축"):
+            store.compact_logs()
+            st.success("사료/급수 로그 압축 완료!")
 
     with colB:
-        if st.button("프로필 / 복약 / 병원 / 위험정보 초기화"):
-            save_json(PET_FILE, [])
-            save_json(MED_FILE, [])
-            save_json(MED_LOG_FILE, {})
-            save_json(HOSP_FILE, [])
-            
-            default_unsafe_reset = [{"category": "음식", "name": "초콜릿", "risk": "고위험", "why": "카카오 테오브로민 독성"}] 
-            save_json(UNSAFE_FILE, default_unsafe_reset)
-            
-            st.session_state.pets = []
-            st.session_state.med_schedule = []
-            st.session_state.med_log = {}
-            st.session_state.hospital_events = []
-            st.session_state.unsafe_db = default_unsafe_reset
-            
-            st.success("모든 데이터 초기화 완료!")
-            st.rerun()
+        st.button("프로필 / 복약 / 병원 초기화", on_click=reset_profiles)
+        if is_admin(st.session_state.user):
+            st.button("위험 정보 초기화 (전체 회원 공용)", on_click=reset_unsafe_items)
+
+    st.divider()
+    st.subheader("📦 대량 가져오기 / 내보내기")
+    st.caption("CSV · JSONL · Parquet 파일을 청크 단위로 처리합니다. 이미 있는 기록(log_id / 이름)은 건너뜁니다.")
+
+    bulk_dataset = st.selectbox("데이터", list(DATASET_LABELS), format_func=DATASET_LABELS.get, key="bulk_dataset")
+    col_in, col_out = st.columns(2)
+
+    with col_in:
+        uploaded = st.file_uploader("가져올 파일", type=["csv", "jsonl", "ndjson", "json", "parquet"], key="bulk_file")
+        if uploaded is not None and st.button("가져오기"):
+            progress = st.empty()
+
+            def show_progress(counts):
+                progress.write(f"추가 {counts['added']} / 중복 {counts['duplicates']} / 오류 {counts['rejected']}")
+
+            try:
+                fmt = detect_format(uploaded.name)
+                counts = import_rows(store, bulk_dataset, read_chunks(uploaded, fmt), show_progress)
+            except ValueError as e:
+                st.error(f"가져오기 실패: {e}")
+            else:
+                st.success(
+                    f"{counts['added']}건 추가 (중복 {counts['duplicates']}건, 형식 오류 {counts['rejected']}건 제외)"
+                )
+
+    with col_out:
+        bulk_fmt = st.selectbox("내보낼 형식", FORMATS, key="bulk_fmt")
+        if st.button("내보내기 파일 만들기"):
+            buf = io.BytesIO() if bulk_fmt == "parquet" else io.StringIO()
+            n = export_rows(store, bulk_dataset, buf, bulk_fmt)
+            data = buf.getvalue()
+            st.download_button(
+                f"⬇️ {DATASET_LABELS[bulk_dataset]} {n}행 다운로드",
+                data=data if isinstance(data, bytes) else data.encode("utf-8"),
+                file_name=f"{bulk_dataset}.{bulk_fmt}",
+            )
+
+    st.divider()
+    st.subheader("🧮 로그 메모리 사용량")
+    st.caption("pet_id는 category, 날짜는 datetime, 양은 int32, log_id/메모는 Arrow 문자열로 메모리에 올립니다.")
+    if st.button("메모리 사용량 계산"):
+        report = memory_report({DATASET_LABELS[kind]: store.iter_logs(kind, CHUNK_ROWS) for kind in ["feed", "water"]})
+        st.dataframe(report, hide_index=True)
 
     st.divider()
     st.subheader("📁 저장 파일 위치")
-    st.code(
-        f"{PET_FILE}\n"
-        f"{FEED_FILE}\n"
-        f"{WATER_FILE}\n"
-        f"{MED_FILE}\n"
-        f"{MED_LOG_FILE}\n"
-        f"{HOSP_FILE}\n"
-        f"{UNSAFE_FILE}"
-    )
+    st.code("\n".join(store.locations()))
 
 
 # ========================= 푸터 =========================
 st.divider()
-st.caption("© 2025 PetMate — 포트폴리오용 샘플 앱")
\ No newline at end of file
+st.caption("© 2025 PetMate — 포트폴리오용 샘플 앱")
+mark_startup("first_page_ms", (perf_counter() - RUN_STARTED) * 1000)
+end_run()
+
+# 관리자 화면에서 cProfile을 예약했으면 다음 실행(다음 조작)을 프로파일링
+if st.session_state.pop("profile_armed", False):
+    st.session_state.profile_next_run = True
\ No newline at end of file
@@ -0,0 +1,120 @@
+import os
+import sys
+import hmac
+import time
+import hashlib
+import secrets
+import threading
+
+import streamlit as st
+
+# ===================== 설정 =====================
+# scrypt 비용 N = 2 ** SCRYPT_LOG_N. 서버에 맞는 값은 `python auth.py`로 측정한다
+SCRYPT_LOG_N = int(os.environ.get("PETMATE_SCRYPT_LOG_N", "14"))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_PREFIX = "scrypt"
+
+# 동시에 해시를 계산할 수 있는 세션 수 (로그인이 몰려도 CPU를 이 이상 쓰지 않음)
+KDF_WORKERS = int(os.environ.get("PETMATE_KDF_WORKERS", "2"))
+# 계산 차례를 기다리는 최대 시간 (초). 넘으면 KdfBusy로 "잠시 후 다시 시도"를 안내한다
+KDF_WAIT_SEC = float(os.environ.get("PETMATE_KDF_WAIT_SEC", "3"))
+
+# 측정 시 목표로 하는 해시 1회 시간 (ms)
+BENCHMARK_TARGET_MS = 250
+
+
+# ===================== 해시 계산 =====================
+def _scrypt(pw: str, salt: bytes, log_n: int, r: int, p: int):
+    n = 2 ** log_n
+    # scrypt는 128 * r * n 바이트를 쓰므로 기본 maxmem(32MB)보다 여유 있게 잡는다
+    return hashlib.scrypt(pw.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * r * n, dklen=32)
+
+
+def _hash_now(pw: str, log_n: int = SCRYPT_LOG_N):
+    salt = secrets.token_bytes(16)
+    key = _scrypt(pw, salt, log_n, SCRYPT_R, SCRYPT_P)
+    return f"{SCRYPT_PREFIX}${log_n}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${key.hex()}"
+
+
+def _verify_now(pw: str, stored: str):
+    if stored.startswith(SCRYPT_PREFIX + "$"):
+        _, log_n, r, p, salt, key = stored.split("$")
+        derived = _scrypt(pw, bytes.fromhex(salt), int(log_n), int(r), int(p))
+        return hmac.compare_digest(derived.hex(), key)
+    # 예전 방식: 솔트 없는 SHA-256 hex
+    return hmac.compare_digest(hashlib.sha256(pw.encode()).hexdigest(), stored)
+
+
+class KdfBusy(RuntimeError):
+    """해시 계산 차례를 KDF_WAIT_SEC 안에 얻지 못함"""
+
+
+@st.cache_resource
+def kdf_slots():
+    """동시 해시 계산 수를 제한하는 세마포어 (프로세스당 하나)"""
+    return threading.BoundedSemaphore(KDF_WORKERS)
+
+
+def _bounded(fn, *args):
+    """차례를 얻으면 이 스레드에서 바로 계산한다.
+
+    scrypt는 GIL을 놓고 계산하므로 다른 세션은 멈추지 않지만, 요청한 세션의 실행은
+    해시가 끝날 때까지 기다린다. 차례가 오래 오지 않으면 기다리지 않고 KdfBusy.
+    """
+    slots = kdf_slots()
+    if not slots.acquire(timeout=KDF_WAIT_SEC):
+        raise KdfBusy("로그인 요청이 많습니다. 잠시 후 다시 시도하세요.")
+    try:
+        return fn(*args)
+    finally:
+        slots.release()
+
+
+@st.cache_resource
+def _dummy_hash():
+    # 없는 아이디로 로그인해도 같은 시간이 걸리도록 비교용으로 쓰는 해시
+    return _hash_now(secrets.token_hex(8))
+
+
+# ===================== 공개 함수 =====================
+def hash_password(pw: str):
+    """현재 설정 비용의 scrypt 해시. 계산 차례를 얻지 못하면 KdfBusy"""
+    return _bounded(_hash_now, pw)
+
+
+def verify_password(pw: str, stored):
+    """stored가 None이면 (없는 아이디) 같은 비용만 치르고 False. 계산 차례를 얻지 못하면 KdfBusy"""
+    if stored is None:
+        _bounded(_verify_now, pw, _dummy_hash())
+        return False
+    return _bounded(_verify_now, pw, stored)
+
+
+def needs_rehash(stored: str):
+    """예전 SHA-256 해시이거나 비용 설정이 바뀐 해시인지 (로그인 성공 시 다시 저장)"""
+    return not stored.startswith(f"{SCRYPT_PREFIX}${SCRYPT_LOG_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def benchmark(target_ms: float = BENCHMARK_TARGET_MS, max_log_n: int = 20):
+    """log_n별 해시 1회 시간(ms)을 재고, 목표 시간 안에 드는 가장 큰 log_n을 돌려준다"""
+    timings = []
+    best = 10
+    for log_n in range(10, max_log_n + 1):
+        started = time.perf_counter()
+        _hash_now("benchmark", log_n)
+        ms = (time.perf_counter() - started) * 1000
+        timings.append((log_n, ms))
+        if ms > target_ms:
+            break
+        best = log_n
+    return best, timings
+
+
+if __name__ == "__main__":
+    # 사용법: python auth.py [목표 ms]
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else BENCHMARK_TARGET_MS
+    best, timings = benchmark(target)
+    for log_n, ms in timings:
+        print(f"log_n={log_n:2d}  {ms:8.1f} ms")
+    print(f"→ PETMATE_SCRYPT_LOG_N={best} (목표 {target:.0f} ms, 현재 {SCRYPT_LOG_N})")
@@ -0,0 +1,377 @@
+import os
+import sys
+import json
+import uuid
+import shutil
+import argparse
+import platform
+import statistics
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# 사용법: python benchmark.py --users 100 --pets 200 --logs 200000 --backend file
+#         python benchmark.py --pets 10000 --logs 10000000 --workdir /tmp/petmate-10m   (생성한 데이터는 재사용)
+#         python benchmark.py --save-baseline   (현재 결과를 기준값으로 저장)
+#         python benchmark.py                   (기준값보다 느려진 작업이 있으면 종료 코드 1)
+#
+# 앱은 data/ 상대 경로를 쓰므로 작업 폴더로 이동한 뒤 storage 등을 import 한다.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(REPO_DIR, "app.py")
+BASELINE_FILE = os.path.join(REPO_DIR, "benchmark_baseline.json")
+
+# 벤치마크를 실행하는 사용자 (관리자 대시보드까지 잴 수 있도록 admin)
+BENCH_USER = "admin"
+
+# 기준값 대비 이 배수보다 느리고, 차이가 MIN_DIFF_MS보다 크면 회귀로 본다 (짧은 작업의 잡음 제외)
+REGRESSION_RATIO = 1.25
+MIN_DIFF_MS = 5.0
+
+# 로그를 만들고 쓰는 사용자 묶음 크기 (메모리 사용량은 전체 행 수가 아니라 이 묶음에 비례)
+USER_BATCH = 200
+
+
+# ===================== 합성 데이터 =====================
+def _uuids(n):
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+def _shard(data_dir, owner):
+    # storage.shard_dir과 같은 규칙 (storage를 import 하기 전에 쓰므로 따로 둔다)
+    path = os.path.join(data_dir, "users", quote(owner, safe="").replace(".", "%2E"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _log_frame(rng, pet_ids, per_pet, days, amount_col, low, high):
+    n = len(pet_ids) * per_pet
+    today = np.datetime64(date.today())
+    dates = today - rng.integers(0, days, n).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "log_id": _uuids(n),
+        "pet_id": np.repeat(pet_ids, per_pet),
+        "date": np.datetime_as_string(dates, unit="D"),
+        amount_col: rng.integers(low, high, n),
+        "memo": "",
+    })
+
+
+def _med_schedules(rng, pet_ids, today):
+    meds = []
+    for pet_id in pet_ids:
+        for _ in range(rng.integers(1, 3)):
+            times = sorted(rng.choice(["08:00", "13:00", "20:00"], size=rng.integers(1, 3), replace=False))
+            meds.append({
+                "id": str(uuid.uuid4()),
+                "pet_id": pet_id,
+                "drug": f"약{rng.integers(1, 50)}",
+                "dose": "1",
+                "unit": "정",
+                "times": list(times),
+                "start": (today - timedelta(days=60)).isoformat(),
+                "end": "" if rng.random() < 0.5 else (today + timedelta(days=int(rng.integers(1, 90)))).isoformat(),
+                "notes": "",
+            })
+    return meds
+
+
+def _med_log(rng, meds, today, days):
+    rows = []
+    for med in meds:
+        for d in range(1, days + 1):
+            day = (today - timedelta(days=d)).isoformat()
+            for t in med["times"]:
+                if rng.random() < 0.8:
+                    rows.append([str(uuid.uuid4()), med["pet_id"], day, med["id"], t, f"{day} {t}:00"])
+    return pd.DataFrame(rows, columns=["log_id", "pet_id", "date", "med_id", "time", "taken_at"])
+
+
+def _hospital_events(rng, pet_ids, today):
+    events = []
+    for pet_id in pet_ids:
+        for _ in range(rng.integers(0, 4)):
+            dt = datetime.combine(today, datetime.min.time()) + timedelta(
+                days=int(rng.integers(-180, 180)), hours=int(rng.integers(9, 19))
+            )
+            events.append({
+                "id": str(uuid.uuid4()),
+                "pet_id": pet_id,
+                "title": rng.choice(["정기 검진", "예방 접종", "치과", "미용"]),
+                "dt": dt.isoformat(),
+                "place": "동물병원",
+                "notes": "",
+                "repeat": rng.choice(["", "", "monthly", "yearly"]),
+            })
+    return events
+
+
+def generate(data_dir, users, pets, logs, unsafe, days, med_days, seed):
+    """data_dir에 사용자별 샤드 형식의 합성 데이터를 만든다.
+
+    반려동물은 사용자에게 돌아가며 배정하고, 사료/급수 로그는 반려동물마다 같은 수(logs / pets)씩.
+    """
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    os.makedirs(data_dir)
+
+    owners = [BENCH_USER] + [f"user{i:05d}" for i in range(1, users)]
+    _write_json(os.path.join(data_dir, "users.json"), [{"username": u, "password": "bench"} for u in owners])
+
+    unsafe_items = [
+        {"category": rng.choice(["음식", "식물", "물품"]), "name": f"위험 항목 {i}",
+         "risk": rng.choice(["고위험", "주의"]), "why": f"합성 설명 {i}"}
+        for i in range(unsafe)
+    ]
+    _write_json(os.path.join(data_dir, "unsafe_db.json"), unsafe_items)
+
+    per_pet = max(1, logs // max(1, pets))
+    pet_ids = _uuids(pets)
+    for lo in range(0, len(owners), USER_BATCH):
+        for i, owner in enumerate(owners[lo:lo + USER_BATCH], start=lo):
+            mine = pet_ids[i::len(owners)]
+            shard = _shard(data_dir, owner)
+            _write_json(os.path.join(shard, "pets.json"), [
+                {"id": p, "name": f"펫{k}", "species": rng.choice(["개", "고양이"]), "breed": "",
+                 "birth": "2020-01-01", "weight_kg": round(float(rng.uniform(2, 30)), 1), "notes": "", "owner": owner}
+                for k, p in enumerate(mine)
+            ])
+            meds = _med_schedules(rng, mine, today)
+            _write_json(os.path.join(shard, "med_schedule.json"), meds)
+            _med_log(rng, meds, today, med_days).to_csv(os.path.join(shard, "med_log.csv"), index=False)
+            _write_json(os.path.join(shard, "hospital_events.json"), _hospital_events(rng, mine, today))
+            _log_frame(rng, mine, per_pet, days, "amount_g", 20, 300).to_csv(
+                os.path.join(shard, "feed_log.csv"), index=False)
+            _log_frame(rng, mine, per_pet, days, "amount_ml", 50, 800).to_csv(
+                os.path.join(shard, "water_log.csv"), index=False)
+        print(f"\r데이터 생성 {min(lo + USER_BATCH, len(owners))}/{len(owners)} 사용자", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+
+# ===================== 측정 =====================
+def _stats(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered), 2),
+        "min_ms": round(ordered[0], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "samples_ms": [round(x, 2) for x in samples],
+    }
+
+
+def _timed(step, repeat):
+    """step(i)를 repeat번 실행한 시간 (ms)"""
+    samples = []
+    for i in range(repeat):
+        start = perf_counter()
+        step(i)
+        samples.append((perf_counter() - start) * 1000)
+    return samples
+
+
+def _check(at, name):
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+
+def run_benchmarks(repeat, timeout):
+    """AppTest로 앱을 화면 없이 실행하며 주요 작업을 잰다. {작업: 통계}"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    from storage import get_store
+
+    def app(page=None):
+        at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        at.session_state.user = BENCH_USER
+        at.run()
+        if page:
+            at.sidebar.radio[0].set_value(page).run()
+        _check(at, page or "시작")
+        return at
+
+    results = {}
+
+    # 1) 콜드 스타트: 프로세스 공용 캐시를 비우고 첫 화면(대시보드)까지
+    def startup(_):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        app()
+
+    results["startup_load"] = _timed(startup, repeat)
+
+    # 2) 대시보드의 오늘 합계 (캐시가 채워진 뒤의 재실행)
+    at = app("대시보드")
+    results["dashboard_today"] = _timed(lambda _: _check(at.run(), "대시보드"), repeat)
+
+    # 3) 기간 조회 + 차트 (매번 다른 기간으로)
+    at = app("사료/급수 기록")
+    today = date.today()
+    results["range_query_chart"] = _timed(
+        lambda i: _check(at.date_input(key="feed_start_date").set_value(today - timedelta(days=30 + i)).run(), "기간 조회"),
+        repeat,
+    )
+
+    # 4) 로그 추가 (입력 폼 제출 → 재실행)
+    def insert(i):
+        at.number_input[0].set_value(10 + i)
+        at.number_input[1].set_value(20 + i)
+        _check(at.button(key="FormSubmitter:feed_water_form-저장하기").click().run(), "로그 추가")
+
+    results["log_insert"] = _timed(insert, repeat)
+
+    # 5) 로그 삭제 (표에서 행을 고르는 조작은 AppTest로 흉내 낼 수 없어 저장소 메서드로)
+    store = get_store(BENCH_USER)
+    pet = store.pets()[0]
+    ids = list(store.log_range("feed", pet["id"], "0000-01-01", "9999-12-31")["log_id"].tail(repeat))
+    results["log_delete"] = _timed(lambda i: store.delete_logs("feed", [ids[i]]), min(repeat, len(ids)))
+
+    # 6) 복약 체크 토글
+    at = app("복약 알림")
+    if at.checkbox:
+        results["med_toggle"] = _timed(lambda i: _check(at.checkbox[0].set_value(i % 2 == 0).run(), "복약 체크"), repeat)
+
+    # 7) 위험 정보 검색
+    at = app("위험 정보 검색")
+    queries = ["초콜릿", "항목 1", "위험", "합성 설명 9", "포도", "식물"]
+    results["unsafe_search"] = _timed(
+        lambda i: _check(at.text_input[0].set_value(queries[i % len(queries)]).run(), "검색"), repeat
+    )
+
+    # 8) 관리자 대시보드 (전체 사용자 합산)
+    at = app("관리자 대시보드")
+    results["admin_dashboard"] = _timed(lambda _: _check(at.run(), "관리자 대시보드"), repeat)
+
+    return {name: _stats(samples) for name, samples in results.items()}
+
+
+def prepare(backend):
+    """저장소별 준비(측정 제외): SQLite는 파일 데이터를 DB로, Parquet은 샤드 CSV를 Parquet으로 옮긴다"""
+    from storage import shard_owners, get_store
+    if backend == "sqlite":
+        get_store(None)
+    elif backend == "parquet":
+        for owner in shard_owners():
+            get_store(owner)
+
+
+# ===================== 기준값 비교 =====================
+def compare(results, baseline, ratio=REGRESSION_RATIO, min_diff_ms=MIN_DIFF_MS):
+    """작업별 (기준 중앙값, 현재 중앙값, 배수, 회귀 여부). 기준값에 없는 작업은 건너뛴다"""
+    rows = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        before, now = base["median_ms"], r["median_ms"]
+        factor = now / before if before else float("inf")
+        rows.append({
+            "작업": name,
+            "기준(ms)": before,
+            "현재(ms)": now,
+            "배수": round(factor, 2),
+            "회귀": factor > ratio and now - before > min_diff_ms,
+        })
+    return rows
+
+
+def _scale(meta):
+    return {k: meta.get(k) for k in ["backend", "users", "pets", "logs", "unsafe", "days", "med_days", "seed"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetMate 벤치마크 (합성 데이터 + AppTest)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pets", type=int, default=100)
+    parser.add_argument("--logs", type=int, default=100_000, help="사료/급수 로그 각각의 행 수")
+    parser.add_argument("--unsafe", type=int, default=1_000, help="위험 정보 항목 수")
+    parser.add_argument("--days", type=int, default=365, help="로그 날짜 범위 (오늘부터 과거로)")
+    parser.add_argument("--med-days", type=int, default=30, help="복약 기록을 만드는 과거 일수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["file", "sqlite", "parquet"], default="file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=600, help="AppTest 실행 한 번의 제한 시간(초)")
+    parser.add_argument("--workdir", default=os.path.join(REPO_DIR, ".bench"),
+                        help="합성 데이터 폴더. 같은 설정으로 만든 데이터가 있으면 재사용")
+    parser.add_argument("--regenerate", action="store_true", help="데이터가 있어도 새로 만든다")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: <workdir>/results.json)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    args = parser.parse_args()
+
+    meta = {
+        "backend": args.backend, "users": args.users, "pets": args.pets, "logs": args.logs,
+        "unsafe": args.unsafe, "days": args.days, "med_days": args.med_days, "seed": args.seed,
+        "repeat": args.repeat,
+    }
+    # 데이터는 저장소 종류마다 따로 둔다 (SQLite/Parquet은 처음 열 때 파일 데이터를 옮기므로)
+    workdir = os.path.abspath(os.path.join(args.workdir, args.backend))
+    data_dir = os.path.join(workdir, "data")
+    meta_file = os.path.join(workdir, "bench_data.json")
+    os.makedirs(workdir, exist_ok=True)
+
+    existing = _read_json(meta_file) if os.path.exists(meta_file) else None
+    if args.regenerate or existing is None or _scale(existing) != _scale(meta):
+        generate(data_dir, args.users, args.pets, args.logs, args.unsafe, args.days, args.med_days, args.seed)
+        _write_json(meta_file, meta)
+
+    # storage는 import 시점에 저장 방식과 data/ 위치를 정한다
+    os.environ["PETMATE_STORAGE"] = args.backend
+    os.environ["PETMATE_REMINDERS"] = "0"
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+
+    start = perf_counter()
+    prepare(args.backend)
+    print(f"준비 {perf_counter() - start:.1f}s", file=sys.stderr)
+
+    results = run_benchmarks(args.repeat, args.timeout)
+    report = {
+        "meta": dict(meta, python=platform.python_version(), platform=platform.platform(),
+                     created=datetime.now().isoformat(timespec="seconds")),
+        "results": results,
+    }
+
+    out = args.out or os.path.join(workdir, "results.json")
+    _write_json(out, report)
+    print(pd.DataFrame([{"작업": k, **{c: v for c, v in r.items() if c != "samples_ms"}}
+                        for k, r in results.items()]).to_string(index=False))
+    print(f"→ {out}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"기준값 저장 → {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("기준값이 없습니다. 같은 옵션으로 --save-baseline 을 한 번 실행해 저장하세요 (README 참고).", file=sys.stderr)
+        return 0
+    baseline = _read_json(args.baseline)
+    if _scale(baseline["meta"]) != _scale(meta):
+        print(f"기준값의 데이터 규모/저장 방식이 다릅니다: {_scale(baseline['meta'])}", file=sys.stderr)
+        return 0
+
+    rows = compare(results, baseline)
+    print(pd.DataFrame(rows).to_string(index=False))
+    regressed = [r["작업"] for r in rows if r["회귀"]]
+    if regressed:
+        print(f"회귀: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
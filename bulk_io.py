@@ -0,0 +1,217 @@
+import os
+import sys
+import uuid
+import argparse
+
+import pandas as pd
+
+from storage import LOG_COLS, AMOUNT_COLS, get_store
+from log_schema import plain_logs
+
+# 한 번에 읽고 저장하는 행 수 (메모리 사용량은 파일 크기가 아니라 이 값에 비례)
+CHUNK_ROWS = 50_000
+
+UNSAFE_COLS = ["category", "name", "risk", "why"]
+
+# 데이터셋별 컬럼, 중복 판단 키, 필수 컬럼
+DATASETS = {
+    "feed": {"cols": LOG_COLS["feed"], "key": "log_id", "required": ["pet_id", "date", "amount_g"]},
+    "water": {"cols": LOG_COLS["water"], "key": "log_id", "required": ["pet_id", "date", "amount_ml"]},
+    "unsafe": {"cols": UNSAFE_COLS, "key": "name", "required": ["category", "name", "risk", "why"]},
+}
+DATASET_LABELS = {"feed": "사료 로그", "water": "급수 로그", "unsafe": "위험 정보"}
+FORMATS = ["csv", "jsonl", "parquet"]
+
+
+# ===================== 청크 읽기 / 쓰기 =====================
+def detect_format(filename):
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    fmt = {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(ext, ext)
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {filename} (csv, jsonl, parquet)")
+    return fmt
+
+
+def read_chunks(source, fmt, chunk_rows=CHUNK_ROWS):
+    """파일 경로 또는 파일 객체를 chunk_rows 행씩 DataFrame으로 읽는다"""
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+    elif fmt == "jsonl":
+        yield from pd.read_json(source, lines=True, chunksize=chunk_rows, dtype=False)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+
+class ChunkWriter:
+    """DataFrame 청크를 차례로 받아 하나의 CSV / JSONL / Parquet 파일로 쓴다"""
+
+    def __init__(self, target, fmt):
+        self.target = target
+        self.fmt = fmt
+        self._parquet = None
+        self._first = True
+
+    def write(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self.target, header=self._first, index=False)
+        elif self.fmt == "jsonl":
+            # 마지막 줄에도 줄바꿈이 있어야 다음 청크와 붙지 않는다
+            self.target.write(df.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.target, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+# ===================== 검증 =====================
+def validate_chunk(dataset, df, valid_pet_ids=None):
+    """스키마에 맞게 정리한 행과 버린 행 수. 필수 컬럼이 아예 없으면 ValueError"""
+    spec = DATASETS[dataset]
+    missing = [c for c in spec["required"] if c not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing)}")
+
+    df = df.reindex(columns=spec["cols"])
+    total = len(df)
+    for c in spec["cols"]:
+        df[c] = df[c].where(df[c].notna(), "").astype(str).str.strip()
+    ok = (df[spec["required"]] != "").all(axis=1)
+
+    if dataset in LOG_COLS:
+        amount = AMOUNT_COLS[dataset]
+        df[amount] = pd.to_numeric(df[amount], errors="coerce")
+        # 형식을 첫 행에서 추측하면 나머지 행이 전부 NaT가 될 수 있으므로 행마다 ISO 8601로 해석
+        dates = pd.to_datetime(df["date"], format="ISO8601", errors="coerce")
+        df["date"] = dates.dt.strftime("%Y-%m-%d")
+        ok &= df[amount].notna() & (df[amount] >= 0) & dates.notna()
+        if valid_pet_ids is not None:
+            # 다른 사용자의 반려동물이나 없는 반려동물 기록은 받지 않는다
+            ok &= df["pet_id"].isin(valid_pet_ids)
+        # log_id가 없는 행은 새로 발급
+        no_id = df["log_id"] == ""
+        df.loc[no_id, "log_id"] = [str(uuid.uuid4()) for _ in range(int(no_id.sum()))]
+
+    df = df[ok]
+    if dataset in LOG_COLS:
+        df = df.astype({AMOUNT_COLS[dataset]: "int64"})
+    return df, total - len(df)
+
+
+# ===================== 가져오기 / 내보내기 =====================
+def import_rows(store, dataset, chunks, on_progress=None):
+    """청크 단위로 검증 → 중복 제거 → 저장. {"added", "duplicates", "rejected"} 건수를 돌려준다"""
+    spec = DATASETS[dataset]
+    key = spec["key"]
+    valid_pet_ids = {p["id"] for p in store.pets()} if dataset in LOG_COLS else None
+    # 로그는 앞 청크까지 이미 저장돼 있으므로 청크마다 저장소에 물어보고,
+    # 위험 정보는 이름 목록이 크지 않아 한 번 읽어 둔다
+    seen = {item["name"] for item in store.unsafe_items()} if dataset == "unsafe" else None
+
+    counts = {"added": 0, "duplicates": 0, "rejected": 0}
+    for chunk in chunks:
+        rows, rejected = validate_chunk(dataset, chunk, valid_pet_ids)
+        counts["rejected"] += rejected
+
+        before = len(rows)
+        rows = rows.drop_duplicates(key)
+        if seen is None:
+            rows = rows[~rows[key].isin(store.existing_log_ids(dataset, rows[key].tolist()))]
+        else:
+            rows = rows[~rows[key].isin(seen)]
+            seen.update(rows[key])
+        counts["duplicates"] += before - len(rows)
+
+        # 청크 하나가 한 번의 쓰기 (파일은 append 한 번, SQLite는 트랜잭션 하나)
+        if not rows.empty:
+            if dataset == "unsafe":
+                store.add_unsafe_items(rows.to_dict("records"))
+            else:
+                store.add_log(dataset, rows)
+        counts["added"] += len(rows)
+        if on_progress:
+            on_progress(counts)
+    return counts
+
+
+def export_chunks(store, dataset, chunk_rows=CHUNK_ROWS):
+    """내보낼 행을 청크 단위로. 청크마다 컬럼 타입이 같아야 Parquet 스키마가 유지된다"""
+    if dataset == "unsafe":
+        items = store.unsafe_items()
+        chunks = (pd.DataFrame(items[i:i + chunk_rows], columns=UNSAFE_COLS) for i in range(0, len(items), chunk_rows))
+    else:
+        chunks = store.iter_logs(dataset, chunk_rows)
+
+    cols = DATASETS[dataset]["cols"]
+    for chunk in chunks:
+        chunk = plain_logs(chunk.reindex(columns=cols))
+        text_cols = [c for c in cols if c != AMOUNT_COLS.get(dataset)]
+        chunk[text_cols] = chunk[text_cols].where(chunk[text_cols].notna(), "").astype(str)
+        if dataset in LOG_COLS:
+            chunk = chunk.astype({AMOUNT_COLS[dataset]: "int64"})
+        yield chunk
+
+
+def export_rows(store, dataset, target, fmt, chunk_rows=CHUNK_ROWS):
+    """데이터셋을 청크 단위로 target(경로 또는 파일 객체)에 쓴다. 쓴 행 수를 돌려준다"""
+    binary = fmt == "parquet"
+    own = isinstance(target, str)
+    if not own:
+        f = target
+    elif binary:
+        f = open(target, "wb")
+    else:
+        f = open(target, "w", encoding="utf-8", newline="")
+    writer = ChunkWriter(f, fmt)
+    n = 0
+    try:
+        for chunk in export_chunks(store, dataset, chunk_rows):
+            writer.write(chunk)
+            n += len(chunk)
+        if n == 0:
+            writer.write(pd.DataFrame(columns=DATASETS[dataset]["cols"]))
+    finally:
+        writer.close()
+        if own:
+            f.close()
+    return n
+
+
+if __name__ == "__main__":
+    # 사용법: python bulk_io.py import feed logs.parquet --owner admin
+    #         python bulk_io.py export unsafe unsafe.csv
+    parser = argparse.ArgumentParser(description="PetMate 대량 가져오기/내보내기")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("path")
+    parser.add_argument("--owner", help="사료/급수 로그의 소유 사용자 아이디")
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if args.dataset in LOG_COLS and not args.owner:
+        parser.error("사료/급수 로그는 --owner가 필요합니다.")
+    store = get_store(args.owner)
+    fmt = detect_format(args.path)
+
+    if args.action == "import":
+        def report(counts):
+            print(f"\r추가 {counts['added']} / 중복 {counts['duplicates']} / 오류 {counts['rejected']}",
+                  end="", file=sys.stderr)
+
+        counts = import_rows(store, args.dataset, read_chunks(args.path, fmt, args.chunk), report)
+        print(file=sys.stderr)
+        print(counts)
+    else:
+        n = export_rows(store, args.dataset, args.path, fmt, args.chunk)
+        print(f"{n}행 → {args.path}")
@@ -0,0 +1,120 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from itertools import islice
+
+from dateutil.relativedelta import relativedelta
+
+# 반복 주기별 개월 수 ("" 는 한 번만)
+REPEAT_MONTHS = {"monthly": 1, "yearly": 12}
+REPEAT_LABELS = {"": "반복 없음", "monthly": "매월", "yearly": "매년"}
+
+
+# ===================== 반복 일정 펼치기 =====================
+def recurrences(event, start):
+    """start(ISO 일시) 이후의 반복 일시를 필요한 만큼만 차례로 만든다 (끝없는 제너레이터).
+
+    매월 31일, 2월 29일처럼 없는 날짜는 그 달의 마지막 날로 맞춘다.
+    """
+    step = REPEAT_MONTHS[event["repeat"]]
+    base = datetime.fromisoformat(event["dt"])
+    begin = datetime.fromisoformat(start)
+
+    # 처음부터 세지 않고 start 근처의 회차로 바로 건너뛴다
+    months = (begin.year - base.year) * 12 + begin.month - base.month
+    k = max(0, months // step - 1)
+    while True:
+        dt = (base + relativedelta(months=step * k)).isoformat()
+        if dt >= start:
+            yield dt
+        k += 1
+
+
+def _occurrence(event, dt):
+    return dict(event, dt=dt) if dt != event["dt"] else event
+
+
+def _recurring_between(events, start, end):
+    out = []
+    for e in events:
+        for dt in recurrences(e, start):
+            if dt >= end:
+                break
+            out.append(_occurrence(e, dt))
+    return out
+
+
+def _recurring_stream(event, start):
+    return ((dt, event["id"], _occurrence(event, dt)) for dt in recurrences(event, start))
+
+
+def upcoming_from(once, repeating, after, n):
+    """정렬된 한 번뿐인 일정 목록과 반복 일정들에서 after 이후 n개 (저장소 공용)"""
+    streams = [((e["dt"], e["id"], e) for e in once)] + [_recurring_stream(e, after) for e in repeating]
+    return [e for _, _, e in islice(heapq.merge(*streams), n)]
+
+
+def between_from(once, repeating, start, end):
+    """[start, end) 구간의 한 번뿐인 일정 + 반복 일정 회차 (저장소 공용)"""
+    return sorted(list(once) + _recurring_between(repeating, start, end), key=lambda e: e["dt"])
+
+
+# ===================== 반려동물별 시간순 인덱스 =====================
+class HospitalEventIndex:
+    """반려동물별로 일정을 일시 순으로 정렬해 둔 인덱스.
+
+    한 번뿐인 일정은 정렬 배열에서 이분 탐색하고, 반복 일정은 조회 구간 안의 회차만 그때그때 만든다.
+    """
+
+    def __init__(self, events=()):
+        self._lock = threading.Lock()
+        self._sorted = {}     # pet_id -> [(dt, id)] (일시 순, 한 번뿐인 일정)
+        self._repeating = {}  # pet_id -> {id: 반복 일정}
+        self._events = {}     # id -> 일정
+        for event in events:
+            self.add(event)
+
+    def add(self, event):
+        with self._lock:
+            self._events[event["id"]] = event
+            if event.get("repeat"):
+                self._repeating.setdefault(event["pet_id"], {})[event["id"]] = event
+            else:
+                insort(self._sorted.setdefault(event["pet_id"], []), (event["dt"], event["id"]))
+
+    def remove(self, event_id):
+        with self._lock:
+            event = self._events.pop(event_id, None)
+            if event is None:
+                return
+            if event.get("repeat"):
+                del self._repeating[event["pet_id"]][event_id]
+            else:
+                entries = self._sorted[event["pet_id"]]
+                del entries[bisect_left(entries, (event["dt"], event_id))]
+
+    def events(self, pet_id):
+        """등록된 일정 원본 (반복 일정은 첫 일시 기준, 일시 순)"""
+        with self._lock:
+            base = [self._events[i] for _, i in self._sorted.get(pet_id, [])]
+            repeating = list(self._repeating.get(pet_id, {}).values())
+        return sorted(base + repeating, key=lambda e: e["dt"])
+
+    def between(self, pet_id, start, end):
+        """start 이상 end 미만(ISO 일시 문자열)의 일정 회차 (일시 순)"""
+        with self._lock:
+            entries = self._sorted.get(pet_id, [])
+            lo, hi = bisect_left(entries, (start,)), bisect_left(entries, (end,))
+            once = [self._events[i] for _, i in entries[lo:hi]]
+            repeating = list(self._repeating.get(pet_id, {}).values())
+        return between_from(once, repeating, start, end)
+
+    def upcoming(self, pet_id, after, n):
+        """after(ISO 일시) 이후 가장 가까운 n개 회차"""
+        with self._lock:
+            entries = self._sorted.get(pet_id, [])
+            lo = bisect_left(entries, (after,))
+            once = [self._events[i] for _, i in entries[lo:lo + n]]
+            repeating = list(self._repeating.get(pet_id, {}).values())
+        return upcoming_from(once, repeating, after, n)
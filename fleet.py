@@ -0,0 +1,261 @@
+import os
+import time
+import atexit
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from storage import (
+    DATA_DIR, DATASET_FILES, LOG_COLS,
+    add_change_listener, append_csv, cached_csv_index, file_lock, get_store, shard_dir, shard_owners, writable,
+)
+from timezones import DEFAULT_TZ, now_in
+
+# ===================== 활동 기록 =====================
+# 운영 지표의 원본. 추가만 하는 원장이라 지표는 새로 붙은 행만큼만 갱신된다.
+#  - visit: 그날 첫 접속 (n=1)
+#  - feed / water: 추가(+)·삭제(-)된 로그 행 수
+#  - pets: 반려동물 증감 (처음 만들 때 기존 반려동물 수를 한 번 기록)
+#  - size:<데이터셋>: 그날의 저장 용량 (바이트, 관리자 화면을 열 때 하루 한 번)
+ACTIVITY_FILE = os.path.join(DATA_DIR, "activity.csv")
+ACTIVITY_COLS = ["date", "user", "event", "n"]
+
+# 원장 쓰기는 모아 두었다가 한 번에 붙인다 (쓰기마다 공용 원장 잠금을 잡지 않도록).
+# 이 시간(초)이 지났거나 이 행 수만큼 쌓이면, 또는 지표를 읽을 때 붙인다.
+# 프로세스가 비정상 종료하면 아직 붙이지 않은 기록은 빠진다 (운영 지표라 허용)
+FLUSH_SEC = 5
+FLUSH_ROWS = 500
+
+# 용량 증가율을 계산하는 기간(일)
+GROWTH_DAYS = 30
+
+# 파일/폴더 이름 → 데이터셋 (feed_log.csv.deleted, Parquet 로그 폴더 feed_log/ 등도 같은 데이터셋)
+_DATASET_OF = {filename.split(".")[0]: name for name, filename in DATASET_FILES.items()}
+_DATASET_OF.update({"users": "users", "unsafe_db": "unsafe", "petmate": "sqlite",
+                    "activity": "activity", "reminders": "reminders"})
+
+DATASET_LABELS = {
+    "pets": "반려동물", "feed": "사료 로그", "water": "급수 로그", "med_schedule": "복약 스케줄",
+    "med_log": "복약 기록", "hospital_events": "병원 일정", "users": "회원", "unsafe": "위험 정보",
+    "sqlite": "SQLite DB", "activity": "활동 기록", "reminders": "알림 기록", "other": "기타",
+}
+
+
+def _today():
+    # 운영 지표의 날짜는 사용자 시간대가 아니라 서비스 기준 시간대로 센다
+    return now_in(DEFAULT_TZ).date().isoformat()
+
+
+def _dataset_of(name):
+    return _DATASET_OF.get(name.split(".")[0], "other")
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except FileNotFoundError:
+                pass  # 압축/교체 중 사라진 임시 파일
+    return total
+
+
+def _entry_sizes(path, skip=()):
+    """path 바로 아래 항목들의 {데이터셋: 바이트} (폴더는 안쪽 전체)"""
+    sizes = {}
+    if not os.path.isdir(path):
+        return sizes
+    for e in os.scandir(path):
+        if e.name in skip:
+            continue
+        try:
+            n = _dir_size(e.path) if e.is_dir() else e.stat().st_size
+        except FileNotFoundError:
+            continue
+        ds = _dataset_of(e.name)
+        sizes[ds] = sizes.get(ds, 0) + n
+    return sizes
+
+
+# ===================== 증분 집계 =====================
+def _build_fleet(df):
+    return _apply_fleet({"dau": {}, "last_seen": {}, "entries": {}, "pets": {}, "sizes": {}}, df, 1)
+
+
+def _apply_fleet(index, rows, sign):
+    """새로 붙은 활동 기록만 반영한 새 집계 (원장은 지우지 않으므로 sign은 항상 1)"""
+    index = {name: dict(part) for name, part in index.items()}
+    touched_dau, touched_sizes = set(), set()
+    for day, user, event, n in rows[ACTIVITY_COLS].itertuples(index=False, name=None):
+        user = "" if pd.isna(user) else str(user)
+        n = sign * int(n)
+        if event == "visit":
+            writable(index["dau"], day, touched_dau, set).add(user)
+            index["last_seen"][user] = max(day, index["last_seen"].get(user, day))
+        elif event in LOG_COLS:
+            index["entries"][day] = index["entries"].get(day, 0) + n
+        elif event == "pets":
+            count = index["pets"].get(user, 0) + n
+            if count:
+                index["pets"][user] = count
+            else:
+                index["pets"].pop(user, None)
+        elif event.startswith("size:"):
+            writable(index["sizes"], day, touched_sizes, dict)[event[5:]] = n
+    return index
+
+
+def _daily(counts, days):
+    """{날짜: 값} → 최근 days일의 일별 Series (없는 날은 0)"""
+    end = date.fromisoformat(_today())
+    keys = [(end - timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)]
+    series = pd.Series([counts.get(k, 0) for k in keys], index=pd.to_datetime(keys), dtype="int64")
+    series.index.name = "날짜"
+    return series
+
+
+class FleetStats:
+    """관리자 대시보드의 운영 지표 (일일 활성 사용자, 일별 기록 수, 사용자별 반려동물 수, 저장 용량).
+
+    접속/쓰기는 활동 기록 원장에 모아서 붙이고, 지표는 공용 캐시의 증분 인덱스로 유지한다.
+    저장 용량은 처음 한 번 data/ 전체를 재고, 이후에는 쓰기가 있었던 사용자 샤드만 다시 잰다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._visit_day = None
+        self._visited = set()  # 이 프로세스에서 오늘 이미 기록한 사용자
+        self._sizes = None     # owner("" 는 data/ 바로 아래 공용 파일) -> {데이터셋: 바이트}
+        self._dirty = set()    # 용량을 다시 잴 owner
+        self._pending = []     # 아직 원장에 붙이지 않은 행
+        self._pending_since = 0.0
+
+    def _write(self, rows):
+        append_csv(ACTIVITY_FILE, pd.DataFrame(rows, columns=ACTIVITY_COLS), ACTIVITY_COLS)
+
+    def _record(self, rows):
+        """원장에 붙일 행을 모아 두고, 많이 쌓였거나 오래되었으면 붙인다"""
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(rows)
+            due = len(self._pending) >= FLUSH_ROWS or time.monotonic() - self._pending_since >= FLUSH_SEC
+        if due:
+            self.flush()
+
+    def flush(self):
+        """모아 둔 행을 원장에 한 번에 붙인다"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            self._write(rows)
+
+    def ensure_baseline(self):
+        """원장이 없으면 기존 반려동물 수를 한 번 기록하고 시작 (이후에는 증감만 붙인다)"""
+        if os.path.exists(ACTIVITY_FILE):
+            return
+        with file_lock(ACTIVITY_FILE + ".baseline"):
+            if os.path.exists(ACTIVITY_FILE):
+                return
+            counts = {}
+            for pet in get_store(None).pets():
+                owner = pet.get("owner") or ""
+                counts[owner] = counts.get(owner, 0) + 1
+            day = _today()
+            self._write([[day, owner, "pets", n] for owner, n in counts.items()] or [[day, "", "pets", 0]])
+
+    # ---------- 기록 ----------
+    def record_visit(self, user):
+        """그날 첫 접속만 원장에 남긴다"""
+        day = _today()
+        with self._lock:
+            if self._visit_day != day:
+                self._visit_day, self._visited = day, set()
+            if user in self._visited:
+                return
+            self._visited.add(user)
+        self._record([[day, user, "visit", 1]])
+
+    def on_change(self, dataset, owner, action, item):
+        """저장소 변경 알림 → 원장에 증감 한 줄, 해당 샤드는 다음 조회 때 용량을 다시 잰다"""
+        if dataset in LOG_COLS and action in ("add", "delete"):
+            n = item["rows"] if action == "add" else -item["rows"]
+            if n:
+                self._record([[_today(), owner or "", dataset, n]])
+        elif dataset == "pets" and action in ("add", "delete"):
+            self._record([[_today(), owner or "", "pets", 1 if action == "add" else -1]])
+        elif dataset == "pets" and action == "reset":
+            pets = self.aggregates()["pets"]
+            owners = list(pets) if owner is None else [owner]
+            rows = [[_today(), o, "pets", -pets[o]] for o in owners if pets.get(o)]
+            if rows:
+                self._record(rows)
+        with self._lock:
+            self._dirty.add(owner)
+
+    # ---------- 지표 ----------
+    def aggregates(self):
+        """{"dau": {날짜: 사용자 집합}, "last_seen": {사용자: 날짜}, "entries": {날짜: 행 수},
+        "pets": {사용자: 반려동물 수}, "sizes": {날짜: {데이터셋: 바이트}}} (읽기 전용)"""
+        self.flush()
+        if not os.path.exists(ACTIVITY_FILE):
+            return _build_fleet(pd.DataFrame(columns=ACTIVITY_COLS))
+        return cached_csv_index(ACTIVITY_FILE, ACTIVITY_COLS, "fleet", _build_fleet, _apply_fleet)
+
+    def dau(self, days):
+        return _daily({d: len(users) for d, users in self.aggregates()["dau"].items()}, days)
+
+    def entries(self, days):
+        return _daily(self.aggregates()["entries"], days)
+
+    def sizes(self):
+        """데이터셋별 현재 저장 용량 {데이터셋: 바이트}"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if self._sizes is None:
+                self._sizes = {owner: _entry_sizes(shard_dir(owner)) for owner in shard_owners()}
+            else:
+                for owner in dirty:
+                    if owner:
+                        self._sizes[owner] = _entry_sizes(shard_dir(owner))
+            # data/ 바로 아래 공용 파일(회원, 위험 정보, SQLite DB 등)은 몇 개뿐이라 매번 잰다
+            self._sizes[""] = _entry_sizes(DATA_DIR, skip={"users"})
+            totals = {}
+            for sizes in self._sizes.values():
+                for ds, n in sizes.items():
+                    totals[ds] = totals.get(ds, 0) + n
+        return totals
+
+    def storage_report(self):
+        """데이터셋별 용량과 최근 GROWTH_DAYS일 동안의 하루 평균 증가량. 오늘 용량은 하루 한 번 원장에 남긴다"""
+        sizes = self.sizes()
+        day = _today()
+        history = self.aggregates()["sizes"]
+        if day not in history:
+            self._record([[day, "", f"size:{ds}", n] for ds, n in sizes.items()])
+
+        since = (date.fromisoformat(day) - timedelta(days=GROWTH_DAYS)).isoformat()
+        past = min((d for d in history if since <= d < day), default=None)
+        elapsed = (date.fromisoformat(day) - date.fromisoformat(past)).days if past else 0
+        rows = []
+        for ds, n in sorted(sizes.items(), key=lambda kv: -kv[1]):
+            growth = (n - history[past].get(ds, 0)) / elapsed / 1024 if past else None
+            rows.append({
+                "데이터셋": DATASET_LABELS.get(ds, ds),
+                "크기(KB)": round(n / 1024, 1),
+                "하루 증가(KB)": round(growth, 1) if growth is not None else None,
+            })
+        return pd.DataFrame(rows), elapsed
+
+
+@st.cache_resource
+def fleet_stats():
+    """프로세스에 하나인 운영 지표 집계기"""
+    stats = FleetStats()
+    stats.ensure_baseline()
+    add_change_listener(stats.on_change)
+    atexit.register(stats.flush)
+    return stats
@@ -0,0 +1,88 @@
+import pandas as pd
+
+# 사료/급수 로그의 메모리 표현
+#  - pet_id: category (반려동물 수만큼의 UUID + 행마다 작은 정수 코드)
+#  - date: datetime64[s] (문자열 비교 대신 정수 비교, "YYYY-MM-DD" 문자열과 바로 비교 가능)
+#  - 양: int32
+#  - log_id / memo: Arrow 문자열 (행마다 파이썬 객체를 만들지 않는다)
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+
+# ===================== 변환 =====================
+def typed_logs(df, amount_col):
+    """읽어 들인 로그(문자열/객체 컬럼)를 메모리 표현으로. 이미 변환된 컬럼은 그대로 둔다"""
+    df = df.copy(deep=False)
+    df["log_id"] = df["log_id"].astype(TEXT_DTYPE)
+    if not isinstance(df["pet_id"].dtype, pd.CategoricalDtype):
+        df["pet_id"] = df["pet_id"].astype(str).astype("category")
+    if df["date"].dtype != "datetime64[s]":
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce").astype("datetime64[s]")
+    df[amount_col] = pd.to_numeric(df[amount_col], errors="coerce").fillna(0).astype("int32")
+    df["memo"] = df["memo"].astype(TEXT_DTYPE)
+    return df
+
+
+def plain_logs(df):
+    """메모리 표현을 파일/내보내기용 문자열 컬럼으로 되돌린다 (날짜는 YYYY-MM-DD)"""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if col == "date" and pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d").astype(object)
+        elif isinstance(df[col].dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def concat_logs(frames):
+    """pd.concat은 카테고리가 다르면 object로 풀어 버리므로 pet_id 카테고리를 먼저 맞춘다.
+
+    첫 프레임(기존 로그)에는 새 카테고리를 뒤에 덧붙이기만 해서 코드를 다시 매기지 않고,
+    나머지(새로 붙은 행)만 합친 카테고리로 다시 인코딩한다.
+    """
+    first = frames[0]
+    # 로그가 아닌 CSV(활동 기록 등)는 pet_id가 없다
+    if "pet_id" not in first or not isinstance(first["pet_id"].dtype, pd.CategoricalDtype):
+        return pd.concat(frames, ignore_index=True)
+
+    categories = first["pet_id"].cat.categories
+    rest = []
+    for df in frames[1:]:
+        pet_ids = df["pet_id"] if isinstance(df["pet_id"].dtype, pd.CategoricalDtype) else df["pet_id"].astype(str)
+        values = pet_ids.cat.categories if isinstance(pet_ids.dtype, pd.CategoricalDtype) else pd.Index(pet_ids.unique())
+        categories = categories.append(values.difference(categories, sort=False))
+        rest.append((df, pet_ids))
+
+    first = first.copy(deep=False)
+    new_categories = categories[len(first["pet_id"].cat.categories):]
+    if len(new_categories):
+        first["pet_id"] = first["pet_id"].cat.add_categories(new_categories)
+    aligned = [first]
+    for df, pet_ids in rest:
+        df = df.copy(deep=False)
+        df["pet_id"] = pd.Categorical(pet_ids, categories=categories)
+        aligned.append(df)
+    return pd.concat(aligned, ignore_index=True)
+
+
+# ===================== 메모리 리포트 =====================
+def memory_report(chunks_by_name):
+    """{이름: DataFrame 청크들} → 이름별 행 수와 메모리 (현재 표현 vs 문자열 표현).
+
+    청크 단위로 재므로 전체 로그를 한꺼번에 올리지 않는다.
+    """
+    rows = []
+    for name, chunks in chunks_by_name.items():
+        n = typed = plain = 0
+        for chunk in chunks:
+            n += len(chunk)
+            typed += int(chunk.memory_usage(index=False, deep=True).sum())
+            plain += int(plain_logs(chunk).memory_usage(index=False, deep=True).sum())
+        rows.append({
+            "데이터": name,
+            "행 수": n,
+            "메모리(KB)": round(typed / 1024, 1),
+            "문자열 기준(KB)": round(plain / 1024, 1),
+            "행당 바이트": round(typed / n, 1) if n else 0.0,
+            "절감 배수": round(plain / typed, 1) if typed else 0.0,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,144 @@
+import threading
+from bisect import bisect_right, insort
+from datetime import date, timedelta
+
+
+# ===================== 복약 일정 펼치기 =====================
+def active_range(med, start, end):
+    """스케줄 기간과 [start, end]가 겹치는 구간 (ISO 날짜 문자열). 안 겹치면 None"""
+    lo = max(start, med.get("start") or start)
+    hi = min(end, med.get("end") or end)
+    return (lo, hi) if lo <= hi else None
+
+
+def expand_occurrences(meds, start, end):
+    """스케줄 목록을 [start, end] 기간의 복용 건으로 펼친다 (날짜, 시간 순).
+
+    각 항목: {"date": "YYYY-MM-DD", "time": "HH:MM", "med": 스케줄}
+    """
+    occurrences = []
+    for med in meds:
+        active = active_range(med, start, end)
+        if active is None:
+            continue
+        day, last = date.fromisoformat(active[0]), date.fromisoformat(active[1])
+        times = sorted(med.get("times", []))
+        while day <= last:
+            day_str = day.isoformat()
+            occurrences.extend({"date": day_str, "time": t, "med": med} for t in times)
+            day += timedelta(days=1)
+    occurrences.sort(key=lambda o: (o["date"], o["time"]))
+    return occurrences
+
+
+# ===================== 반려동물별 구간 인덱스 =====================
+# 종료일이 없는 스케줄의 종료일 (모든 날짜보다 뒤)
+OPEN_END = "\U0010ffff"
+
+
+class _Intervals:
+    """한 반려동물의 스케줄 구간 (시작일 순 배열).
+
+    배열 위의 암묵적 균형 트리(구간 [lo, hi)의 가운데가 노드)에 노드마다 하위 트리의
+    최대 종료일을 두고, 종료일이 조회 시작보다 이른 하위 트리는 통째로 건너뛴다.
+    스케줄이 바뀌면 최대 종료일은 다음 조회 때 다시 만든다.
+    """
+
+    def __init__(self):
+        self.items = []       # (시작일, 종료일, med_id) 시작일 순
+        self._max_end = None  # 노드 인덱스 -> 하위 트리의 최대 종료일
+
+    def add(self, start, end, med_id):
+        insort(self.items, (start, end, med_id))
+        self._max_end = None
+
+    def remove(self, start, end, med_id):
+        self.items.remove((start, end, med_id))
+        self._max_end = None
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return ""
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self.items[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        return self._max_end[mid]
+
+    def overlapping(self, start, end):
+        """시작일 ≤ end 이고 종료일 ≥ start 인 med_id (시작일 순)"""
+        if self._max_end is None:
+            self._max_end = [""] * len(self.items)
+            self._build(0, len(self.items))
+        limit = bisect_right(self.items, (end, OPEN_END, OPEN_END))
+        found = []
+        self._collect(0, len(self.items), limit, start, found)
+        return found
+
+    def _collect(self, lo, hi, limit, start, found):
+        mid = (lo + hi) // 2
+        if lo >= min(hi, limit) or self._max_end[mid] < start:
+            return
+        self._collect(lo, mid, limit, start, found)
+        if mid < limit and self.items[mid][1] >= start:
+            found.append(self.items[mid][2])
+        self._collect(mid + 1, hi, limit, start, found)
+
+
+def _span(med):
+    # 시작일이 비어 있으면 처음부터 유효 ("" < 모든 날짜), 종료일이 비어 있으면 끝없이
+    return med.get("start") or "", med.get("end") or OPEN_END, med["id"]
+
+
+class MedScheduleIndex:
+    """반려동물별 스케줄 구간 인덱스 (시작일 순 + 하위 트리 최대 종료일).
+
+    특정 날짜/기간에 걸치는 스케줄만 골라 펼치고 (스케줄 수에 대해 로그 시간 + 결과 수),
+    날짜별 결과는 해당 반려동물의 스케줄이 바뀔 때까지 기억해 둔다.
+    """
+
+    def __init__(self, meds=()):
+        self._lock = threading.Lock()
+        self._intervals = {}  # pet_id -> _Intervals
+        self._meds = {}       # med_id -> 스케줄
+        self._days = {}       # (pet_id, date) -> 그날의 복용 건
+        for med in meds:
+            self.add(med)
+
+    def add(self, med):
+        with self._lock:
+            self._meds[med["id"]] = med
+            self._intervals.setdefault(med["pet_id"], _Intervals()).add(*_span(med))
+            self._forget(med["pet_id"])
+
+    def remove(self, med_id):
+        with self._lock:
+            med = self._meds.pop(med_id, None)
+            if med is None:
+                return
+            self._intervals[med["pet_id"]].remove(*_span(med))
+            self._forget(med["pet_id"])
+
+    def _forget(self, pet_id):
+        self._days = {k: v for k, v in self._days.items() if k[0] != pet_id}
+
+    def _overlapping(self, pet_id, start, end):
+        """[start, end]와 겹치는 스케줄: 시작일 ≤ end 이고 종료일 ≥ start"""
+        intervals = self._intervals.get(pet_id)
+        if intervals is None:
+            return []
+        return [self._meds[med_id] for med_id in intervals.overlapping(start, end)]
+
+    def on(self, pet_id, day):
+        """그날의 복용 건 (시간 순)"""
+        key = (pet_id, day)
+        occurrences = self._days.get(key)
+        if occurrences is None:
+            with self._lock:
+                occurrences = expand_occurrences(self._overlapping(pet_id, day, day), day, day)
+                self._days[key] = occurrences
+        return occurrences
+
+    def between(self, pet_id, start, end):
+        """[start, end] 기간의 복용 건 (날짜, 시간 순). 달력 보기 등 기간 조회용"""
+        with self._lock:
+            meds = self._overlapping(pet_id, start, end)
+        return expand_occurrences(meds, start, end)
@@ -0,0 +1,277 @@
+import os
+import uuid
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from log_schema import typed_logs
+from rollup import rollup_frame
+from timing import timed_load
+
+from storage import (
+    LOG_COLS, AMOUNT_COLS, MED_LOG_COLS,
+    FileStore, file_lock, load_csv, load_tombstones, tombstone_path, append_tombstones, compact_csv, notify_change,
+    _signature,
+)
+
+# 샤드 안의 로그 폴더: feed_log/month=YYYY-MM/part-*.parquet
+LOG_DIRS = {"feed": "feed_log", "water": "water_log"}
+
+# 행 그룹 크기. 파일 안은 (pet_id, date) 순이라 행 그룹마다 pet_id/date 범위가 좁다
+ROW_GROUP_ROWS = 10_000
+
+# 한 달 폴더에 작은 파일이 이만큼 쌓이면 하나로 합친다
+MAX_PARTS_PER_MONTH = 32
+
+# 저장소마다 기억해 두는 조회 결과 수 (파일 목록이 바뀌면 어차피 다시 읽는다)
+RESULT_CACHE_SIZE = 64
+
+# 목록을 읽는 사이 압축으로 파일이 사라졌을 때 다시 시도하는 횟수
+READ_RETRIES = 3
+
+
+# ===================== 스키마 / 파일 =====================
+def log_schema(kind):
+    """pet_id는 사전(dictionary) 인코딩: 파일에는 UUID가 행 그룹마다 한 번만, 메모리에서는 category"""
+    return pa.schema([
+        ("log_id", pa.string()),
+        ("pet_id", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.string()),
+        (AMOUNT_COLS[kind], pa.int64()),
+        ("memo", pa.string()),
+    ])
+
+
+def _month_dir(base, month):
+    return os.path.join(base, f"month={month}")
+
+
+def _part_files(base):
+    """{월: [파일 경로]}. '_'로 시작하는 파일은 쓰는 중인 임시 파일이라 제외"""
+    parts = {}
+    if not os.path.isdir(base):
+        return parts
+    for month in sorted(os.scandir(base), key=lambda e: e.name):
+        if not month.is_dir() or not month.name.startswith("month="):
+            continue
+        files = sorted(e.path for e in os.scandir(month.path) if e.name.endswith(".parquet") and not e.name.startswith("_"))
+        if files:
+            parts[month.name.partition("=")[2]] = files
+    return parts
+
+
+def _to_table(kind, df):
+    df = df.reindex(columns=LOG_COLS[kind])
+    df = df.assign(**{
+        "log_id": df["log_id"].astype(str),
+        "pet_id": df["pet_id"].astype(str),
+        "date": df["date"].astype(str),
+        AMOUNT_COLS[kind]: pd.to_numeric(df[AMOUNT_COLS[kind]]).astype("int64"),
+        "memo": df["memo"].where(df["memo"].notna(), "").astype(str),
+    })
+    # 정렬해 두어야 행 그룹 통계(min/max)로 다른 반려동물/기간을 건너뛸 수 있다
+    df = df.sort_values(["pet_id", "date"], kind="stable")
+    return pa.Table.from_pandas(df, schema=log_schema(kind), preserve_index=False)
+
+
+def _write_part(month_dir, table):
+    """임시 파일에 쓰고 rename. 읽는 쪽은 완성된 파일만 본다"""
+    os.makedirs(month_dir, exist_ok=True)
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    tmp = os.path.join(month_dir, "_" + name)
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS)
+    os.replace(tmp, os.path.join(month_dir, name))
+
+
+# ===================== 저장소 (Parquet) =====================
+class ParquetStore(FileStore):
+    """사료/급수 로그만 월별 Parquet 데이터셋으로 저장하는 파일 저장소.
+
+    기간 조회는 월 폴더와 행 그룹 통계로 필요한 부분만 읽는다 (predicate pushdown).
+    추가는 새 파일 하나, 삭제는 톰스톤, 압축은 월 단위 재작성.
+    """
+
+    def __init__(self, owner=None):
+        super().__init__(owner)
+        self._results = {}
+        if owner is not None:
+            for kind in LOG_COLS:
+                self.paths[kind] = os.path.join(os.path.dirname(self.paths["pets"]), LOG_DIRS[kind])
+                self._upgrade_csv(kind)
+
+    def _upgrade_csv(self, kind):
+        """같은 샤드의 예전 CSV 로그를 한 번 옮긴다"""
+        base = self.paths[kind]
+        old = os.path.join(os.path.dirname(base), f"{LOG_DIRS[kind]}.csv")
+        if not os.path.exists(old):
+            return
+        with file_lock(base):
+            if os.path.exists(old):
+                self._append(kind, load_csv(old, LOG_COLS[kind]))
+                for p in [old, tombstone_path(old)]:
+                    if os.path.exists(p):
+                        os.replace(p, p + ".migrated")
+
+    # ---------- 읽기 ----------
+    def _snapshot(self, kind):
+        """현재 파일 목록과 삭제된 log_id. 압축과 겹치지 않도록 잠금 안에서 목록만 뜬다"""
+        base = self.paths[kind]
+        with file_lock(base):
+            parts = _part_files(base)
+            deleted = load_tombstones(base)
+            sig = (tuple(f for files in parts.values() for f in files), _signature(tombstone_path(base)))
+        return parts, deleted, sig
+
+    def _scan(self, kind, key, months, columns, predicate):
+        """조건에 맞는 행만 읽은 DataFrame. 파일 목록이 그대로면 직전 결과를 재사용"""
+        for attempt in range(READ_RETRIES):
+            parts, deleted, sig = self._snapshot(kind)
+            cached = self._results.get((kind, key))
+            if cached is not None and cached[0] == sig:
+                return cached[1]
+
+            files = [f for m, fs in parts.items() if months is None or months[0] <= m <= months[1] for f in fs]
+            if deleted:
+                predicate = ~ds.field("log_id").isin(list(deleted)) & predicate
+            try:
+                with timed_load(self.paths[kind]) as info:
+                    table = ds.dataset(files, schema=log_schema(kind), format="parquet").to_table(
+                        columns=columns, filter=predicate
+                    )
+                    info["rows"] = table.num_rows
+            except FileNotFoundError:
+                if attempt == READ_RETRIES - 1:
+                    raise
+                continue
+            df = table.to_pandas()
+            if columns == LOG_COLS[kind]:
+                df = typed_logs(df, AMOUNT_COLS[kind])
+            if len(self._results) >= RESULT_CACHE_SIZE:
+                self._results.clear()
+            self._results[(kind, key)] = (sig, df)
+            return df
+
+    def _log_df(self, kind):
+        return self._scan(kind, "all", None, LOG_COLS[kind], ds.scalar(True))
+
+    def log_total(self, kind, pet_id, day):
+        df = self.log_range(kind, pet_id, day, day)
+        return int(df[AMOUNT_COLS[kind]].sum())
+
+    def log_totals_by_pet(self, kind, start, end):
+        """기간 내 반려동물별 합계 (pet_id 인덱스 Series)"""
+        amount = AMOUNT_COLS[kind]
+        predicate = (ds.field("date") >= start) & (ds.field("date") <= end)
+        df = self._scan(kind, ("by_pet", start, end), (start[:7], end[:7]), ["pet_id", amount], predicate)
+        totals = df.groupby("pet_id", observed=True)[amount].sum().astype("int64")
+        totals.index = totals.index.astype(str)
+        return totals
+
+    def log_range(self, kind, pet_id, start, end):
+        predicate = (ds.field("pet_id") == pet_id) & (ds.field("date") >= start) & (ds.field("date") <= end)
+        return self._scan(kind, ("range", pet_id, start, end), (start[:7], end[:7]), LOG_COLS[kind], predicate)
+
+    def log_rollup(self, kind, pet_id, start, end, freq):
+        """차트용 버킷별 합계. 기간 조회 결과로 한 번 묶고 파일 목록이 바뀔 때까지 재사용"""
+        sig = self._snapshot(kind)[2]
+        key = (kind, ("rollup", pet_id, start, end, freq))
+        cached = self._results.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        series = rollup_frame(self.log_range(kind, pet_id, start, end), AMOUNT_COLS[kind], freq)
+        self._results[key] = (sig, series)
+        return series
+
+    def log_count(self, kind):
+        return sum(len(shard._scan(kind, "ids", None, ["log_id"], ds.scalar(True))) for shard in self._shards())
+
+    def existing_log_ids(self, kind, log_ids):
+        """log_ids 중 이미 저장된 것 (log_id 컬럼만 읽는다)"""
+        known = set(self._scan(kind, "ids", None, ["log_id"], ds.scalar(True))["log_id"])
+        return {x for x in log_ids if x in known}
+
+    def iter_logs(self, kind, chunk_rows):
+        parts, deleted, _ = self._snapshot(kind)
+        files = [f for fs in parts.values() for f in fs]
+        if not files:
+            return
+        dataset = ds.dataset(files, schema=log_schema(kind), format="parquet")
+        for batch in dataset.to_batches(columns=LOG_COLS[kind], batch_size=chunk_rows):
+            df = typed_logs(batch.to_pandas(), AMOUNT_COLS[kind])
+            if deleted:
+                df = df[~df["log_id"].isin(deleted)]
+            if not df.empty:
+                yield df
+
+    # ---------- 쓰기 ----------
+    def _append(self, kind, rows):
+        """월별로 나눠 새 파일로 추가 (잠금 안에서 호출)"""
+        rows = pd.DataFrame(rows).reindex(columns=LOG_COLS[kind])
+        if rows.empty:
+            return
+        base = self.paths[kind]
+        for month, group in rows.groupby(rows["date"].astype(str).str[:7]):
+            _write_part(_month_dir(base, month), _to_table(kind, group))
+
+    def add_log(self, kind, rows):
+        with file_lock(self.paths[kind]):
+            self._append(kind, rows)
+            crowded = [m for m, fs in _part_files(self.paths[kind]).items() if len(fs) >= MAX_PARTS_PER_MONTH]
+            for month in crowded:
+                self._compact_month(kind, month, load_tombstones(self.paths[kind]))
+        notify_change(kind, self.owner, "add", {"rows": len(rows)})
+
+    def delete_logs(self, kind, log_ids):
+        log_ids = [str(x) for x in log_ids]
+        if not log_ids:
+            return
+        base = self.paths[kind]
+        with file_lock(base):
+            due = append_tombstones(base, log_ids)
+        notify_change(kind, self.owner, "delete", {"rows": len(log_ids)})
+        if due:
+            self._compact(kind)
+
+    def _compact_month(self, kind, month, deleted):
+        """한 달 폴더의 파일들을 정렬된 파일 하나로 (잠금 안에서 호출)"""
+        month_dir = _month_dir(self.paths[kind], month)
+        files = _part_files(self.paths[kind]).get(month, [])
+        if not files:
+            return
+        table = ds.dataset(files, schema=log_schema(kind), format="parquet").to_table()
+        df = table.to_pandas()
+        if deleted:
+            df = df[~df["log_id"].isin(deleted)]
+        if not df.empty:
+            _write_part(month_dir, _to_table(kind, df))
+        for f in files:
+            os.remove(f)
+
+    def _compact(self, kind):
+        base = self.paths[kind]
+        with file_lock(base):
+            deleted = load_tombstones(base)
+            for month, files in _part_files(base).items():
+                if deleted or len(files) > 1:
+                    self._compact_month(kind, month, deleted)
+            if os.path.exists(tombstone_path(base)):
+                os.remove(tombstone_path(base))
+
+    def compact_logs(self):
+        for kind in LOG_COLS:
+            self._compact(kind)
+        compact_csv(self.paths["med_log"], MED_LOG_COLS)
+
+    # ---------- 초기화 ----------
+    def reset_logs(self):
+        for kind in LOG_COLS:
+            base = self.paths[kind]
+            with file_lock(base):
+                for month in _part_files(base):
+                    shutil.rmtree(_month_dir(base, month))
+                if os.path.exists(tombstone_path(base)):
+                    os.remove(tombstone_path(base))
+        notify_change("logs", self.owner, "reset")
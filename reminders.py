@@ -0,0 +1,416 @@
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+import urllib.request
+from collections import deque
+from datetime import datetime, date, timedelta
+from itertools import count
+
+import streamlit as st
+
+from event_index import recurrences
+from storage import DATA_DIR, add_change_listener, file_lock, get_store
+from timezones import user_zone, get_zone, to_epoch
+
+logger = logging.getLogger("petmate.reminders")
+
+# ===================== 알림 설정 =====================
+# PETMATE_REMINDERS=0 이면 백그라운드 알림을 켜지 않는다
+REMINDERS_ENABLED = os.environ.get("PETMATE_REMINDERS", "1") != "0"
+
+# 알림을 한 줄씩(JSON) 남기는 파일과 웹훅 주소 (비어 있으면 보내지 않고 기록만)
+REMINDER_FILE = os.environ.get("PETMATE_REMINDER_FILE", os.path.join(DATA_DIR, "reminders.jsonl"))
+WEBHOOK_URL = os.environ.get("PETMATE_WEBHOOK_URL", "")
+
+# 병원 일정은 이만큼(분) 미리 알린다. 복약은 복용 시각에
+HOSPITAL_LEAD_MIN = int(os.environ.get("PETMATE_HOSPITAL_LEAD_MIN", "60"))
+
+# 다음 알림까지 아무리 멀어도 이 간격(초)마다 한 번은 깨어나 시계를 다시 본다 (절전/시계 변경 대비)
+MAX_SLEEP_SEC = 300
+
+# 세션 토스트: 최근 이 시간(초) 안에 화면을 연 사용자에게만, 사용자당 최대 개수만큼 쌓아 둔다
+ACTIVE_SESSION_SEC = 600
+INBOX_SIZE = 20
+
+# 화면이 알림함을 확인하는 간격(초). 메모리의 알림함만 보므로 데이터는 읽지 않는다
+TOAST_POLL_SEC = 30
+
+
+# ===================== 다음 알림 시각 =====================
+# 일정 시각은 각 사용자 시간대의 현지 시각이고, 힙에는 타임스탬프로 넣어 시간대가 달라도 한 줄로 세운다
+def next_med_time(med, time_str, after):
+    """after(현지 시각) 이후 이 스케줄의 time_str 복용 시각. 기간이 끝났거나 시간이 잘못되었으면 None"""
+    try:
+        at = datetime.strptime(time_str, "%H:%M").time()
+    except ValueError:
+        return None
+    day = after.date() if datetime.combine(after.date(), at) > after else after.date() + timedelta(days=1)
+    if med.get("start"):
+        day = max(day, date.fromisoformat(med["start"]))
+    if med.get("end") and day > date.fromisoformat(med["end"]):
+        return None
+    return datetime.combine(day, at)
+
+
+def next_event_time(event, after):
+    """after(현지 시각) 이후 첫 일정 회차 (반복 일정은 다음 회차)"""
+    try:
+        if not event.get("repeat"):
+            dt = datetime.fromisoformat(event["dt"])
+            return dt if dt > after else None
+        for dt in recurrences(event, after.isoformat()):
+            if datetime.fromisoformat(dt) > after:
+                return datetime.fromisoformat(dt)
+    except (KeyError, ValueError):
+        return None
+
+
+# ===================== 알림 받는 곳 =====================
+class FileSink:
+    """알림을 JSON 한 줄씩 파일에 덧붙인다"""
+
+    def __init__(self, path=REMINDER_FILE):
+        self.path = path
+
+    def __call__(self, reminder):
+        line = json.dumps(reminder, ensure_ascii=False) + "\n"
+        with file_lock(self.path):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class WebhookSink:
+    """알림을 JSON으로 POST. 주소가 없으면 보낼 내용만 기억해 둔다 (연동 전 확인용)"""
+
+    def __init__(self, url=WEBHOOK_URL, timeout=5, keep=50):
+        self.url = url
+        self.timeout = timeout
+        self.sent = deque(maxlen=keep)
+
+    def __call__(self, reminder):
+        self.sent.append(reminder)
+        if not self.url:
+            return
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(reminder, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class SessionInbox:
+    """화면을 열어 둔 사용자별 알림함. 앱이 실행될 때 drain()으로 꺼내 토스트로 띄운다"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boxes = {}  # owner -> deque
+        self._seen = {}   # owner -> 마지막으로 알림함을 확인한 시각 (타임스탬프)
+
+    def __call__(self, reminder):
+        owner = reminder["owner"]
+        with self._lock:
+            seen = self._seen.get(owner)
+            if seen is None or time.time() - seen > ACTIVE_SESSION_SEC:
+                return
+            self._boxes.setdefault(owner, deque(maxlen=INBOX_SIZE)).append(reminder)
+
+    def drain(self, owner):
+        with self._lock:
+            self._seen[owner] = time.time()
+            box = self._boxes.pop(owner, None)
+        return list(box or [])
+
+
+# ===================== 스케줄러 =====================
+class ReminderScheduler:
+    """모든 반려동물의 복약/병원 알림을 다음 시각 순 최소 힙 하나로 관리하는 백그라운드 스레드.
+
+    힙에는 알림마다 다음 회차 하나만 들어 있고, 울리면 그 알림의 다음 회차를 다시 넣는다 (O(log n)).
+    스케줄 추가/삭제는 저장소 변경 알림으로 받아 해당 알림만 넣거나 무효로 표시한다
+    (무효 항목은 꺼낼 때 버림). 스레드는 가장 이른 알림 시각까지 잠들어 있으므로
+    주기적으로 전체 데이터를 훑지 않는다.
+    """
+
+    def __init__(self, sinks, store_for=get_store, clock=time.time):
+        self.sinks = list(sinks)
+        self.store_for = store_for
+        self.clock = clock     # 현재 타임스탬프
+        self._zones = {}       # owner -> 시간대 이름
+        self._cond = threading.Condition()
+        self._heap = []        # (알림 시각 타임스탬프, 순번, key)
+        self._seq = count()
+        self._live = {}        # key -> {"version", "owner", "kind", "item", "time"}
+        self._items = {}       # 스케줄/일정 id -> [key]
+        self._stale = 0
+        self._thread = None
+        self._stopped = False
+        self.loaded = threading.Event()  # 시작 후 전체 예약(load_all)을 마쳤는지
+
+    # ---------- 시간대 ----------
+    def _zone(self, owner):
+        """owner의 시간대 이름 (회원 레코드에서 한 번 읽어 기억)"""
+        if owner not in self._zones:
+            self._zones[owner] = user_zone(self.store_for(None).find_user(owner))
+        return self._zones[owner]
+
+    def _local_now(self, owner):
+        return datetime.fromtimestamp(self.clock(), get_zone(self._zone(owner))).replace(tzinfo=None)
+
+    # ---------- 예약 ----------
+    def _next_at(self, entry, after):
+        """entry의 after 이후 다음 (알림 시각, 회차 시각). 없으면 None"""
+        if entry["kind"] == "med":
+            at = next_med_time(entry["item"], entry["time"], after)
+            return (at, at) if at else None
+        # 알림 시각이 이미 지났어도 일정 전이면 바로 울리도록 회차 기준으로 찾는다
+        at = next_event_time(entry["item"], after)
+        return (at - timedelta(minutes=HOSPITAL_LEAD_MIN), at) if at else None
+
+    def _push(self, key, entry, after):
+        """key의 다음 회차를 힙에 넣는다 (잠금 안에서 호출)"""
+        nxt = self._next_at(entry, after)
+        if nxt is None:
+            self._drop(key)
+            return
+        # 순번이 곧 버전: 같은 key를 지웠다 다시 넣어도 예전 힙 항목과 겹치지 않는다
+        entry["version"] = next(self._seq)
+        entry["due"], entry["at"] = nxt
+        self._live[key] = entry
+        heapq.heappush(self._heap, (to_epoch(nxt[0], self._zone(entry["owner"])), entry["version"], key))
+
+    def _drop(self, key):
+        if self._live.pop(key, None) is not None:
+            self._stale += 1
+
+    def _schedule(self, owner, kind, item, after):
+        """스케줄(복용 시간마다 하나) 또는 일정 하나를 예약 (잠금 안에서 호출)"""
+        self._cancel(item["id"])
+        if kind == "med":
+            keys = [("med", item["id"], t) for t in item.get("times", [])]
+        else:
+            keys = [("hospital", item["id"], "")]
+        for key in keys:
+            self._push(key, {"owner": owner, "kind": kind, "item": item, "time": key[2]}, after)
+        self._items[item["id"]] = keys
+
+    def _cancel(self, item_id):
+        for key in self._items.pop(item_id, []):
+            self._drop(key)
+
+    def schedule_med(self, owner, med):
+        # 시간대 조회(회원 파일 읽기)는 잠금 밖에서
+        now = self._local_now(owner)
+        with self._cond:
+            self._schedule(owner, "med", med, now)
+            self._cond.notify()
+
+    def schedule_event(self, owner, event):
+        now = self._local_now(owner)
+        with self._cond:
+            self._schedule(owner, "hospital", event, now)
+            self._cond.notify()
+
+    def cancel(self, item_id):
+        with self._cond:
+            self._cancel(item_id)
+            self._compact()
+
+    def cancel_owner(self, owner):
+        """owner의 알림 전체 (owner가 None이면 모두)"""
+        with self._cond:
+            for key, entry in list(self._live.items()):
+                if owner is None or entry["owner"] == owner:
+                    self._cancel(key[1])
+            self._compact()
+
+    def cancel_pet(self, pet_id):
+        """삭제된 반려동물의 알림 전체"""
+        with self._cond:
+            for key, entry in list(self._live.items()):
+                if entry["item"]["pet_id"] == pet_id:
+                    self._cancel(key[1])
+            self._compact()
+
+    def change_zone(self, owner):
+        """시간대가 바뀐 사용자의 알림을 새 시간대의 현지 시각으로 다시 예약"""
+        self._zones.pop(owner, None)
+        now = self._local_now(owner)
+        with self._cond:
+            items = {e["item"]["id"]: e for e in self._live.values() if e["owner"] == owner}
+            for entry in items.values():
+                self._schedule(owner, entry["kind"], entry["item"], now)
+            self._compact()
+            self._cond.notify()
+
+    def on_change(self, dataset, owner, action, item):
+        """저장소 변경 알림 → 해당 스케줄/일정만 다시 예약하거나 취소"""
+        if action == "timezone":
+            self.change_zone(owner)
+        elif dataset == "users" and action == "delete":
+            self.cancel_owner(owner)
+            self._zones.pop(owner, None)
+        elif dataset == "pets" and action == "reset":
+            self.cancel_owner(owner)
+        elif dataset == "pets" and action == "delete":
+            self.cancel_pet(item["id"])
+        elif dataset not in ("med_schedule", "hospital_events"):
+            return
+        elif action == "delete":
+            self.cancel(item["id"])
+        elif dataset == "med_schedule":
+            self.schedule_med(owner, item)
+        elif dataset == "hospital_events":
+            self.schedule_event(owner, item)
+
+    def load_all(self):
+        """시작할 때 한 번: 모든 반려동물의 스케줄/일정을 예약.
+
+        반려동물을 사용자별로 묶어 샤드마다 스케줄/일정을 한 번씩만 읽고,
+        시간대 조회와 읽기는 잠금 밖에서 해서 그동안 다른 세션의 예약을 막지 않는다.
+        """
+        pet_ids = {}
+        for pet in self.store_for(None).pets():
+            pet_ids.setdefault(pet.get("owner"), set()).add(pet["id"])
+        for owner, ids in pet_ids.items():
+            shard = self.store_for(owner)
+            meds = [m for m in shard.all_med_schedules() if m["pet_id"] in ids]
+            events = [e for e in shard.all_hospital_events() if e["pet_id"] in ids]
+            now = self._local_now(owner)
+            with self._cond:
+                for med in meds:
+                    self._schedule(owner, "med", med, now)
+                for event in events:
+                    self._schedule(owner, "hospital", event, now)
+        with self._cond:
+            self._cond.notify()
+
+    # ---------- 조회 ----------
+    def pending_count(self):
+        with self._cond:
+            return len(self._live)
+
+    def upcoming(self, n):
+        """가장 가까운 n개 알림 (관리자 화면용)"""
+        with self._cond:
+            entries = heapq.nsmallest(n, self._live.values(), key=lambda e: e["due"])
+            return [self._reminder(e) for e in entries]
+
+    # ---------- 실행 ----------
+    def _compact(self):
+        """무효 항목이 절반을 넘으면 힙을 다시 만든다 (잠금 안에서 호출)"""
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._heap = [h for h in self._heap if self._live.get(h[2], {}).get("version") == h[1]]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _head(self):
+        """가장 이른 유효 항목 (무효 항목은 버림, 잠금 안에서 호출)"""
+        while self._heap:
+            due, version, key = self._heap[0]
+            if self._live.get(key, {}).get("version") == version:
+                return due
+            heapq.heappop(self._heap)
+            self._stale = max(0, self._stale - 1)
+        return None
+
+    def _pop_due(self):
+        """지금까지 울려야 할 알림을 꺼내고 각각의 다음 회차를 넣는다 (잠금 안에서 호출)"""
+        now = self.clock()
+        fired = []
+        while (due := self._head()) is not None and due <= now:
+            key = heapq.heappop(self._heap)[2]
+            entry = self._live[key]
+            fired.append(self._reminder(entry))
+            self._push(key, dict(entry), entry["at"])
+        self._compact()
+        return fired
+
+    def _reminder(self, entry):
+        item = entry["item"]
+        if entry["kind"] == "med":
+            title = f"{item['drug']} {item.get('dose', '')}{item.get('unit', '')}".strip()
+        else:
+            title = item["title"]
+        return {
+            "key": ":".join(k for k in (entry["kind"], item["id"], entry["time"]) if k),
+            "kind": entry["kind"],
+            "owner": entry["owner"],
+            "pet_id": item["pet_id"],
+            "title": title,
+            "place": item.get("place", ""),
+            "at": entry["at"].isoformat(timespec="minutes"),
+        }
+
+    def _deliver(self, reminder):
+        pet = next((p for p in self.store_for(reminder["owner"]).pets() if p["id"] == reminder["pet_id"]), None)
+        reminder = dict(reminder, pet_name=pet["name"] if pet else "")
+        for sink in self.sinks:
+            try:
+                sink(reminder)
+            except Exception:
+                # 한 곳이 실패해도 나머지에는 전달한다
+                logger.exception("reminder sink %r failed", sink)
+
+    def _run(self):
+        # 전체 샤드를 훑는 첫 예약은 스레드 안에서 해서 첫 화면을 붙잡지 않는다
+        try:
+            self.load_all()
+        except Exception:
+            logger.exception("initial reminder load failed")
+        finally:
+            self.loaded.set()
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    due = self._head()
+                    if due is not None and due <= self.clock():
+                        break
+                    wait = MAX_SLEEP_SEC if due is None else min(MAX_SLEEP_SEC, due - self.clock())
+                    self._cond.wait(wait)
+                if self._stopped:
+                    return
+                fired = self._pop_due()
+            for reminder in fired:
+                self._deliver(reminder)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="petmate-reminders", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def reminder_message(reminder):
+    """토스트/알림에 띄울 한 줄"""
+    name = f"{reminder['pet_name']} · " if reminder.get("pet_name") else ""
+    at = reminder["at"].replace("T", " ")
+    if reminder["kind"] == "med":
+        return f"💊 {name}{reminder['title']} 복용 시간이에요 ({at[11:]})"
+    place = f", {reminder['place']}" if reminder.get("place") else ""
+    return f"🏥 {name}{reminder['title']} ({at}{place})"
+
+
+@st.cache_resource
+def session_inbox():
+    return SessionInbox()
+
+
+@st.cache_resource
+def reminder_scheduler():
+    """프로세스에 하나인 알림 스케줄러 (꺼져 있으면 None)"""
+    if not REMINDERS_ENABLED:
+        return None
+    scheduler = ReminderScheduler([FileSink(), WebhookSink(), session_inbox()])
+    add_change_listener(scheduler.on_change)
+    return scheduler.start()
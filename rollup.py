@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+# 차트 집계 단위: 일 / ISO 주(월요일 시작) / 월
+FREQ_LABELS = {"D": "일별", "W": "주별", "M": "월별"}
+ROLLUP_FREQS = ["W", "M"]
+_RANGE_FREQ = {"D": "D", "W": "W-MON", "M": "MS"}
+
+
+# ===================== 버킷 계산 =====================
+def bucket_start(day, freq):
+    """day(ISO 날짜)가 속한 버킷의 첫날 (ISO 날짜)"""
+    d = date.fromisoformat(day)
+    if freq == "W":
+        d -= timedelta(days=d.weekday())
+    elif freq == "M":
+        d = d.replace(day=1)
+    return d.isoformat()
+
+
+def bucket_end(day, freq):
+    """day가 속한 버킷의 마지막 날"""
+    d = date.fromisoformat(bucket_start(day, freq))
+    if freq == "W":
+        d += timedelta(days=6)
+    elif freq == "M":
+        d = (d.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return d.isoformat()
+
+
+def _shift(day, days):
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def split_range(start, end, freq):
+    """[start, end]를 버킷이 통째로 들어가는 구간과 양 끝의 자투리 날짜 구간으로 나눈다.
+
+    (inner, partial): inner는 (첫 버킷 시작일, 마지막 버킷 끝날) 또는 None, partial은 [(시작, 끝)] 목록
+    """
+    lo = start if bucket_start(start, freq) == start else _shift(bucket_end(start, freq), 1)
+    hi = end if bucket_end(end, freq) == end else _shift(bucket_start(end, freq), -1)
+    if lo > hi:
+        return None, [(start, end)]
+    partial = []
+    if start < lo:
+        partial.append((start, _shift(lo, -1)))
+    if hi < end:
+        partial.append((_shift(hi, 1), end))
+    return (lo, hi), partial
+
+
+def bucket_keys(start, end, freq):
+    """[start, end] 안에서 시작하는 버킷의 첫날 목록 (ISO 날짜)"""
+    return pd.date_range(start, end, freq=_RANGE_FREQ[freq]).strftime("%Y-%m-%d").tolist()
+
+
+# ===================== 주/월 합계 인덱스 =====================
+def _bucket_columns(dates):
+    dates = pd.to_datetime(dates)
+    return {
+        "W": (dates - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        "M": dates.dt.strftime("%Y-%m-01"),
+    }
+
+
+def build_rollups(df, value_col):
+    """{freq: {(pet_id, 버킷 첫날): value_col 합계}} (freq: "W", "M")"""
+    return apply_rollups({freq: {} for freq in ROLLUP_FREQS}, df, value_col, 1)
+
+
+def apply_rollups(rollups, rows, value_col, sign):
+    """추가(sign=1) 또는 삭제(sign=-1)된 행만큼 갱신한 새 주/월 합계 (받은 합계는 그대로)"""
+    if rows.empty:
+        return rollups
+    rollups = dict(rollups)
+    pet_ids = rows["pet_id"].astype(str)
+    for freq, keys in _bucket_columns(rows["date"]).items():
+        sums = rows[value_col].groupby([pet_ids, keys]).sum()
+        totals = rollups[freq] = dict(rollups[freq])
+        for key, value in sums.items():
+            total = totals.get(key, 0) + sign * int(value)
+            if total:
+                totals[key] = total
+            else:
+                totals.pop(key, None)
+    return rollups
+
+
+# ===================== 차트용 시계열 =====================
+def rollup_series(periods, daily, freq):
+    """버킷 합계 {버킷 첫날: 합계}와 자투리 일별 합계 {날짜: 합계}를 합쳐 버킷별 시계열로"""
+    totals = dict(periods)
+    for day, value in daily.items():
+        key = bucket_start(day, freq)
+        totals[key] = totals.get(key, 0) + value
+    totals = {k: v for k, v in totals.items() if v}
+    series = pd.Series(totals, dtype="int64").sort_index()
+    series.index = pd.to_datetime(series.index)
+    series.index.name = "날짜"
+    return series
+
+
+def rollup_frame(df, value_col, freq):
+    """로그 행에서 바로 버킷별 시계열 (미리 집계해 둔 인덱스가 없는 저장소용)"""
+    if df.empty:
+        return rollup_series({}, {}, freq)
+    dates = pd.to_datetime(df["date"])
+    keys = dates.dt.strftime("%Y-%m-%d") if freq == "D" else _bucket_columns(dates)[freq]
+    return rollup_series(df[value_col].groupby(keys).sum().astype("int64").to_dict(), {}, freq)
@@ -0,0 +1,119 @@
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+# 검색 대상 필드와 가중치 (이름 > 분류 > 이유)
+FIELD_WEIGHTS = {"name": 3, "category": 2, "why": 1}
+
+# 한글 음절(가-힣)은 초성 하나당 588자 (중성 21 × 종성 28)
+_HANGUL_BASE = 0xAC00
+_SYLLABLES_PER_CHOSEONG = 588
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+
+# ===================== 토큰화 =====================
+def normalize(text):
+    return unicodedata.normalize("NFC", str(text)).lower().strip()
+
+
+def ngrams(word):
+    """한 단어의 글자 2-gram (한 글자 단어는 그 글자). 한글은 음절 단위로 자른다"""
+    if len(word) < 2:
+        return {word} if word else set()
+    return {word[i:i + 2] for i in range(len(word) - 1)}
+
+
+def _tokens(text):
+    grams = set()
+    for word in normalize(text).split():
+        grams |= ngrams(word)
+        grams |= set(word)  # 한 글자 검색어용
+    return grams
+
+
+def _prefix_bounds(prefix):
+    """prefix로 시작하는 문자열의 [lo, hi) 범위.
+
+    입력 중인 마지막 글자가 자음(예: '초ㅋ')이면 그 초성으로 시작하는 음절(코, 콕, …) 전체로 넓힌다.
+    """
+    last = prefix[-1]
+    if last in _CHOSEONG:
+        start = _HANGUL_BASE + _CHOSEONG.index(last) * _SYLLABLES_PER_CHOSEONG
+        head = prefix[:-1]
+        return head + chr(start), head + chr(start + _SYLLABLES_PER_CHOSEONG)
+    return prefix, prefix + "\U0010ffff"
+
+
+# ===================== 역색인 =====================
+class UnsafeSearchIndex:
+    """위험 정보 항목의 글자 n-gram 역색인 + 이름 정렬 목록(접두어 검색).
+
+    검색어의 모든 n-gram을 가진 항목만 교집합으로 골라 실제 포함 여부를 확인하고
+    필드 가중치와 이름 일치/접두어 여부로 순위를 매긴다. 항목 추가는 그 항목만 색인한다.
+    """
+
+    def __init__(self, items=()):
+        self._lock = threading.Lock()
+        self._items = []      # 문서 번호 -> 항목
+        self._fields = []     # 문서 번호 -> {필드: 정규화된 값}
+        self._postings = {}   # n-gram -> 문서 번호 집합
+        self._names = []      # [(정규화된 이름, 문서 번호)] (이름 순)
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        with self._lock:
+            doc = len(self._items)
+            fields = {f: normalize(item.get(f, "")) for f in FIELD_WEIGHTS}
+            self._items.append(item)
+            self._fields.append(fields)
+            for f in FIELD_WEIGHTS:
+                for gram in _tokens(fields[f]):
+                    self._postings.setdefault(gram, set()).add(doc)
+            insort(self._names, (fields["name"], doc))
+
+    def items(self):
+        return list(self._items)
+
+    def _prefixed(self, prefix):
+        lo, hi = _prefix_bounds(prefix)
+        start, end = bisect_left(self._names, (lo,)), bisect_left(self._names, (hi,))
+        return {doc for _, doc in self._names[start:end]}
+
+    def _score(self, doc, words, query):
+        fields = self._fields[doc]
+        score = 0
+        for f, weight in FIELD_WEIGHTS.items():
+            score += weight * sum(1 for w in words if w in fields[f])
+        if fields["name"] == query:
+            score += 10
+        return score
+
+    def search(self, query, limit=None):
+        """검색어의 모든 단어를 포함하는 항목 (관련도 순). 이름 접두어 입력 중인 항목도 포함"""
+        query = normalize(query)
+        words = query.split()
+        if not words:
+            return self.items()
+
+        with self._lock:
+            # 가장 짧은 포스팅부터 교집합
+            postings = sorted((self._postings.get(g, set()) for w in words for g in ngrams(w)), key=len)
+            docs = set(postings[0]).intersection(*postings[1:]) if postings else set()
+            # n-gram 후보는 단어가 실제로 들어 있는지 확인 (2-gram이 흩어져 있는 경우 제외)
+            docs = {d for d in docs if all(any(w in v for v in self._fields[d].values()) for w in words)}
+            prefixed = self._prefixed(query)
+            docs |= prefixed
+
+            def rank(d):
+                return -(self._score(d, words, query) + (5 if d in prefixed else 0)), d
+
+            if limit is None:
+                ranked = sorted(docs, key=rank)
+            else:
+                ranked = heapq.nsmallest(limit, docs, key=rank)
+            return [self._items[d] for d in ranked]
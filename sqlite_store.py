@@ -0,0 +1,762 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from med_index import expand_occurrences
+from event_index import between_from, upcoming_from
+from search_index import UnsafeSearchIndex
+from log_schema import typed_logs
+from rollup import split_range, rollup_series
+from timing import span
+from storage import (
+    DATA_DIR, DB_FILE, USER_FILE, UNSAFE_FILE, LEGACY_OWNER,
+    LOG_COLS, AMOUNT_COLS, MED_LOG_COLS, DEFAULT_UNSAFE,
+    load_json, load_csv, dataset_paths, shard_dir, shard_owners, migrate_legacy_files, upgrade_med_log,
+    notify_change,
+)
+
+# ===================== 스키마 =====================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    tz TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS pets (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    species TEXT NOT NULL,
+    breed TEXT NOT NULL DEFAULT '',
+    birth TEXT NOT NULL DEFAULT '',
+    weight_kg REAL NOT NULL DEFAULT 0,
+    notes TEXT NOT NULL DEFAULT '',
+    owner TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS feed (
+    log_id TEXT PRIMARY KEY,
+    pet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    amount_g INTEGER NOT NULL,
+    memo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_feed_pet_date ON feed (pet_id, date);
+
+CREATE TABLE IF NOT EXISTS water (
+    log_id TEXT PRIMARY KEY,
+    pet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    amount_ml INTEGER NOT NULL,
+    memo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_water_pet_date ON water (pet_id, date);
+
+CREATE TABLE IF NOT EXISTS med_schedule (
+    id TEXT PRIMARY KEY,
+    pet_id TEXT NOT NULL,
+    drug TEXT NOT NULL,
+    dose TEXT NOT NULL DEFAULT '',
+    unit TEXT NOT NULL DEFAULT '',
+    times TEXT NOT NULL,
+    start TEXT NOT NULL DEFAULT '',
+    "end" TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_med_schedule_pet ON med_schedule (pet_id);
+
+CREATE TABLE IF NOT EXISTS med_log (
+    pet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    med_id TEXT NOT NULL,
+    time TEXT NOT NULL,
+    taken_at TEXT NOT NULL,
+    PRIMARY KEY (pet_id, date, med_id, time)
+);
+CREATE INDEX IF NOT EXISTS idx_med_log_med ON med_log (med_id);
+
+CREATE TABLE IF NOT EXISTS hospital_events (
+    id TEXT PRIMARY KEY,
+    pet_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    dt TEXT NOT NULL,
+    place TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    repeat TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_hospital_events_pet_dt ON hospital_events (pet_id, dt);
+
+CREATE TABLE IF NOT EXISTS unsafe_db (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    risk TEXT NOT NULL,
+    why TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_unsafe_db_name ON unsafe_db (name);
+
+CREATE TABLE IF NOT EXISTS daily_totals (
+    kind TEXT NOT NULL,
+    pet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (kind, pet_id, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS period_totals (
+    kind TEXT NOT NULL,
+    pet_id TEXT NOT NULL,
+    freq TEXT NOT NULL,
+    period TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (kind, pet_id, freq, period)
+) WITHOUT ROWID;
+"""
+
+# 날짜 → 버킷 첫날 (W: ISO 주의 월요일, M: 그 달 1일)
+PERIOD_EXPRS = {
+    "W": "date({d}, '-' || ((CAST(strftime('%w', {d}) AS INTEGER) + 6) % 7) || ' days')",
+    "M": "strftime('%Y-%m-01', {d})",
+}
+
+
+def _daily_totals_triggers(kind):
+    """로그 행이 추가/삭제될 때 같은 트랜잭션 안에서 daily_totals를 차분 갱신하는 트리거"""
+    amount = AMOUNT_COLS[kind]
+    return f"""
+CREATE TRIGGER IF NOT EXISTS {kind}_daily_totals_insert AFTER INSERT ON {kind} BEGIN
+    INSERT INTO daily_totals (kind, pet_id, date, total)
+    VALUES ('{kind}', NEW.pet_id, NEW.date, NEW.{amount})
+    ON CONFLICT (kind, pet_id, date) DO UPDATE SET total = total + excluded.total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS {kind}_daily_totals_delete AFTER DELETE ON {kind} BEGIN
+    UPDATE daily_totals SET total = total - OLD.{amount}
+    WHERE kind = '{kind}' AND pet_id = OLD.pet_id AND date = OLD.date;
+    DELETE FROM daily_totals
+    WHERE kind = '{kind}' AND pet_id = OLD.pet_id AND date = OLD.date AND total = 0;
+END;
+"""
+
+
+
+def _period_totals_triggers():
+    """daily_totals가 바뀔 때 그 차이만큼 주/월 합계(period_totals)를 갱신하는 트리거"""
+    def apply(row, delta):
+        return "".join(f"""
+    INSERT INTO period_totals (kind, pet_id, freq, period, total)
+    VALUES ({row}.kind, {row}.pet_id, '{freq}', {expr.format(d=row + '.date')}, {delta})
+    ON CONFLICT (kind, pet_id, freq, period) DO UPDATE SET total = total + excluded.total;""" for freq, expr in PERIOD_EXPRS.items())
+
+    return f"""
+CREATE TRIGGER IF NOT EXISTS daily_totals_period_insert AFTER INSERT ON daily_totals BEGIN{apply("NEW", "NEW.total")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_totals_period_update AFTER UPDATE ON daily_totals BEGIN{apply("NEW", "NEW.total - OLD.total")}
+    DELETE FROM period_totals WHERE total = 0 AND kind = NEW.kind AND pet_id = NEW.pet_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_totals_period_delete AFTER DELETE ON daily_totals BEGIN{apply("OLD", "-OLD.total")}
+    DELETE FROM period_totals WHERE total = 0 AND kind = OLD.kind AND pet_id = OLD.pet_id;
+END;
+"""
+
+
+PET_FIELDS = ["id", "name", "species", "breed", "birth", "weight_kg", "notes", "owner"]
+MED_FIELDS = ["id", "pet_id", "drug", "dose", "unit", "times", "start", "end", "notes"]
+EVENT_FIELDS = ["id", "pet_id", "title", "dt", "place", "notes", "repeat"]
+UNSAFE_FIELDS = ["category", "name", "risk", "why"]
+
+
+def _placeholders(fields):
+    return ", ".join("?" for _ in fields)
+
+
+def _columns(fields):
+    return ", ".join(f'"{f}"' for f in fields)
+
+
+def _med_row(med):
+    return [json.dumps(med.get("times", []), ensure_ascii=False) if f == "times" else med.get(f, "")
+            for f in MED_FIELDS]
+
+
+def _med_from_row(row):
+    med = dict(row)
+    med["times"] = json.loads(med["times"])
+    return med
+
+
+def _add_missing_columns(con):
+    """예전 DB에 나중에 추가된 컬럼을 붙인다"""
+    cols = [r[1] for r in con.execute("PRAGMA table_info(pets)")]
+    if "owner" not in cols:
+        # owner 컬럼이 없던 DB의 반려동물은 LEGACY_OWNER 소유로 채운다
+        con.execute("ALTER TABLE pets ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        con.execute("UPDATE pets SET owner = ?", (LEGACY_OWNER,))
+    con.execute("CREATE INDEX IF NOT EXISTS idx_pets_owner ON pets (owner)")
+
+    cols = [r[1] for r in con.execute("PRAGMA table_info(hospital_events)")]
+    if "repeat" not in cols:
+        con.execute("ALTER TABLE hospital_events ADD COLUMN repeat TEXT NOT NULL DEFAULT ''")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_hospital_events_repeat ON hospital_events (pet_id, repeat)")
+
+    cols = [r[1] for r in con.execute("PRAGMA table_info(users)")]
+    if "tz" not in cols:
+        # 비어 있으면 기본 시간대(DEFAULT_TZ)
+        con.execute("ALTER TABLE users ADD COLUMN tz TEXT NOT NULL DEFAULT ''")
+
+
+# DB 파일별 위험 정보 검색 색인: db_path -> (색인, 색인에 반영된 마지막 id)
+_unsafe_indexes = {}
+_unsafe_lock = threading.Lock()
+
+
+# ===================== 저장소 (SQLite) =====================
+class SqliteStore:
+    """내장 SQLite 파일 저장소. FileStore와 같은 메서드를 제공하며
+    사료/급수 로그는 (pet_id, date) 인덱스로 필요한 행만 조회한다.
+
+    owner가 있으면 그 사용자의 반려동물(pets.owner)과 딸린 기록만 다루고,
+    None이면 관리자용 전체 보기다.
+    """
+
+    def __init__(self, db_path=DB_FILE, owner=None):
+        self.db_path = db_path
+        self.owner = owner
+        # Streamlit은 세션마다 다른 스레드에서 스크립트를 실행하므로 스레드별 연결 사용
+        self._local = threading.local()
+
+        is_new = not os.path.exists(db_path)
+        with self._conn() as con:
+            con.executescript(SCHEMA)
+            for kind in LOG_COLS:
+                con.executescript(_daily_totals_triggers(kind))
+            con.executescript(_period_totals_triggers())
+            _add_missing_columns(con)
+        if is_new:
+            migrate_files(self)
+        elif self._daily_totals_missing():
+            self.rebuild_daily_totals()
+        if self._period_totals_missing():
+            self.rebuild_period_totals()
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.db_path, timeout=30)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _query(self, sql, params=()):
+        with span("sqlite_query"):
+            return [dict(r) for r in self._conn().execute(sql, params).fetchall()]
+
+    def _execute(self, sql, params=()):
+        with span("sqlite_write"), self._conn() as con:
+            con.execute(sql, params)
+
+    def _owned(self, col="pet_id"):
+        """owner가 있으면 그 사용자의 반려동물로 제한하는 WHERE 조건과 인자"""
+        if self.owner is None:
+            return "1", ()
+        return f"{col} IN (SELECT id FROM pets WHERE owner = ?)", (self.owner,)
+
+    def _owns_pet(self, pet_id):
+        if self.owner is None:
+            return True
+        return self._conn().execute(
+            "SELECT 1 FROM pets WHERE id = ? AND owner = ?", (pet_id, self.owner)
+        ).fetchone() is not None
+
+    # ---------- 반려동물 ----------
+    def pets(self):
+        where, params = ("1", ()) if self.owner is None else ("owner = ?", (self.owner,))
+        return self._query(f"SELECT {_columns(PET_FIELDS)} FROM pets WHERE {where} ORDER BY rowid", params)
+
+    def add_pet(self, pet):
+        pet = dict(pet, owner=self.owner)
+        self._execute(
+            f"INSERT INTO pets ({_columns(PET_FIELDS)}) VALUES ({_placeholders(PET_FIELDS)})",
+            [pet.get(f, "") for f in PET_FIELDS],
+        )
+        notify_change("pets", self.owner, "add", pet)
+
+    def update_pet(self, pet):
+        pet = dict(pet, owner=self.owner)
+        assignments = ", ".join(f'"{f}" = ?' for f in PET_FIELDS[1:])
+        self._execute(
+            f"UPDATE pets SET {assignments} WHERE id = ? AND owner = ?",
+            [pet.get(f, "") for f in PET_FIELDS[1:]] + [pet["id"], self.owner],
+        )
+
+    def delete_pet(self, pet_id):
+        self._execute("DELETE FROM pets WHERE id = ? AND owner = ?", (pet_id, self.owner))
+        notify_change("pets", self.owner, "delete", {"id": pet_id})
+
+    # ---------- 복약 스케줄 / 기록 ----------
+    def med_schedules(self, pet_id):
+        where, params = self._owned()
+        rows = self._query(
+            f"SELECT {_columns(MED_FIELDS)} FROM med_schedule WHERE pet_id = ? AND {where} ORDER BY rowid",
+            (pet_id, *params),
+        )
+        return [_med_from_row(r) for r in rows]
+
+    def med_occurrences(self, pet_id, start, end=None):
+        """[start, end] 기간의 복용 건 {"date", "time", "med"} (날짜, 시간 순). end가 없으면 하루"""
+        end = end or start
+        where, params = self._owned()
+        # 빈 문자열 시작일/종료일은 기간 제한 없음
+        rows = self._query(
+            f"SELECT {_columns(MED_FIELDS)} FROM med_schedule "
+            f"WHERE pet_id = ? AND start <= ? AND (\"end\" = '' OR \"end\" >= ?) AND {where} ORDER BY rowid",
+            (pet_id, end, start, *params),
+        )
+        return expand_occurrences([_med_from_row(r) for r in rows], start, end)
+
+    def med_schedule_count(self):
+        where, params = self._owned()
+        return self._conn().execute(f"SELECT COUNT(*) FROM med_schedule WHERE {where}", params).fetchone()[0]
+
+    def all_med_schedules(self):
+        """이 사용자(관리자면 전체)의 모든 복약 스케줄 (알림 예약용)"""
+        where, params = self._owned()
+        rows = self._query(f"SELECT {_columns(MED_FIELDS)} FROM med_schedule WHERE {where} ORDER BY rowid", params)
+        return [_med_from_row(r) for r in rows]
+
+    def add_med_schedule(self, med):
+        # 다른 사용자의 반려동물에는 추가하지 않는다
+        if not self._owns_pet(med["pet_id"]):
+            return
+        self._execute(
+            f"INSERT INTO med_schedule ({_columns(MED_FIELDS)}) VALUES ({_placeholders(MED_FIELDS)})",
+            _med_row(med),
+        )
+        notify_change("med_schedule", self.owner, "add", med)
+
+    def delete_med_schedule(self, med):
+        where, params = self._owned()
+        with self._conn() as con:
+            con.execute(f"DELETE FROM med_schedule WHERE id = ? AND {where}", (med["id"], *params))
+            con.execute(f"DELETE FROM med_log WHERE med_id = ? AND {where}", (med["id"], *params))
+        notify_change("med_schedule", self.owner, "delete", med)
+
+    def med_day_log(self, pet_id, day):
+        where, params = self._owned()
+        rows = self._conn().execute(
+            f"SELECT med_id, time, taken_at FROM med_log WHERE pet_id = ? AND date = ? AND {where}",
+            (pet_id, day, *params),
+        ).fetchall()
+        return {f"{r['med_id']}_{r['time']}": r["taken_at"] for r in rows}
+
+    def med_log_range(self, pet_id, start, end):
+        """기간 내 복약 기록 (date, med_id, time, taken_at 컬럼)"""
+        cols = ["date", "med_id", "time", "taken_at"]
+        where, params = self._owned()
+        rows = self._conn().execute(
+            f"SELECT {_columns(cols)} FROM med_log WHERE pet_id = ? AND date BETWEEN ? AND ? AND {where}",
+            (pet_id, start, end, *params),
+        ).fetchall()
+        return pd.DataFrame([tuple(r) for r in rows], columns=cols)
+
+    def set_med_taken(self, pet_id, day, med_id, time_str, taken_at):
+        # 다른 사용자의 반려동물 기록은 건드리지 않는다
+        if not self._owns_pet(pet_id):
+            return
+        if taken_at:
+            self._execute(
+                "INSERT OR REPLACE INTO med_log (pet_id, date, med_id, time, taken_at) VALUES (?, ?, ?, ?, ?)",
+                (pet_id, day, med_id, time_str, taken_at),
+            )
+        else:
+            self._execute(
+                "DELETE FROM med_log WHERE pet_id = ? AND date = ? AND med_id = ? AND time = ?",
+                (pet_id, day, med_id, time_str),
+            )
+
+    # ---------- 병원 일정 ----------
+    def hospital_events(self, pet_id):
+        where, params = self._owned()
+        return self._query(
+            f"SELECT {_columns(EVENT_FIELDS)} FROM hospital_events WHERE pet_id = ? AND {where} ORDER BY dt",
+            (pet_id, *params),
+        )
+
+    def all_hospital_events(self):
+        """이 사용자(관리자면 전체)의 모든 병원 일정 (알림 예약용)"""
+        where, params = self._owned()
+        return self._query(f"SELECT {_columns(EVENT_FIELDS)} FROM hospital_events WHERE {where} ORDER BY dt", params)
+
+    def _repeating_events(self, pet_id):
+        where, params = self._owned()
+        return self._query(
+            f"SELECT {_columns(EVENT_FIELDS)} FROM hospital_events WHERE pet_id = ? AND repeat != '' AND {where}",
+            (pet_id, *params),
+        )
+
+    def hospital_events_between(self, pet_id, start, end):
+        """start 이상 end 미만(ISO 일시)의 일정. 반복 일정은 구간 안의 회차로 펼쳐진다"""
+        # dt는 ISO 문자열이므로 범위 조회로 (pet_id, dt) 인덱스를 탄다
+        where, params = self._owned()
+        once = self._query(
+            f"SELECT {_columns(EVENT_FIELDS)} FROM hospital_events "
+            f"WHERE pet_id = ? AND dt >= ? AND dt < ? AND repeat = '' AND {where} ORDER BY dt",
+            (pet_id, start, end, *params),
+        )
+        return between_from(once, self._repeating_events(pet_id), start, end)
+
+    def hospital_events_on(self, pet_id, day):
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        return self.hospital_events_between(pet_id, day, next_day)
+
+    def upcoming_hospital_events(self, pet_id, after, n):
+        """after(ISO 일시) 이후 가장 가까운 n개 일정 회차"""
+        where, params = self._owned()
+        once = self._query(
+            f"SELECT {_columns(EVENT_FIELDS)} FROM hospital_events "
+            f"WHERE pet_id = ? AND dt >= ? AND repeat = '' AND {where} ORDER BY dt LIMIT ?",
+            (pet_id, after, *params, n),
+        )
+        return upcoming_from(once, self._repeating_events(pet_id), after, n)
+
+    def add_hospital_event(self, event):
+        if not self._owns_pet(event["pet_id"]):
+            return
+        self._execute(
+            f"INSERT INTO hospital_events ({_columns(EVENT_FIELDS)}) VALUES ({_placeholders(EVENT_FIELDS)})",
+            [event.get(f, "") for f in EVENT_FIELDS],
+        )
+        notify_change("hospital_events", self.owner, "add", event)
+
+    def delete_hospital_event(self, event_id):
+        where, params = self._owned()
+        self._execute(f"DELETE FROM hospital_events WHERE id = ? AND {where}", (event_id, *params))
+        notify_change("hospital_events", self.owner, "delete", {"id": event_id})
+
+    # ---------- 위험 정보 ----------
+    def unsafe_items(self):
+        return self._query(f"SELECT {_columns(UNSAFE_FIELDS)} FROM unsafe_db ORDER BY id")
+
+    def search_unsafe(self, query, limit=None):
+        """이름/분류/이유에서 검색어를 찾아 관련도 순으로"""
+        con = self._conn()
+        with _unsafe_lock:
+            index, indexed_id = _unsafe_indexes.get(self.db_path, (UnsafeSearchIndex(), 0))
+            # 개수와 새 항목을 같은 스냅샷에서 읽는다
+            con.execute("BEGIN")
+            try:
+                last_id, count = con.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM unsafe_db").fetchone()
+                if last_id != indexed_id:
+                    # id는 AUTOINCREMENT라 새 항목만 이어서 색인
+                    new_items = self._query(
+                        f"SELECT {_columns(UNSAFE_FIELDS)} FROM unsafe_db WHERE id > ? ORDER BY id", (indexed_id,)
+                    )
+                    if len(index) + len(new_items) != count:
+                        # 초기화 등으로 지워진 항목이 있으면 처음부터 다시 색인
+                        index = UnsafeSearchIndex(self.unsafe_items())
+                    else:
+                        for item in new_items:
+                            index.add(item)
+                    _unsafe_indexes[self.db_path] = (index, last_id)
+            finally:
+                con.execute("COMMIT")
+        return index.search(query, limit)
+
+    def add_unsafe_item(self, item):
+        self.add_unsafe_items([item])
+
+    def add_unsafe_items(self, items):
+        """여러 항목을 한 트랜잭션으로 추가"""
+        with self._conn() as con:
+            con.executemany(
+                f"INSERT INTO unsafe_db ({_columns(UNSAFE_FIELDS)}) VALUES ({_placeholders(UNSAFE_FIELDS)})",
+                [[item.get(f, "") for f in UNSAFE_FIELDS] for item in items],
+            )
+
+    # ---------- 회원 ----------
+    def users(self):
+        return self._query("SELECT username, password, tz FROM users ORDER BY rowid")
+
+    def user_page(self, query, offset, limit):
+        """아이디에 query가 들어 있는 회원 수와 그중 [offset, offset + limit) 구간 (가입 순)"""
+        where, params = "1", ()
+        if query:
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where, params = "username LIKE ? ESCAPE '\\'", (f"%{escaped}%",)
+        total = self._conn().execute(f"SELECT COUNT(*) FROM users WHERE {where}", params).fetchone()[0]
+        rows = self._query(
+            f"SELECT username, tz FROM users WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+            params + (limit, offset),
+        )
+        return total, rows
+
+    def find_user(self, username):
+        rows = self._query("SELECT username, password, tz FROM users WHERE username = ?", (username,))
+        return rows[0] if rows else None
+
+    def add_user(self, user):
+        """이미 있는 아이디면 ValueError"""
+        try:
+            self._execute("INSERT INTO users (username, password, tz) VALUES (?, ?, ?)",
+                          (user["username"], user["password"], user.get("tz", "")))
+        except sqlite3.IntegrityError as e:
+            raise ValueError("이미 존재하는 아이디입니다.") from e
+        notify_change("users", user["username"], "add")
+
+    def set_password(self, username, password):
+        self._execute("UPDATE users SET password = ? WHERE username = ?", (password, username))
+
+    def set_timezone(self, username, tz_name):
+        self._execute("UPDATE users SET tz = ? WHERE username = ?", (tz_name, username))
+        notify_change("users", username, "timezone")
+
+    def delete_user(self, username):
+        self._execute("DELETE FROM users WHERE username = ?", (username,))
+        notify_change("users", username, "delete")
+
+    # ---------- 사료/급수 로그 ----------
+    def log_total(self, kind, pet_id, day):
+        # 트리거로 유지되는 daily_totals에서 기본키 조회 한 번
+        where, params = self._owned()
+        row = self._conn().execute(
+            f"SELECT total FROM daily_totals WHERE kind = ? AND pet_id = ? AND date = ? AND {where}",
+            (kind, pet_id, day, *params),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def log_totals_by_pet(self, kind, start, end):
+        """기간 내 반려동물별 합계 (pet_id 인덱스 Series)"""
+        where, params = self._owned()
+        rows = self._conn().execute(
+            "SELECT pet_id, SUM(total) FROM daily_totals "
+            f"WHERE kind = ? AND date BETWEEN ? AND ? AND {where} GROUP BY pet_id",
+            (kind, start, end, *params),
+        ).fetchall()
+        return pd.Series({r[0]: r[1] for r in rows}, dtype="int64")
+
+    def _daily_totals_missing(self):
+        """daily_totals 도입 이전에 만들어진 DB인지 (로그는 있는데 합계가 비어 있음)"""
+        con = self._conn()
+        if con.execute("SELECT 1 FROM daily_totals LIMIT 1").fetchone():
+            return False
+        return any(con.execute(f"SELECT 1 FROM {kind} LIMIT 1").fetchone() for kind in LOG_COLS)
+
+    def rebuild_daily_totals(self):
+        with self._conn() as con:
+            con.execute("DELETE FROM daily_totals")
+            for kind, amount in AMOUNT_COLS.items():
+                con.execute(
+                    f"INSERT INTO daily_totals (kind, pet_id, date, total) "
+                    f"SELECT '{kind}', pet_id, date, SUM({amount}) FROM {kind} GROUP BY pet_id, date"
+                )
+
+    def _period_totals_missing(self):
+        """period_totals 도입 이전에 만들어진 DB인지"""
+        con = self._conn()
+        return (con.execute("SELECT 1 FROM daily_totals LIMIT 1").fetchone() is not None
+                and con.execute("SELECT 1 FROM period_totals LIMIT 1").fetchone() is None)
+
+    def rebuild_period_totals(self):
+        with self._conn() as con:
+            con.execute("DELETE FROM period_totals")
+            for freq, expr in PERIOD_EXPRS.items():
+                period = expr.format(d="date")
+                con.execute(
+                    f"INSERT INTO period_totals (kind, pet_id, freq, period, total) "
+                    f"SELECT kind, pet_id, '{freq}', {period}, SUM(total) FROM daily_totals "
+                    f"GROUP BY kind, pet_id, {period}"
+                )
+
+    def log_rollup(self, kind, pet_id, start, end, freq):
+        """차트용 [start, end] 버킷별 합계 (freq: "D", "W", "M").
+        통째로 들어가는 주/월은 period_totals에서, 양 끝 자투리는 daily_totals에서 읽는다"""
+        con = self._conn()
+        if not self._owns_pet(pet_id):
+            return rollup_series({}, {}, freq)
+        inner, partial = (None, [(start, end)]) if freq == "D" else split_range(start, end, freq)
+        periods, daily = {}, {}
+        if inner:
+            rows = con.execute(
+                "SELECT period, total FROM period_totals "
+                "WHERE kind = ? AND pet_id = ? AND freq = ? AND period BETWEEN ? AND ?",
+                (kind, pet_id, freq, *inner),
+            ).fetchall()
+            periods = {r[0]: r[1] for r in rows}
+        for lo, hi in partial:
+            rows = con.execute(
+                "SELECT date, total FROM daily_totals WHERE kind = ? AND pet_id = ? AND date BETWEEN ? AND ?",
+                (kind, pet_id, lo, hi),
+            ).fetchall()
+            daily.update((r[0], r[1]) for r in rows)
+        return rollup_series(periods, daily, freq)
+
+    def log_range(self, kind, pet_id, start, end):
+        cols = LOG_COLS[kind]
+        where, params = self._owned()
+        rows = self._conn().execute(
+            f"SELECT {_columns(cols)} FROM {kind} WHERE pet_id = ? AND date BETWEEN ? AND ? AND {where} ORDER BY date",
+            (pet_id, start, end, *params),
+        ).fetchall()
+        return typed_logs(pd.DataFrame([tuple(r) for r in rows], columns=cols), AMOUNT_COLS[kind])
+
+    def log_count(self, kind):
+        where, params = self._owned()
+        return self._conn().execute(f"SELECT COUNT(*) FROM {kind} WHERE {where}", params).fetchone()[0]
+
+    def existing_log_ids(self, kind, log_ids):
+        """log_ids 중 이미 저장된 것 (기본키 조회, 900개씩)"""
+        found = set()
+        for i in range(0, len(log_ids), 900):
+            batch = [str(x) for x in log_ids[i:i + 900]]
+            rows = self._conn().execute(
+                f"SELECT log_id FROM {kind} WHERE log_id IN ({_placeholders(batch)})", batch
+            ).fetchall()
+            found.update(r[0] for r in rows)
+        return found
+
+    def iter_logs(self, kind, chunk_rows):
+        cols = LOG_COLS[kind]
+        where, params = self._owned()
+        cur = self._conn().execute(f"SELECT {_columns(cols)} FROM {kind} WHERE {where} ORDER BY rowid", params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield typed_logs(pd.DataFrame([tuple(r) for r in rows], columns=cols), AMOUNT_COLS[kind])
+
+    def add_log(self, kind, rows):
+        cols = LOG_COLS[kind]
+        rows = pd.DataFrame(rows).reindex(columns=cols)
+        # 다른 사용자의 반려동물 기록은 빼고 넣는다
+        owned = [pet_id for pet_id in rows["pet_id"].unique() if self._owns_pet(pet_id)]
+        rows = rows[rows["pet_id"].isin(owned)]
+        if rows.empty:
+            return
+        with self._conn() as con:
+            con.executemany(
+                f"INSERT OR IGNORE INTO {kind} ({_columns(cols)}) VALUES ({_placeholders(cols)})",
+                rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None),
+            )
+        notify_change(kind, self.owner, "add", {"rows": len(rows)})
+
+    def delete_logs(self, kind, log_ids):
+        where, params = self._owned()
+        with self._conn() as con:
+            con.executemany(f"DELETE FROM {kind} WHERE log_id = ? AND {where}", [(str(x), *params) for x in log_ids])
+        notify_change(kind, self.owner, "delete", {"rows": len(log_ids)})
+
+    def compact_logs(self):
+        self._conn().execute("VACUUM")
+
+    # ---------- 초기화 ----------
+    def reset_logs(self):
+        where, params = self._owned()
+        with self._conn() as con:
+            for kind in LOG_COLS:
+                con.execute(f"DELETE FROM {kind} WHERE {where}", params)
+        notify_change("logs", self.owner, "reset")
+
+    def reset_profiles(self):
+        """이 사용자의 반려동물/복약/병원 일정만 비운다 (위험 정보는 모두가 함께 쓰므로 그대로)"""
+        where, params = self._owned()
+        with self._conn() as con:
+            # 반려동물은 마지막에 지워야 나머지 테이블의 소유자 조건이 맞는다
+            for table in ["med_schedule", "med_log", "hospital_events"]:
+                con.execute(f"DELETE FROM {table} WHERE {where}", params)
+            con.execute(f"DELETE FROM pets WHERE {self._owned('id')[0]}", params)
+        notify_change("pets", self.owner, "reset")
+
+    def reset_unsafe_items(self, unsafe_items):
+        """공용 위험 정보 목록을 통째로 교체 (관리자 전용)"""
+        with self._conn() as con:
+            con.execute("DELETE FROM unsafe_db")
+            con.executemany(
+                f"INSERT INTO unsafe_db ({_columns(UNSAFE_FIELDS)}) VALUES ({_placeholders(UNSAFE_FIELDS)})",
+                [[item.get(f, "") for f in UNSAFE_FIELDS] for item in unsafe_items],
+            )
+
+    def locations(self):
+        return [self.db_path]
+
+
+# ===================== 파일 → SQLite 이전 =====================
+def migrate_files(store):
+    """data/users/<아이디>/ 샤드와 공용 JSON의 기존 데이터를 SQLite로 한 번에 옮긴다
+    (이미 있는 행은 건너뜀)"""
+    counts = {"users": 0, "pets": 0, "med_schedule": 0, "med_log": 0, "hospital_events": 0,
+              **{kind: 0 for kind in LOG_COLS}}
+    with store._conn() as con:
+        users = load_json(USER_FILE, [])
+        con.executemany(
+            "INSERT OR IGNORE INTO users (username, password, tz) VALUES (?, ?, ?)",
+            [(u["username"], u["password"], u.get("tz", "")) for u in users],
+        )
+        counts["users"] = len(users)
+
+        for owner in shard_owners():
+            upgrade_med_log(shard_dir(owner))
+            paths = dataset_paths(shard_dir(owner))
+
+            pets = [dict(p, owner=owner) for p in load_json(paths["pets"], [])]
+            con.executemany(
+                f"INSERT OR IGNORE INTO pets ({_columns(PET_FIELDS)}) VALUES ({_placeholders(PET_FIELDS)})",
+                [[p.get(f, "") for f in PET_FIELDS] for p in pets],
+            )
+            counts["pets"] += len(pets)
+
+            meds = load_json(paths["med_schedule"], [])
+            con.executemany(
+                f"INSERT OR IGNORE INTO med_schedule ({_columns(MED_FIELDS)}) VALUES ({_placeholders(MED_FIELDS)})",
+                [_med_row(m) for m in meds],
+            )
+            counts["med_schedule"] += len(meds)
+
+            med_log = load_csv(paths["med_log"], MED_LOG_COLS)
+            med_log_rows = list(med_log[MED_LOG_COLS[1:]].astype(str).itertuples(index=False, name=None))
+            con.executemany(
+                "INSERT OR IGNORE INTO med_log (pet_id, date, med_id, time, taken_at) VALUES (?, ?, ?, ?, ?)",
+                med_log_rows,
+            )
+            counts["med_log"] += len(med_log_rows)
+
+            events = load_json(paths["hospital_events"], [])
+            con.executemany(
+                f"INSERT OR IGNORE INTO hospital_events ({_columns(EVENT_FIELDS)}) VALUES ({_placeholders(EVENT_FIELDS)})",
+                [[e.get(f, "") for f in EVENT_FIELDS] for e in events],
+            )
+            counts["hospital_events"] += len(events)
+
+        if con.execute("SELECT COUNT(*) FROM unsafe_db").fetchone()[0] == 0:
+            unsafe = load_json(UNSAFE_FILE, DEFAULT_UNSAFE)
+            con.executemany(
+                f"INSERT INTO unsafe_db ({_columns(UNSAFE_FIELDS)}) VALUES ({_placeholders(UNSAFE_FIELDS)})",
+                [[item.get(f, "") for f in UNSAFE_FIELDS] for item in unsafe],
+            )
+            counts["unsafe_db"] = len(unsafe)
+
+    for owner in shard_owners():
+        paths = dataset_paths(shard_dir(owner))
+        for kind, cols in LOG_COLS.items():
+            df = load_csv(paths[kind], cols)
+            store.add_log(kind, df)
+            counts[kind] += len(df)
+    return counts
+
+
+if __name__ == "__main__":
+    # 사용법: python sqlite_store.py [DB 경로]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_FILE
+    migrate_legacy_files()
+    store = SqliteStore(db_path)
+    for table, n in migrate_files(store).items():
+        print(f"{table}: {n}")
+    print(f"→ {db_path} (원본: {DATA_DIR}/)")
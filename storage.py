@@ -0,0 +1,1182 @@
+import io
+import os
+import json
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import streamlit as st
+
+from med_index import MedScheduleIndex
+from event_index import HospitalEventIndex
+from search_index import UnsafeSearchIndex
+from log_schema import typed_logs, concat_logs
+from timing import timed_load, span, add_bytes, profiling_enabled
+from rollup import split_range, bucket_keys, build_rollups, apply_rollups, rollup_series
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ===================== 저장소 설정 =====================
+DATA_DIR = "data"
+USER_FILE = os.path.join(DATA_DIR, "users.json")
+UNSAFE_FILE = os.path.join(DATA_DIR, "unsafe_db.json")
+DB_FILE = os.path.join(DATA_DIR, "petmate.db")
+
+# 사용자별 데이터(샤드) 폴더: data/users/<아이디>/
+SHARD_DIR = os.path.join(DATA_DIR, "users")
+
+# 샤드마다 들어 있는 파일 (회원/위험 정보는 전체 공용)
+DATASET_FILES = {
+    "pets": "pets.json",
+    "feed": "feed_log.csv",
+    "water": "water_log.csv",
+    "med_schedule": "med_schedule.json",
+    "med_log": "med_log.csv",
+    "hospital_events": "hospital_events.json",
+}
+
+# 샤딩 이전 data/ 바로 아래의 파일들은 이 사용자의 샤드로 옮긴다
+LEGACY_OWNER = os.environ.get("PETMATE_LEGACY_OWNER", "admin")
+
+# 저장 방식: "file" (data/*.json, *.csv), "sqlite" (data/petmate.db)
+#           또는 "parquet" (file과 같되 사료/급수 로그만 월별 Parquet)
+STORAGE_BACKEND = os.environ.get("PETMATE_STORAGE", "file")
+
+feed_cols = ["log_id", "pet_id", "date", "amount_g", "memo"]
+water_cols = ["log_id", "pet_id", "date", "amount_ml", "memo"]
+
+# 사료("feed") / 급수("water") 로그별 컬럼, 양 컬럼
+LOG_COLS = {"feed": feed_cols, "water": water_cols}
+AMOUNT_COLS = {"feed": "amount_g", "water": "amount_ml"}
+
+# 복약 기록: 복용 체크 한 번이 한 행 (취소는 톰스톤)
+MED_LOG_COLS = ["log_id", "pet_id", "date", "med_id", "time", "taken_at"]
+
+DEFAULT_UNSAFE = [
+    {"category": "음식", "name": "초콜릿", "risk": "고위험", "why": "카카오 테오브로민 독성"},
+    {"category": "음식", "name": "포도", "risk": "고위험", "why": "급성 신장손상"},
+    {"category": "식물", "name": "스파티필름", "risk": "주의", "why": "독성 수산칼슘"},
+]
+
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# 삭제된 로그의 log_id를 기록하는 톰스톤(tombstone) 파일 접미사
+TOMBSTONE_SUFFIX = ".deleted"
+
+# 톰스톤이 이 개수 이상 쌓이면 본 파일을 재작성(압축)한다
+COMPACT_MIN_TOMBSTONES = 500
+# 톰스톤 한 줄의 크기 (UUID log_id + 줄바꿈). 삭제할 때마다 파일을 다시 읽지 않고 크기로 개수를 어림한다
+TOMBSTONE_LINE_BYTES = 37
+
+
+# ===================== 변경 알림 =====================
+# 데이터가 바뀌면 부르는 함수들 (백그라운드 알림 예약 등).
+# 복약 스케줄/병원 일정 외에 반려동물, 회원, 사료/급수 로그 쓰기도 알린다 (운영 지표 집계 등).
+# fn(dataset, owner, action, item): action은 "add", "delete", "reset"(해당 사용자 전체 삭제)
+# 또는 "timezone"(사용자 시간대 변경). 로그는 item={"rows": 행 수}
+_change_listeners = []
+
+
+def add_change_listener(fn):
+    if fn not in _change_listeners:
+        _change_listeners.append(fn)
+
+
+def notify_change(dataset, owner, action, item=None):
+    for fn in list(_change_listeners):
+        fn(dataset, owner, action, item)
+
+
+# ===================== 파일 잠금 / 원자적 쓰기 =====================
+LOCK_SUFFIX = ".lock"
+
+# 스레드별로 지금 잡고 있는 잠금 (같은 스레드가 다시 잡으면 그대로 통과)
+_held_locks = threading.local()
+
+
+@contextmanager
+def file_lock(path):
+    """path에 대한 프로세스 간 배타 잠금 (path + ".lock" 파일 사용).
+
+    같은 프로세스의 다른 스레드(세션)도 별도의 파일 핸들을 열므로 함께 직렬화된다.
+    같은 스레드 안에서는 재진입할 수 있다 (잠금 안에서 읽다가 손상 파일을 옮기는 경우 등).
+    """
+    held = _held_locks.__dict__.setdefault("paths", set())
+    if path in held:
+        yield
+        return
+    with open(path + LOCK_SUFFIX, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write(path, write):
+    """임시 파일에 전부 쓴 뒤 rename으로 교체. 중간에 죽어도 원본은 온전하다"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ===================== JSON / CSV 입출력 =====================
+def load_json(path, default):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return default
+    # 손상된 파일을 기본값으로 덮어쓰는 일이 없도록 파싱 오류는 그대로 알린다
+    try:
+        with span("load_json"), open(path, "r", encoding="utf-8") as f:
+            if profiling_enabled():
+                add_bytes("read", os.fstat(f.fileno()).st_size)
+            return json.load(f)
+    except ValueError as e:
+        raise ValueError(f"{path} 파일을 읽을 수 없습니다: {e}") from e
+
+
+def _write_json(path, data):
+    with span("save_json"):
+        _atomic_write(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+    if profiling_enabled():
+        add_bytes("written", os.path.getsize(path))
+    # 잠금 안에서 방금 쓴 내용을 그대로 캐시에 넣어 다시 파싱하지 않는다
+    shared_cache().put_json(path, data)
+
+
+def save_json(path, data):
+    with file_lock(path):
+        _write_json(path, data)
+
+
+# 같은 파일에 대해 대기 중인 변경 함수들 (한 번의 쓰기로 묶어서 처리)
+_pending_updates = {}
+_pending_lock = threading.Lock()
+_update_locks = {}
+
+
+def update_json(path, default, fn):
+    """읽기-수정-쓰기를 잠금 안에서 수행해 동시에 저장해도 서로의 변경을 잃지 않는다.
+
+    fn은 현재 데이터를 받아 새 데이터를 돌려준다 (인자를 직접 수정하지 않는다).
+    여러 세션이 동시에 요청하면 먼저 잠금을 얻은 쪽이 대기 중인 변경을 모두 적용해
+    파일을 한 번만 다시 쓴다.
+    """
+    job = {"fn": fn, "done": False, "error": None}
+    with _pending_lock:
+        _pending_updates.setdefault(path, []).append(job)
+        update_lock = _update_locks.setdefault(path, threading.Lock())
+
+    with update_lock:
+        if not job["done"]:
+            with _pending_lock:
+                jobs = _pending_updates.pop(path, [])
+            try:
+                with file_lock(path):
+                    data = cached_json(path, default)
+                    for j in jobs:
+                        try:
+                            data = j["fn"](data)
+                        except Exception as e:
+                            j["error"] = e
+                    _write_json(path, data)
+            except Exception as e:
+                for j in jobs:
+                    j["error"] = j["error"] or e
+            finally:
+                for j in jobs:
+                    j["done"] = True
+
+    if job["error"]:
+        raise job["error"]
+
+
+def load_csv(path, cols):
+    if os.path.exists(path):
+        sig = _signature(path)
+        try:
+            with span("load_csv"):
+                if profiling_enabled():
+                    add_bytes("read", os.path.getsize(path))
+                df = pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=cols)
+        except ValueError as e:
+            # 줄이 깨진 파일(ParserError), 인코딩 오류 등. 모든 세션이 같은 파일에서 계속 실패하지 않도록 옮겨 둔다
+            set_aside_unreadable(path, sig, e)
+            return pd.DataFrame(columns=cols)
+        if set(df.columns) != set(cols):
+            return pd.DataFrame(columns=cols)
+
+        # 톰스톤으로 삭제 표시된 행 제외
+        deleted = load_tombstones(path)
+        if deleted and "log_id" in df.columns:
+            df = df[~df["log_id"].isin(deleted)].reset_index(drop=True)
+        return df
+    return pd.DataFrame(columns=cols)
+
+
+def _write_csv(path, df):
+    with span("save_csv"):
+        _atomic_write(path, lambda f: df.to_csv(f, index=False))
+    if profiling_enabled():
+        add_bytes("written", os.path.getsize(path))
+    tomb = tombstone_path(path)
+    if os.path.exists(tomb):
+        os.remove(tomb)
+    shared_cache().invalidate(path)
+
+
+def save_csv(path, df):
+    """전체 재작성 (초기화/압축 전용). 기존 톰스톤은 더 이상 필요 없으므로 제거"""
+    with file_lock(path):
+        _write_csv(path, df)
+
+
+# ===================== 추가 전용(append-only) 로그 =====================
+def tombstone_path(path):
+    return path + TOMBSTONE_SUFFIX
+
+
+def load_tombstones(path):
+    tomb = tombstone_path(path)
+    if not os.path.exists(tomb):
+        return set()
+    with open(tomb, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def append_tombstones(path, log_ids):
+    """log_ids를 톰스톤 파일에 덧붙이고, 압축할 만큼 쌓였는지 돌려준다 (잠금 안에서 호출)"""
+    with open(tombstone_path(path), "a", encoding="utf-8") as f:
+        f.write("".join(f"{log_id}\n" for log_id in log_ids))
+        size = f.tell()
+    return size >= COMPACT_MIN_TOMBSTONES * TOMBSTONE_LINE_BYTES
+
+
+def _csv_header(path):
+    """이미 존재하는 CSV의 헤더(컬럼 순서). 파일이 없거나 비어 있으면 None"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.readline().strip().split(",")
+
+
+CORRUPT_SUFFIX = ".corrupt"
+
+
+def _set_aside(path):
+    """읽을 수 없는 파일을 지우지 않고 path + ".corrupt"(이미 있으면 .corrupt.1, .2 ...)로 옮긴다"""
+    backup = path + CORRUPT_SUFFIX
+    n = 0
+    while os.path.exists(backup):
+        n += 1
+        backup = f"{path}{CORRUPT_SUFFIX}.{n}"
+    os.replace(path, backup)
+    tomb = tombstone_path(path)
+    if os.path.exists(tomb):
+        os.replace(tomb, tombstone_path(backup))
+    shared_cache().invalidate(path)
+    return backup
+
+
+# 읽을 수 없어 옮겨 둔 파일 기록 (관리자 화면에 표시)
+_set_aside_files = []
+_set_aside_lock = threading.Lock()
+
+
+def set_aside_unreadable(path, sig, error):
+    """파싱할 수 없는 파일을 옮겨 두고 기록한다.
+
+    sig는 읽기 시작할 때의 서명. 그 사이 다른 세션이 옮겼거나 새로 쓴 파일이면 건드리지 않는다.
+    """
+    with file_lock(path):
+        if sig is None or _signature(path) != sig:
+            return
+        backup = _set_aside(path)
+    with _set_aside_lock:
+        _set_aside_files.append({"path": path, "backup": backup, "error": str(error).strip()})
+
+
+def set_aside_files():
+    """이 프로세스가 옮겨 둔 손상 파일 목록 [{"path", "backup", "error"}]"""
+    with _set_aside_lock:
+        return list(_set_aside_files)
+
+
+def append_csv(path, rows, cols):
+    """새 행만 파일 끝에 덧붙인다. 기록 1건 저장 비용이 전체 이력 크기와 무관"""
+    with file_lock(path):
+        header = _csv_header(path)
+        if header is not None and set(header) != set(cols):
+            # 컬럼 구성이 다른 파일은 load_csv에서 버려지므로 옆으로 옮겨 두고 새 파일로 시작
+            # (헤더는 아래에서 한 번만 쓴다)
+            _set_aside(path)
+            header = None
+
+        rows = pd.DataFrame(rows).reindex(columns=header or cols)
+        with span("append_csv"), open(path, "a", encoding="utf-8", newline="") as f:
+            # 여러 행도 한 번의 write로 붙여서 다른 프로세스와 줄이 섞이지 않게 한다
+            text = rows.to_csv(header=header is None, index=False)
+            f.write(text)
+        if profiling_enabled():
+            add_bytes("written", len(text.encode("utf-8")))
+
+
+def delete_csv_rows(path, log_ids, cols):
+    """삭제는 톰스톤 추가로 처리하고, 일정량이 쌓이면 압축"""
+    log_ids = [str(x) for x in log_ids]
+    if not log_ids:
+        return
+    with file_lock(path):
+        due = append_tombstones(path, log_ids)
+    if profiling_enabled():
+        add_bytes("written", sum(len(x) + 1 for x in log_ids))
+
+    if due:
+        compact_csv(path, cols)
+
+
+def compact_csv(path, cols):
+    """톰스톤을 본 파일에 반영하고 톰스톤 파일을 비운다"""
+    with file_lock(path):
+        if os.path.exists(tombstone_path(path)):
+            _write_csv(path, load_csv(path, cols))
+
+
+# ===================== 프로세스 공용 캐시 =====================
+# 비교용으로 보관하는 파일 끝 바이트 수 (추가만 일어났는지 판별)
+_FINGERPRINT_BYTES = 64
+
+
+def _signature(path):
+    """파일 변경 감지용 서명. 파일이 없으면 None"""
+    try:
+        s = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (s.st_ino, s.st_size, s.st_mtime_ns)
+
+
+def _read_complete_lines(path, offset=0):
+    """offset부터 마지막 줄바꿈까지 읽는다 (다른 프로세스가 쓰는 중인 마지막 줄은 제외)"""
+    if not os.path.exists(path):
+        return b""
+    with span("read_csv_tail"), open(path, "rb") as f:
+        f.seek(offset)
+        raw = f.read()
+    add_bytes("read", len(raw))
+    return raw[:raw.rfind(b"\n") + 1]
+
+
+# 공용 캐시는 CSV의 모든 컬럼을 문자열로 읽는다 ("007" 같은 아이디가 숫자 7로 바뀌지 않도록).
+# 빈 칸만 결측값으로 보고, 숫자/날짜 변환은 _typed(로그)와 각 인덱스가 맡는다
+_CSV_READ_OPTS = {"dtype": str, "keep_default_na": False, "na_values": [""]}
+
+
+def _parse_tombstones(raw):
+    return {line.strip() for line in raw.decode("utf-8").splitlines() if line.strip()}
+
+
+def _iso_day(day):
+    return day if isinstance(day, str) else day.strftime("%Y-%m-%d")
+
+
+def _group_totals(df, value_col):
+    """{(pet_id, "YYYY-MM-DD"): value_col 합계}"""
+    if df.empty:
+        return {}
+    sums = df.groupby(["pet_id", "date"], observed=True)[value_col].sum()
+    return {(pet_id, _iso_day(day)): int(total) for (pet_id, day), total in sums.items()}
+
+
+def _typed(df, cols):
+    """사료/급수 로그면 메모리 표현(log_schema)으로, 그 외 CSV는 그대로"""
+    for kind, log_cols in LOG_COLS.items():
+        if cols == log_cols:
+            return typed_logs(df, AMOUNT_COLS[kind])
+    return df
+
+
+# 캐시의 합계/인덱스는 다른 세션이 잠금 없이 읽고 있으므로 제자리에서 고치지 않는다.
+# 갱신 함수는 바뀐 부분만 복사한 새 객체를 돌려주고, 캐시는 새 항목을 통째로 교체한다.
+def writable(container, key, touched, factory):
+    """container[key]를 이번 갱신에서 처음 건드릴 때 복사본(없으면 새 factory())으로 바꿔 돌려준다"""
+    if key not in touched or key not in container:
+        touched.add(key)
+        container[key] = factory(container.get(key, ()))
+    return container[key]
+
+
+def _apply_totals(totals, rows, value_col, sign):
+    """추가(sign=1) 또는 삭제(sign=-1)된 행만큼 갱신한 새 합계 인덱스"""
+    totals = dict(totals)
+    for key, value in _group_totals(rows, value_col).items():
+        total = totals.get(key, 0) + sign * value
+        if total:
+            totals[key] = total
+        else:
+            totals.pop(key, None)
+    return totals
+
+
+def _build_log_ids(df):
+    return set(df["log_id"].astype(str))
+
+
+def _apply_log_ids(log_ids, rows, sign):
+    ids = set(rows["log_id"].astype(str))
+    return log_ids | ids if sign > 0 else log_ids - ids
+
+
+def _build_med_log_index(df):
+    return _apply_med_log_index({"days": {}, "meds": {}}, df, 1)
+
+
+def _apply_med_log_index(index, rows, sign):
+    """복약 기록 인덱스를 갱신한 새 인덱스.
+
+    days: (pet_id, date) -> {f"{med_id}_{time}": (taken_at, log_id)}
+    meds: med_id -> 그 스케줄의 log_id 집합 (스케줄 삭제 시 전체를 훑지 않기 위함)
+    """
+    days, meds = dict(index["days"]), dict(index["meds"])
+    touched_days, touched_meds = set(), set()
+    for log_id, pet_id, day, med_id, time_str, taken_at in rows[MED_LOG_COLS].itertuples(index=False):
+        key = f"{med_id}_{time_str}"
+        if sign > 0:
+            writable(days, (pet_id, day), touched_days, dict)[key] = (taken_at, log_id)
+            writable(meds, med_id, touched_meds, set).add(log_id)
+            continue
+
+        day_log = days.get((pet_id, day), {})
+        if key in day_log and day_log[key][1] == log_id:
+            day_log = writable(days, (pet_id, day), touched_days, dict)
+            del day_log[key]
+            if not day_log:
+                del days[(pet_id, day)]
+        if log_id in meds.get(med_id, ()):
+            log_ids = writable(meds, med_id, touched_meds, set)
+            log_ids.discard(log_id)
+            if not log_ids:
+                del meds[med_id]
+    return {"days": days, "meds": meds}
+
+
+class SharedCache:
+    """파일별 파싱 결과를 프로세스 전체 세션이 공유한다.
+
+    파일 서명(inode/크기/mtime)이 바뀌거나 이 프로세스에서 쓰기가 일어나면 다시 읽는다.
+    반환값은 모든 세션이 함께 참조하므로 호출하는 쪽에서 절대 수정하지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._entries = {}
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def invalidate(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def put_json(self, path, data):
+        """이 프로세스가 쓴 JSON을 캐시에 바로 반영 (파일 잠금 안에서 호출)"""
+        with self._lock:
+            self._entries[path] = {"sig": _signature(path), "data": data}
+
+    def json(self, path, default):
+        sig = _signature(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry["sig"] == sig:
+            return entry["data"]
+
+        # 같은 파일을 여러 세션이 동시에 파싱하지 않도록 파일 단위로 직렬화
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is None or entry["sig"] != sig:
+                with timed_load(path) as info:
+                    entry = {"sig": sig, "data": load_json(path, default)}
+                    info["rows"] = len(entry["data"])
+                self._entries[path] = entry
+            return entry["data"]
+
+    def json_index(self, path, default, key):
+        """JSON 레코드 목록의 {key 값: 레코드} 인덱스. 파일이 바뀔 때만 다시 만든다"""
+        data = self.json(path, default)
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is None or entry["data"] is not data:
+                return {r[key]: r for r in data}
+            indexes = entry.setdefault("index", {})
+            if key not in indexes:
+                indexes[key] = {r[key]: r for r in data}
+            return indexes[key]
+
+    def csv(self, path, cols):
+        return self._csv_entry(path, cols)["data"]
+
+    def daily_totals(self, path, cols, value_col):
+        """(pet_id, date)별 value_col 합계 인덱스.
+
+        처음 요청될 때 한 번 집계하고, 이후에는 추가/삭제된 행만큼만 갱신한다.
+        """
+        entry = self._csv_entry(path, cols)
+        totals = entry["totals"].get(value_col)
+        if totals is not None:
+            return totals
+
+        with self._path_lock(path):
+            entry = self._entries.get(path, entry)
+            if value_col not in entry["totals"]:
+                entry["totals"][value_col] = _group_totals(entry["data"], value_col)
+            return entry["totals"][value_col]
+
+    def csv_index(self, path, cols, name, build, apply):
+        """CSV 행으로 만든 임의의 인덱스. build(df)로 한 번 만들고,
+        이후에는 apply(index, rows, sign)으로 추가(1)/삭제(-1)된 행만 반영한 새 인덱스로 바꾼다.
+        apply는 받은 인덱스를 고치지 않는다 (다른 세션이 읽는 중일 수 있다).
+        """
+        entry = self._csv_entry(path, cols)
+        if name in entry["indexes"]:
+            return entry["indexes"][name][0]
+
+        with self._path_lock(path):
+            entry = self._entries.get(path, entry)
+            if name not in entry["indexes"]:
+                entry["indexes"][name] = (build(entry["data"]), apply)
+            return entry["indexes"][name][0]
+
+    def _csv_entry(self, path, cols):
+        tomb = tombstone_path(path)
+        sig, tsig = _signature(path), _signature(tomb)
+        entry = self._entries.get(path)
+        if entry is not None and entry["sig"] == sig and entry["tsig"] == tsig:
+            return entry
+
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is None or entry["sig"] != sig or entry["tsig"] != tsig:
+                with timed_load(path) as info:
+                    try:
+                        if entry is not None and self._appended_only(path, tomb, entry):
+                            entry = self._read_tail(path, tomb, entry)
+                        else:
+                            entry = self._read_full(path, tomb, cols)
+                    except ValueError as e:
+                        # 깨진 줄이 있는 파일은 옮겨 두고 빈 데이터로 시작 (load_csv와 같은 처리)
+                        set_aside_unreadable(path, sig, e)
+                        sig, tsig = _signature(path), _signature(tomb)
+                        entry = self._read_full(path, tomb, cols)
+                    info["rows"] = len(entry["data"])
+                entry["sig"], entry["tsig"] = sig, tsig
+                self._entries[path] = entry
+            return entry
+
+    def _read_full(self, path, tomb, cols):
+        raw = _read_complete_lines(path)
+        entry = {
+            "data": _typed(pd.DataFrame(columns=cols), cols),
+            "cols": cols,
+            "header": None,
+            "offset": len(raw),
+            "fingerprint": raw[-_FINGERPRINT_BYTES:],
+            "toffset": 0,
+            # 합계 컬럼별 (pet_id, date) 합계 인덱스. 요청된 컬럼만 만들어 유지
+            "totals": {},
+            # 이름별 (인덱스, 갱신 함수). csv_index로 요청된 것만 만들어 유지
+            "indexes": {},
+        }
+        try:
+            df = pd.read_csv(io.BytesIO(raw), **_CSV_READ_OPTS)
+        except pd.errors.EmptyDataError:
+            return entry
+        if set(df.columns) != set(cols):
+            return entry
+
+        tomb_raw = _read_complete_lines(tomb)
+        deleted = _parse_tombstones(tomb_raw)
+        if deleted:
+            df = df[~df["log_id"].isin(deleted)].reset_index(drop=True)
+        entry.update(data=_typed(df, cols), header=list(df.columns), toffset=len(tomb_raw))
+        return entry
+
+    def _appended_only(self, path, tomb, entry):
+        """마지막으로 읽은 이후 본 파일/톰스톤 파일에 추가만 일어났는지"""
+        if entry["header"] is None or entry["sig"] is None:
+            return False
+        try:
+            # 재작성(초기화/압축)은 항상 rename으로 교체되므로 inode가 바뀐다
+            if os.stat(path).st_ino != entry["sig"][0]:
+                return False
+            if os.path.getsize(path) < entry["offset"]:
+                return False
+            if os.path.exists(tomb) and os.path.getsize(tomb) < entry["toffset"]:
+                return False
+            if not os.path.exists(tomb) and entry["toffset"]:
+                return False
+        except FileNotFoundError:
+            return False
+
+        fp = entry["fingerprint"]
+        with open(path, "rb") as f:
+            f.seek(entry["offset"] - len(fp))
+            return f.read(len(fp)) == fp
+
+    def _read_tail(self, path, tomb, entry):
+        """새로 추가된 행과 톰스톤만 읽어서 기존 항목에 반영한 새 항목.
+
+        합계/인덱스도 새 객체로 만들어 기존 항목은 그대로 둔다. 다른 세션은 교체 전까지
+        온전한 이전 값을 읽고, 도중에 실패해도 다음에 같은 변경분을 처음부터 다시 반영한다.
+        """
+        df, totals, indexes = entry["data"], dict(entry["totals"]), dict(entry["indexes"])
+
+        tail = _read_complete_lines(path, entry["offset"])
+        if tail:
+            new_rows = pd.read_csv(io.BytesIO(tail), header=None, names=entry["header"], **_CSV_READ_OPTS)
+            new_rows = _typed(new_rows, entry["cols"])
+            df = concat_logs([df, new_rows])
+            totals = {col: _apply_totals(t, new_rows, col, 1) for col, t in totals.items()}
+            indexes = {name: (apply(index, new_rows, 1), apply) for name, (index, apply) in indexes.items()}
+
+        tomb_tail = _read_complete_lines(tomb, entry["toffset"])
+        deleted = _parse_tombstones(tomb_tail)
+        if deleted:
+            gone = df["log_id"].isin(deleted)
+            totals = {col: _apply_totals(t, df[gone], col, -1) for col, t in totals.items()}
+            indexes = {name: (apply(index, df[gone], -1), apply) for name, (index, apply) in indexes.items()}
+            df = df[~gone].reset_index(drop=True)
+
+        offset = entry["offset"] + len(tail)
+        fingerprint = (entry["fingerprint"] + tail)[-_FINGERPRINT_BYTES:]
+        return dict(entry, data=df, totals=totals, indexes=indexes, offset=offset, fingerprint=fingerprint,
+                    toffset=entry["toffset"] + len(tomb_tail))
+
+
+@st.cache_resource
+def shared_cache():
+    return SharedCache()
+
+
+def cached_json(path, default):
+    """load_json의 공용 캐시 버전 (읽기 전용)"""
+    return shared_cache().json(path, default)
+
+
+def cached_json_index(path, default, key):
+    """key 컬럼으로 찾는 JSON 레코드 인덱스 (읽기 전용)"""
+    return shared_cache().json_index(path, default, key)
+
+
+def cached_csv(path, cols):
+    """load_csv의 공용 캐시 버전 (읽기 전용)"""
+    return shared_cache().csv(path, cols)
+
+
+def cached_daily_totals(path, cols, value_col):
+    """(pet_id, date)별 합계 인덱스 (읽기 전용)"""
+    return shared_cache().daily_totals(path, cols, value_col)
+
+
+def cached_csv_index(path, cols, name, build, apply):
+    """CSV 행으로 만든 인덱스. 추가/삭제된 행만 apply로 반영 (읽기 전용)"""
+    return shared_cache().csv_index(path, cols, name, build, apply)
+
+
+def cached_med_log_index(path):
+    """날짜별 / med_id별 복약 기록 인덱스 (읽기 전용)"""
+    return cached_csv_index(path, MED_LOG_COLS, "med_log", _build_med_log_index, _apply_med_log_index)
+
+
+# ===================== 파일 기반 인덱스 =====================
+class IndexedJson:
+    """JSON 목록 파일 하나와 그 내용으로 만든 인덱스.
+
+    다른 프로세스가 파일을 바꾸면 (캐시 목록이 달라지므로) 새로 만들고,
+    이 프로세스의 변경은 update의 apply로 차분만 반영한다.
+    """
+
+    def __init__(self, path, default, build):
+        self.path = path
+        self.default = default
+        self.build = build
+        self._lock = threading.Lock()
+        self._index = None
+        self._source = None
+
+    def index(self):
+        data = cached_json(self.path, self.default)
+        with self._lock:
+            if self._source is not data:
+                self._index, self._source = self.build(data), data
+            return self._index
+
+    def update(self, fn, apply):
+        """fn으로 파일을 바꾸고, 인덱스가 바로 직전 상태였다면 apply(index)만 적용"""
+        seen = {}
+
+        def update(data):
+            seen["before"], seen["after"] = data, fn(data)
+            return seen["after"]
+
+        update_json(self.path, self.default, update)
+        with self._lock:
+            if (self._index is not None and self._source is seen["before"]
+                    and cached_json(self.path, self.default) is seen["after"]):
+                apply(self._index)
+                self._source = seen["after"]
+
+
+@st.cache_resource
+def unsafe_index():
+    """위험 정보 검색 색인 (프로세스 공용)"""
+    return IndexedJson(UNSAFE_FILE, DEFAULT_UNSAFE, UnsafeSearchIndex)
+
+
+# 회원 검색 결과: 회원 목록(공용 캐시의 같은 객체)이 그대로인 동안 검색어별로 재사용
+USER_SEARCH_CACHE_SIZE = 32
+_user_searches = {}          # 검색어(소문자) -> 일치하는 회원 목록 (가입 순)
+_user_search_source = None   # 위 결과를 만든 회원 목록
+_user_search_lock = threading.Lock()
+
+
+def search_users(query):
+    """아이디에 query가 들어 있는 회원 목록 (가입 순, 대소문자 구분 없이, 읽기 전용).
+
+    users.json이 바뀌지 않았으면 같은 검색어는 다시 훑지 않고, 검색어를 이어서 입력하면
+    앞서 구한 더 짧은 검색어의 결과 안에서만 찾는다.
+    """
+    global _user_search_source
+    users = cached_json(USER_FILE, [])
+    query = query.lower()
+    with _user_search_lock:
+        if _user_search_source is not users:
+            _user_search_source = users
+            _user_searches.clear()
+        matches = _user_searches.get(query)
+        if matches is None:
+            # "bo"가 든 아이디는 "b"도 들어 있으므로 가장 긴 부분 검색어의 결과에서 시작
+            base = max((q for q in _user_searches if q in query), key=len, default=None)
+            pool = users if base is None else _user_searches[base]
+            matches = pool if not query else [u for u in pool if query in u["username"].lower()]
+            if len(_user_searches) >= USER_SEARCH_CACHE_SIZE:
+                _user_searches.pop(next(iter(_user_searches)))
+            _user_searches[query] = matches
+        return matches
+
+
+# ===================== 사용자별 샤드 =====================
+def dataset_paths(base_dir):
+    return {name: os.path.join(base_dir, filename) for name, filename in DATASET_FILES.items()}
+
+
+def shard_dir(owner):
+    # 아이디에 '/', '..' 등이 있어도 data/users/ 밖으로 나가지 않도록 인코딩
+    return os.path.join(SHARD_DIR, quote(owner, safe="").replace(".", "%2E"))
+
+
+def shard_owners():
+    if not os.path.isdir(SHARD_DIR):
+        return []
+    return sorted(unquote(e.name) for e in os.scandir(SHARD_DIR) if e.is_dir())
+
+
+def med_log_rows(med_log):
+    """예전 JSON 형식({f"{pet_id}_{date}": {f"{med_id}_{time}": taken_at}})을 복약 기록 행으로"""
+    rows = []
+    for day_key, day_log in med_log.items():
+        pet_id, _, day = day_key.rpartition("_")
+        for med_key, taken_at in day_log.items():
+            med_id, _, time_str = med_key.rpartition("_")
+            rows.append([str(uuid.uuid4()), pet_id, day, med_id, time_str, taken_at])
+    return pd.DataFrame(rows, columns=MED_LOG_COLS)
+
+
+def upgrade_med_log(base_dir):
+    """샤드의 med_log.json을 추가 전용 med_log.csv로 한 번 옮긴다"""
+    old = os.path.join(base_dir, "med_log.json")
+    if not os.path.exists(old):
+        return
+    with file_lock(old):
+        if os.path.exists(old):
+            append_csv(os.path.join(base_dir, DATASET_FILES["med_log"]),
+                       med_log_rows(load_json(old, {})), MED_LOG_COLS)
+            os.replace(old, old + ".migrated")
+
+
+def migrate_legacy_files(default_owner=LEGACY_OWNER):
+    """샤딩 이전의 data/*.json, *.csv를 사용자별 샤드로 나눠 옮긴다.
+
+    owner가 없는 반려동물은 default_owner 소유가 되고, 원본은 *.migrated로 남겨 둔다.
+    """
+    legacy = dict(dataset_paths(DATA_DIR), med_log=os.path.join(DATA_DIR, "med_log.json"))
+    if not any(os.path.exists(p) for p in legacy.values()):
+        return
+
+    with file_lock(os.path.join(DATA_DIR, "migrate")):
+        if not any(os.path.exists(p) for p in legacy.values()):
+            return
+
+        pets = load_json(legacy["pets"], [])
+        owner_of = {p["id"]: p.get("owner") or default_owner for p in pets}
+
+        def owner_for(pet_id):
+            return owner_of.get(pet_id, default_owner)
+
+        for owner in set(owner_of.values()) | {default_owner}:
+            store = FileStore(owner)
+            paths = store.paths
+
+            mine = [dict(p, owner=owner) for p in pets if owner_of[p["id"]] == owner]
+            known = {p["id"] for p in load_json(paths["pets"], [])}
+            save_json(paths["pets"], load_json(paths["pets"], []) + [p for p in mine if p["id"] not in known])
+
+            for name in ["med_schedule", "hospital_events"]:
+                rows = [x for x in load_json(legacy[name], []) if owner_for(x["pet_id"]) == owner]
+                save_json(paths[name], load_json(paths[name], []) + rows)
+
+            med_log = med_log_rows(load_json(legacy["med_log"], {}))
+            med_log = med_log[med_log["pet_id"].map(owner_for) == owner]
+            if not med_log.empty:
+                append_csv(paths["med_log"], med_log, MED_LOG_COLS)
+
+            for kind, cols in LOG_COLS.items():
+                df = load_csv(legacy[kind], cols)
+                rows = df[df["pet_id"].map(owner_for) == owner]
+                if not rows.empty:
+                    append_csv(paths[kind], rows, cols)
+
+        for path in legacy.values():
+            for p in [path, tombstone_path(path)]:
+                if os.path.exists(p):
+                    os.replace(p, p + ".migrated")
+
+
+# ===================== 저장소 (파일) =====================
+class FileStore:
+    """사용자별 샤드(data/users/<아이디>/)의 JSON/CSV 파일 저장소 (기본값).
+
+    owner가 None이면 관리자용 전체 보기로, 모든 샤드를 합산해 조회만 한다.
+    읽기는 공용 캐시의 뷰를 그대로 돌려주므로 반환값을 수정하지 않는다.
+    """
+
+    def __init__(self, owner=None):
+        self.owner = owner
+        self.paths = {}
+        if owner is not None:
+            os.makedirs(shard_dir(owner), exist_ok=True)
+            self.paths = dataset_paths(shard_dir(owner))
+            upgrade_med_log(shard_dir(owner))
+
+        # 스케줄/일정 파일로 만든 인덱스
+        self._indexed = {
+            "med_schedule": IndexedJson(self.paths.get("med_schedule"), [], MedScheduleIndex),
+            "hospital_events": IndexedJson(self.paths.get("hospital_events"), [], HospitalEventIndex),
+        }
+
+    def _shards(self):
+        if self.owner is not None:
+            return [self]
+        return [type(self)(owner) for owner in shard_owners()]
+
+    # ---------- 반려동물 ----------
+    def pets(self):
+        if self.owner is None:
+            return [p for shard in self._shards() for p in shard.pets()]
+        return cached_json(self.paths["pets"], [])
+
+    def add_pet(self, pet):
+        pet = dict(pet, owner=self.owner)
+        update_json(self.paths["pets"], [], lambda pets: pets + [pet])
+        notify_change("pets", self.owner, "add", pet)
+
+    def update_pet(self, pet):
+        pet = dict(pet, owner=self.owner)
+        update_json(self.paths["pets"], [], lambda pets: [pet if p["id"] == pet["id"] else p for p in pets])
+
+    def delete_pet(self, pet_id):
+        update_json(self.paths["pets"], [], lambda pets: [p for p in pets if p["id"] != pet_id])
+        notify_change("pets", self.owner, "delete", {"id": pet_id})
+
+    # ---------- 복약 스케줄 / 기록 ----------
+    def med_schedules(self, pet_id):
+        return [m for m in cached_json(self.paths["med_schedule"], []) if m["pet_id"] == pet_id]
+
+    def med_occurrences(self, pet_id, start, end=None):
+        """[start, end] 기간의 복용 건 {"date", "time", "med"} (날짜, 시간 순). end가 없으면 하루"""
+        index = self._indexed["med_schedule"].index()
+        if end is None or end == start:
+            return index.on(pet_id, start)
+        return index.between(pet_id, start, end)
+
+    def med_schedule_count(self):
+        return sum(len(cached_json(shard.paths["med_schedule"], [])) for shard in self._shards())
+
+    def all_med_schedules(self):
+        """이 저장소 범위(샤드)의 모든 복약 스케줄 (알림 예약용)"""
+        return [m for shard in self._shards() for m in cached_json(shard.paths["med_schedule"], [])]
+
+    def add_med_schedule(self, med):
+        self._indexed["med_schedule"].update(lambda meds: meds + [med], lambda index: index.add(med))
+        notify_change("med_schedule", self.owner, "add", med)
+
+    def delete_med_schedule(self, med):
+        self._indexed["med_schedule"].update(
+            lambda meds: [x for x in meds if x["id"] != med["id"]],
+            lambda index: index.remove(med["id"]),
+        )
+        notify_change("med_schedule", self.owner, "delete", med)
+
+        # 해당 스케줄의 복약 기록도 함께 삭제 (med_id 인덱스로 그 기록만 톰스톤 처리)
+        log_ids = cached_med_log_index(self.paths["med_log"])["meds"].get(med["id"], set())
+        delete_csv_rows(self.paths["med_log"], list(log_ids), MED_LOG_COLS)
+
+    def med_day_log(self, pet_id, day):
+        """{f"{med_id}_{time}": 복용 시각} 형태의 하루치 복약 기록"""
+        day_log = cached_med_log_index(self.paths["med_log"])["days"].get((pet_id, day), {})
+        return {key: taken_at for key, (taken_at, _) in list(day_log.items())}
+
+    def med_log_range(self, pet_id, start, end):
+        """기간 내 복약 기록 (date, med_id, time, taken_at 컬럼)"""
+        df = cached_csv(self.paths["med_log"], MED_LOG_COLS)
+        with span("mask"):
+            mask = (df["pet_id"] == pet_id) & (df["date"] >= start) & (df["date"] <= end)
+            return df.loc[mask, ["date", "med_id", "time", "taken_at"]]
+
+    def set_med_taken(self, pet_id, day, med_id, time_str, taken_at):
+        """taken_at이 None이면 복용 기록 취소. 파일에는 한 행 추가 또는 톰스톤 하나만 쓴다.
+
+        확인과 쓰기를 한 잠금 안에서 해서, 두 세션이 동시에 눌러도 기록이 두 번 붙거나
+        이미 취소된 기록을 다시 취소하지 않는다 (인덱스도 잠금 안에서 다시 읽는다).
+        """
+        path = self.paths["med_log"]
+        with file_lock(path):
+            day_log = cached_med_log_index(path)["days"].get((pet_id, day), {})
+            current = day_log.get(f"{med_id}_{time_str}")
+            if taken_at and current is None:
+                row = pd.DataFrame([[str(uuid.uuid4()), pet_id, day, med_id, time_str, taken_at]], columns=MED_LOG_COLS)
+                append_csv(path, row, MED_LOG_COLS)
+            elif not taken_at and current is not None:
+                delete_csv_rows(path, [current[1]], MED_LOG_COLS)
+
+    # ---------- 병원 일정 ----------
+    def hospital_events(self, pet_id):
+        """등록된 일정 (반복 일정은 첫 일시 기준, 일시 순)"""
+        return self._indexed["hospital_events"].index().events(pet_id)
+
+    def hospital_events_between(self, pet_id, start, end):
+        """start 이상 end 미만(ISO 일시)의 일정. 반복 일정은 구간 안의 회차로 펼쳐진다"""
+        return self._indexed["hospital_events"].index().between(pet_id, start, end)
+
+    def hospital_events_on(self, pet_id, day):
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        return self.hospital_events_between(pet_id, day, next_day)
+
+    def upcoming_hospital_events(self, pet_id, after, n):
+        """after(ISO 일시) 이후 가장 가까운 n개 일정 회차"""
+        return self._indexed["hospital_events"].index().upcoming(pet_id, after, n)
+
+    def all_hospital_events(self):
+        """이 저장소 범위(샤드)의 모든 병원 일정 (알림 예약용)"""
+        return [e for shard in self._shards() for e in cached_json(shard.paths["hospital_events"], [])]
+
+    def add_hospital_event(self, event):
+        self._indexed["hospital_events"].update(lambda events: events + [event], lambda index: index.add(event))
+        notify_change("hospital_events", self.owner, "add", event)
+
+    def delete_hospital_event(self, event_id):
+        self._indexed["hospital_events"].update(
+            lambda events: [x for x in events if x["id"] != event_id],
+            lambda index: index.remove(event_id),
+        )
+        notify_change("hospital_events", self.owner, "delete", {"id": event_id})
+
+    # ---------- 위험 정보 (공용) ----------
+    def unsafe_items(self):
+        return cached_json(UNSAFE_FILE, DEFAULT_UNSAFE)
+
+    def search_unsafe(self, query, limit=None):
+        """이름/분류/이유에서 검색어를 찾아 관련도 순으로"""
+        return unsafe_index().index().search(query, limit)
+
+    def add_unsafe_item(self, item):
+        self.add_unsafe_items([item])
+
+    def add_unsafe_items(self, new_items):
+        """여러 항목을 한 번의 쓰기로 추가"""
+        def index_all(index):
+            for item in new_items:
+                index.add(item)
+
+        unsafe_index().update(lambda items: items + list(new_items), index_all)
+
+    # ---------- 회원 (공용) ----------
+    def users(self):
+        return cached_json(USER_FILE, [])
+
+    def user_page(self, query, offset, limit):
+        """아이디에 query가 들어 있는 회원 수와 그중 [offset, offset + limit) 구간 (가입 순)"""
+        # SQLite의 LIKE와 같이 대소문자 구분 없이. 검색 결과는 회원 파일이 바뀔 때까지 재사용
+        users = search_users(query)
+        return len(users), users[offset:offset + limit]
+
+    def find_user(self, username):
+        # 목록을 훑지 않고 아이디 인덱스에서 바로 조회
+        return cached_json_index(USER_FILE, [], "username").get(username)
+
+    def add_user(self, user):
+        """이미 있는 아이디면 ValueError"""
+        def add(users):
+            # 동시에 같은 아이디로 가입해도 한 명만 저장되도록 잠금 안에서 다시 확인
+            if any(u["username"] == user["username"] for u in users):
+                raise ValueError("이미 존재하는 아이디입니다.")
+            return users + [user]
+
+        update_json(USER_FILE, [], add)
+        notify_change("users", user["username"], "add")
+
+    def set_password(self, username, password):
+        update_json(USER_FILE, [], lambda users: [
+            dict(u, password=password) if u["username"] == username else u for u in users
+        ])
+
+    def set_timezone(self, username, tz_name):
+        update_json(USER_FILE, [], lambda users: [
+            dict(u, tz=tz_name) if u["username"] == username else u for u in users
+        ])
+        notify_change("users", username, "timezone")
+
+    def delete_user(self, username):
+        update_json(USER_FILE, [], lambda users: [u for u in users if u["username"] != username])
+        notify_change("users", username, "delete")
+
+    # ---------- 사료/급수 로그 ----------
+    def _log_df(self, kind):
+        return cached_csv(self.paths[kind], LOG_COLS[kind])
+
+    def log_total(self, kind, pet_id, day):
+        # 전체 로그를 훑지 않고 (pet_id, date) 합계 인덱스에서 바로 조회
+        totals = cached_daily_totals(self.paths[kind], LOG_COLS[kind], AMOUNT_COLS[kind])
+        return totals.get((pet_id, day), 0)
+
+    def log_totals_by_pet(self, kind, start, end):
+        """기간 내 반려동물별 합계 (pet_id 인덱스 Series)"""
+        df = self._log_df(kind)
+        with span("mask"):
+            in_range = df[(df["date"] >= start) & (df["date"] <= end)]
+            totals = in_range.groupby("pet_id", observed=True)[AMOUNT_COLS[kind]].sum().astype("int64")
+        totals.index = totals.index.astype(str)
+        return totals
+
+    def log_rollup(self, kind, pet_id, start, end, freq):
+        """차트용 [start, end] 버킷별 합계 (freq: "D", "W", "M").
+        원본 로그를 다시 묶지 않고 일별 합계와 주/월 합계 인덱스에서 버킷 수만큼만 읽는다"""
+        path, cols, amount = self.paths[kind], LOG_COLS[kind], AMOUNT_COLS[kind]
+        inner, partial = (None, [(start, end)]) if freq == "D" else split_range(start, end, freq)
+        periods = {}
+        if inner:
+            rollups = cached_csv_index(
+                path, cols, "rollups",
+                lambda df: build_rollups(df, amount),
+                lambda index, rows, sign: apply_rollups(index, rows, amount, sign),
+            )[freq]
+            periods = {k: rollups[(pet_id, k)] for k in bucket_keys(*inner, freq) if (pet_id, k) in rollups}
+        totals = cached_daily_totals(path, cols, amount)
+        daily = {d: totals[(pet_id, d)] for lo, hi in partial for d in bucket_keys(lo, hi, "D") if (pet_id, d) in totals}
+        return rollup_series(periods, daily, freq)
+
+    def log_range(self, kind, pet_id, start, end):
+        df = self._log_df(kind)
+        with span("mask"):
+            mask = (df["pet_id"] == pet_id) & (df["date"] >= start) & (df["date"] <= end)
+            return df.loc[mask]
+
+    def log_count(self, kind):
+        return sum(len(shard._log_df(kind)) for shard in self._shards())
+
+    def existing_log_ids(self, kind, log_ids):
+        """log_ids 중 이미 저장된 것"""
+        known = cached_csv_index(self.paths[kind], LOG_COLS[kind], "log_ids", _build_log_ids, _apply_log_ids)
+        return {x for x in log_ids if x in known}
+
+    def iter_logs(self, kind, chunk_rows):
+        df = self._log_df(kind)
+        for i in range(0, len(df), chunk_rows):
+            yield df.iloc[i:i + chunk_rows]
+
+    def add_log(self, kind, rows):
+        append_csv(self.paths[kind], rows, LOG_COLS[kind])
+        notify_change(kind, self.owner, "add", {"rows": len(rows)})
+
+    def delete_logs(self, kind, log_ids):
+        delete_csv_rows(self.paths[kind], log_ids, LOG_COLS[kind])
+        notify_change(kind, self.owner, "delete", {"rows": len(log_ids)})
+
+    def compact_logs(self):
+        for kind, cols in LOG_COLS.items():
+            compact_csv(self.paths[kind], cols)
+        compact_csv(self.paths["med_log"], MED_LOG_COLS)
+
+    # ---------- 초기화 ----------
+    def reset_logs(self):
+        for kind, cols in LOG_COLS.items():
+            save_csv(self.paths[kind], pd.DataFrame(columns=cols))
+        notify_change("logs", self.owner, "reset")
+
+    def reset_profiles(self):
+        """이 사용자의 반려동물/복약/병원 일정만 비운다 (위험 정보는 모두가 함께 쓰므로 그대로)"""
+        save_json(self.paths["pets"], [])
+        save_json(self.paths["med_schedule"], [])
+        save_csv(self.paths["med_log"], pd.DataFrame(columns=MED_LOG_COLS))
+        save_json(self.paths["hospital_events"], [])
+        notify_change("pets", self.owner, "reset")
+
+    def reset_unsafe_items(self, unsafe_items):
+        """공용 위험 정보 목록을 통째로 교체 (관리자 전용)"""
+        save_json(UNSAFE_FILE, unsafe_items)
+
+    def locations(self):
+        return list(self.paths.values()) + [UNSAFE_FILE]
+
+
+@st.cache_resource
+def _migrate_legacy_once():
+    migrate_legacy_files()
+
+
+@st.cache_resource
+def get_store(owner=None):
+    """설정(PETMATE_STORAGE)에 맞는 사용자별 저장소. owner=None이면 관리자용 전체 보기"""
+    _migrate_legacy_once()
+    if STORAGE_BACKEND == "sqlite":
+        from sqlite_store import SqliteStore
+        return SqliteStore(DB_FILE, owner)
+    if STORAGE_BACKEND == "parquet":
+        from parquet_store import ParquetStore
+        return ParquetStore(owner)
+    return FileStore(owner)
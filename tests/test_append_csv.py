@@ -0,0 +1,109 @@
+import os
+import uuid
+
+import storage
+from storage import (
+    LOG_COLS, CORRUPT_SUFFIX, COMPACT_MIN_TOMBSTONES, SharedCache, append_csv, delete_csv_rows, load_csv,
+    set_aside_files, tombstone_path,
+)
+
+COLS = LOG_COLS["feed"]
+
+
+def _row(log_id):
+    return {"log_id": log_id, "pet_id": "p1", "date": "2026-10-01", "amount_g": 10, "memo": ""}
+
+
+def test_header_mismatch_sets_old_file_aside(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("id,pet,day,grams\na,p1,2026-10-01,5\n")
+    with open(tombstone_path(path), "w", encoding="utf-8") as f:
+        f.write("a\n")
+
+    append_csv(path, [_row("new")], COLS)
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines == [",".join(COLS), "new,p1,2026-10-01,10,"]
+    df = load_csv(path, COLS)
+    assert df["log_id"].tolist() == ["new"]
+
+    # 기존 행과 톰스톤은 지워지지 않고 .corrupt로 옮겨진다
+    with open(path + CORRUPT_SUFFIX, encoding="utf-8") as f:
+        assert f.read() == "id,pet,day,grams\na,p1,2026-10-01,5\n"
+    assert os.path.exists(tombstone_path(path + CORRUPT_SUFFIX))
+    assert not os.path.exists(tombstone_path(path))
+
+
+def test_existing_backup_is_not_overwritten(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    for content in ("x\n1\n", "y\n2\n"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        append_csv(path, [_row("r")], COLS)
+        os.remove(path)
+
+    with open(path + CORRUPT_SUFFIX, encoding="utf-8") as f:
+        assert f.read() == "x\n1\n"
+    with open(path + CORRUPT_SUFFIX + ".1", encoding="utf-8") as f:
+        assert f.read() == "y\n2\n"
+
+
+def test_matching_header_appends_without_header(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    append_csv(path, [_row("a")], COLS)
+    append_csv(path, [_row("b"), _row("c")], COLS)
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == ",".join(COLS)
+    assert len(lines) == 4
+    assert load_csv(path, COLS)["log_id"].tolist() == ["a", "b", "c"]
+
+
+def test_delete_counts_tombstones_without_rereading(data_dir, monkeypatch):
+    path = str(data_dir / "feed_log.csv")
+    ids = [str(uuid.uuid4()) for _ in range(COMPACT_MIN_TOMBSTONES)]
+    append_csv(path, [_row(i) for i in ids] + [_row("keep")], COLS)
+
+    def fail(path):
+        raise AssertionError("삭제할 때마다 톰스톤 파일 전체를 다시 읽지 않는다")
+
+    with monkeypatch.context() as m:
+        m.setattr(storage, "load_tombstones", fail)
+        for log_id in ids[:-1]:
+            delete_csv_rows(path, [log_id], COLS)
+    assert os.path.exists(tombstone_path(path))
+
+    # 마지막 삭제로 기준 개수에 닿으면 압축해서 톰스톤을 비운다
+    delete_csv_rows(path, [ids[-1]], COLS)
+    assert not os.path.exists(tombstone_path(path))
+    assert load_csv(path, COLS)["log_id"].tolist() == ["keep"]
+
+
+def test_malformed_csv_is_set_aside(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(COLS) + "\na,p1,2026-10-01,10,\nb,p1,2026-10-01,10,,,,extra\n")
+
+    assert load_csv(path, COLS).empty
+    assert not os.path.exists(path)
+    assert os.path.exists(path + CORRUPT_SUFFIX)
+    assert set_aside_files()[-1]["path"] == path
+
+    # 옮긴 뒤에는 새 파일로 정상 기록된다
+    append_csv(path, [_row("new")], COLS)
+    assert load_csv(path, COLS)["log_id"].tolist() == ["new"]
+
+
+def test_malformed_tail_in_cache_is_set_aside(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    append_csv(path, [_row("a")], COLS)
+    cache = SharedCache()
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a"]
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('b,"p1,2026-10-01,10,\n')
+    assert cache.csv(path, COLS).empty
+    assert os.path.exists(path + CORRUPT_SUFFIX)
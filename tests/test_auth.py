@@ -0,0 +1,26 @@
+import pytest
+
+import auth
+from auth import KdfBusy, hash_password, kdf_slots, verify_password
+
+
+def test_hash_and_verify_roundtrip():
+    stored = hash_password("secret")
+    assert verify_password("secret", stored)
+    assert not verify_password("wrong", stored)
+    assert not verify_password("secret", None)
+
+
+def test_busy_when_no_slot_frees_up(monkeypatch):
+    monkeypatch.setattr(auth, "KDF_WAIT_SEC", 0.05)
+    slots = kdf_slots()
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    try:
+        with pytest.raises(KdfBusy):
+            verify_password("secret", None)
+    finally:
+        for _ in range(taken):
+            slots.release()
+    assert verify_password("secret", hash_password("secret"))
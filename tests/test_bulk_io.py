@@ -0,0 +1,32 @@
+import pandas as pd
+
+from bulk_io import validate_chunk
+
+
+def _chunk(dates):
+    return pd.DataFrame({
+        "log_id": [f"l{i}" for i in range(len(dates))],
+        "pet_id": "p1",
+        "date": dates,
+        "amount_g": 10,
+        "memo": "",
+    })
+
+
+def test_first_row_format_does_not_decide_the_chunk():
+    dates = ["2026/10/02"] + ["2026-10-03"] * 999
+    rows, rejected = validate_chunk("feed", _chunk(dates), {"p1"})
+    assert rejected == 0
+    assert rows["date"].tolist() == ["2026-10-02"] + ["2026-10-03"] * 999
+
+
+def test_mixed_formats_are_judged_row_by_row():
+    dates = ["2026-10-03", "2026-10-04 08:30:00", "2026-10-05T09:00", "10/07/2026", "2026-13-01", ""]
+    rows, rejected = validate_chunk("feed", _chunk(dates), {"p1"})
+    assert rows["date"].tolist() == ["2026-10-03", "2026-10-04", "2026-10-05"]
+    assert rejected == 3
+
+    # 같은 행들의 순서를 바꿔도 결과는 같다
+    rows, rejected = validate_chunk("feed", _chunk(dates[::-1]), {"p1"})
+    assert sorted(rows["date"]) == ["2026-10-03", "2026-10-04", "2026-10-05"]
+    assert rejected == 3
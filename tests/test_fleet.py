@@ -0,0 +1,38 @@
+import pytest
+
+import fleet
+from fleet import FleetStats
+
+
+@pytest.fixture
+def stats(data_dir, monkeypatch):
+    monkeypatch.setattr(fleet, "ACTIVITY_FILE", str(data_dir / "activity.csv"))
+    writes = []
+    write = FleetStats._write
+
+    def counted(self, rows):
+        writes.append(len(rows))
+        write(self, rows)
+
+    monkeypatch.setattr(FleetStats, "_write", counted)
+    stats = FleetStats()
+    stats.writes = writes
+    return stats
+
+
+def test_numeric_looking_usernames_stay_strings(stats):
+    stats.record_visit("007")
+    stats.on_change("pets", "007", "add", {"id": "p1"})
+
+    agg = stats.aggregates()
+    assert agg["pets"] == {"007": 1}
+    assert list(agg["last_seen"]) == ["007"]
+
+
+def test_writes_are_batched_until_read(stats):
+    for _ in range(20):
+        stats.on_change("feed", "bob", "add", {"rows": 1})
+    assert stats.writes == []
+
+    assert sum(stats.entries(1)) == 20
+    assert stats.writes == [20]
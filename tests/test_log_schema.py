@@ -0,0 +1,39 @@
+import pandas as pd
+
+from log_schema import concat_logs, typed_logs
+
+
+def _logs(pet_ids, typed=True):
+    df = pd.DataFrame({
+        "log_id": [f"l{i}" for i in range(len(pet_ids))],
+        "pet_id": pet_ids,
+        "date": "2026-10-01",
+        "amount_g": 10,
+        "memo": "",
+    })
+    return typed_logs(df, "amount_g") if typed else df
+
+
+def test_concat_keeps_category_and_values():
+    base = _logs(["a", "b", "a"])
+    out = concat_logs([base, _logs(["b", "c"]), _logs(["d"], typed=False)])
+
+    assert isinstance(out["pet_id"].dtype, pd.CategoricalDtype)
+    assert out["pet_id"].astype(str).tolist() == ["a", "b", "a", "b", "c", "d"]
+    # 기존 카테고리 순서와 코드는 그대로, 새 값은 뒤에 붙는다
+    assert out["pet_id"].cat.categories.tolist() == ["a", "b", "c", "d"]
+    assert out["pet_id"].cat.codes[:3].tolist() == base["pet_id"].cat.codes.tolist()
+    # 원본 프레임은 바뀌지 않는다
+    assert base["pet_id"].cat.categories.tolist() == ["a", "b"]
+
+
+def test_concat_without_new_pets():
+    out = concat_logs([_logs(["a", "b"]), _logs(["b"])])
+    assert out["pet_id"].cat.categories.tolist() == ["a", "b"]
+    assert out["pet_id"].astype(str).tolist() == ["a", "b", "b"]
+
+
+def test_concat_non_log_frames():
+    rows = pd.DataFrame({"date": ["2026-10-01"], "user": ["bob"], "event": ["visit"], "n": [1]})
+    out = concat_logs([rows, rows])
+    assert out["user"].tolist() == ["bob", "bob"]
@@ -0,0 +1,70 @@
+import random
+from datetime import date, timedelta
+
+from med_index import MedScheduleIndex, _Intervals, active_range
+
+
+def _med(i, pet_id, start, end):
+    return {"id": f"m{i}", "pet_id": pet_id, "drug": "약", "times": ["08:00"], "start": start, "end": end}
+
+
+def _random_meds(rng, n):
+    base = date(2026, 1, 1)
+    meds = []
+    for i in range(n):
+        start = base + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.randrange(60))
+        meds.append(_med(i, rng.choice(["p1", "p2"]),
+                         "" if rng.random() < 0.05 else start.isoformat(),
+                         "" if rng.random() < 0.1 else end.isoformat()))
+    return meds
+
+
+def _brute(meds, pet_id, start, end):
+    return sorted(m["id"] for m in meds if m["pet_id"] == pet_id and active_range(m, start, end))
+
+
+def test_overlapping_matches_linear_scan():
+    rng = random.Random(7)
+    meds = _random_meds(rng, 400)
+    index = MedScheduleIndex(meds)
+    for removed in meds[::5]:
+        index.remove(removed["id"])
+    meds = [m for m in meds if m not in meds[::5]]
+
+    for _ in range(200):
+        lo = date(2026, 1, 1) + timedelta(days=rng.randrange(-30, 400))
+        hi = lo + timedelta(days=rng.randrange(0, 40))
+        for pet_id in ["p1", "p2", "none"]:
+            got = sorted(m["id"] for m in index._overlapping(pet_id, lo.isoformat(), hi.isoformat()))
+            assert got == _brute(meds, pet_id, lo.isoformat(), hi.isoformat())
+
+
+def test_on_is_refreshed_after_changes():
+    index = MedScheduleIndex([_med(1, "p1", "2026-10-01", "2026-10-10")])
+    assert [o["med"]["id"] for o in index.on("p1", "2026-10-05")] == ["m1"]
+    index.add(_med(2, "p1", "2026-10-05", ""))
+    assert [o["med"]["id"] for o in index.on("p1", "2026-10-05")] == ["m1", "m2"]
+    index.remove("m1")
+    assert [o["med"]["id"] for o in index.on("p1", "2026-10-05")] == ["m2"]
+
+
+def test_query_skips_subtrees_that_ended_before_start(monkeypatch):
+    # 오래전에 끝난 스케줄 수천 개가 있어도 하루 조회는 일부 노드만 방문한다
+    intervals = _Intervals()
+    day = date(2020, 1, 1)
+    for i in range(4096):
+        d = (day + timedelta(days=i % 1000)).isoformat()
+        intervals.add(d, d, f"old{i}")
+    intervals.add("2026-10-01", "2026-10-31", "current")
+
+    visits = {"n": 0}
+    collect = _Intervals._collect
+
+    def counting(self, *args):
+        visits["n"] += 1
+        return collect(self, *args)
+
+    monkeypatch.setattr(_Intervals, "_collect", counting)
+    assert intervals.overlapping("2026-10-15", "2026-10-15") == ["current"]
+    assert visits["n"] < 100
@@ -0,0 +1,38 @@
+import threading
+
+from storage import MED_LOG_COLS, FileStore, load_csv, tombstone_path
+
+DAY = "2026-10-01"
+
+
+def _press_together(fn, n=8):
+    """n개 세션이 같은 순간에 fn을 부른다"""
+    barrier = threading.Barrier(n)
+
+    def run():
+        barrier.wait()
+        fn()
+
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_check_is_recorded_once(data_dir):
+    store = FileStore("alice")
+    _press_together(lambda: store.set_med_taken("p1", DAY, "m1", "09:00", "09:01"))
+
+    assert len(load_csv(store.paths["med_log"], MED_LOG_COLS)) == 1
+    assert store.med_day_log("p1", DAY) == {"m1_09:00": "09:01"}
+
+
+def test_concurrent_uncheck_tombstones_once(data_dir):
+    store = FileStore("alice")
+    store.set_med_taken("p1", DAY, "m1", "09:00", "09:01")
+    _press_together(lambda: store.set_med_taken("p1", DAY, "m1", "09:00", None))
+
+    with open(tombstone_path(store.paths["med_log"]), encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 1
+    assert store.med_day_log("p1", DAY) == {}
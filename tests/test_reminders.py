@@ -0,0 +1,113 @@
+import threading
+import time
+
+from reminders import ReminderScheduler
+
+
+class _SlowStore:
+    """pets()가 release될 때까지 멈춰 있는 저장소 (샤드가 많은 첫 예약 흉내)"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def pets(self):
+        self.release.wait(5)
+        return [{"id": "p1", "name": "초코", "owner": "bob"}]
+
+    def find_user(self, username):
+        return {"username": username, "tz": "Asia/Seoul"}
+
+    def med_schedules(self, pet_id):
+        return [{"id": "m1", "pet_id": pet_id, "drug": "약", "times": ["08:00", "20:00"], "start": "", "end": ""}]
+
+    def all_med_schedules(self):
+        return self.med_schedules("p1")
+
+    def all_hospital_events(self):
+        return []
+
+
+def test_start_returns_before_initial_load():
+    store = _SlowStore()
+    scheduler = ReminderScheduler([], store_for=lambda owner: store)
+
+    started = time.perf_counter()
+    scheduler.start()
+    try:
+        assert time.perf_counter() - started < 1
+        assert not scheduler.loaded.is_set()
+        assert scheduler.pending_count() == 0
+
+        store.release.set()
+        assert scheduler.loaded.wait(5)
+        assert scheduler.pending_count() == 2
+    finally:
+        store.release.set()
+        scheduler.stop()
+
+
+def test_failed_initial_load_keeps_scheduler_running():
+    class Broken(_SlowStore):
+        def pets(self):
+            raise RuntimeError("boom")
+
+    store = Broken()
+    scheduler = ReminderScheduler([], store_for=lambda owner: store).start()
+    try:
+        assert scheduler.loaded.wait(5)
+        scheduler.schedule_med("bob", store.med_schedules("p1")[0])
+        assert scheduler.pending_count() == 2
+        assert scheduler._thread.is_alive()
+    finally:
+        scheduler.stop()
+
+
+class _Shards:
+    """owner별 샤드 두 개 (bob: 반려동물 둘, amy: 하나) + 읽기 횟수"""
+
+    PETS = [{"id": "p1", "owner": "bob"}, {"id": "p2", "owner": "bob"}, {"id": "p3", "owner": "amy"}]
+
+    def __init__(self):
+        self.calls = {"shards": 0, "meds": 0}
+
+    def __call__(self, owner):
+        self.calls["shards"] += owner is not None
+        shards = self
+
+        class Shard:
+            def pets(self):
+                return [p for p in shards.PETS if owner is None or p["owner"] == owner]
+
+            def find_user(self, username):
+                return {"username": username, "tz": "Asia/Seoul"}
+
+            def all_med_schedules(self):
+                shards.calls["meds"] += 1
+                return [{"id": f"m-{p['id']}", "pet_id": p["id"], "drug": "약", "times": ["08:00"],
+                         "start": "", "end": ""} for p in self.pets()]
+
+            def all_hospital_events(self):
+                return [{"id": f"e-{p['id']}", "pet_id": p["id"], "title": "검진", "dt": "2999-01-01T10:00"}
+                        for p in self.pets()]
+
+        return Shard()
+
+
+def test_load_all_reads_each_shard_once():
+    shards = _Shards()
+    scheduler = ReminderScheduler([], store_for=shards)
+    scheduler.load_all()
+    assert scheduler.pending_count() == 6
+    # 사용자 샤드마다 한 번씩 (반려동물 수와 무관)
+    assert shards.calls == {"shards": 2, "meds": 2}
+
+
+def test_pet_and_user_deletion_cancel_reminders():
+    scheduler = ReminderScheduler([], store_for=_Shards())
+    scheduler.load_all()
+
+    scheduler.on_change("pets", "bob", "delete", {"id": "p1"})
+    assert scheduler.pending_count() == 4
+    scheduler.on_change("users", "bob", "delete", None)
+    assert scheduler.pending_count() == 2
+    assert {e["owner"] for e in scheduler.upcoming(10)} == {"amy"}
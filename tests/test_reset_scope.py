@@ -0,0 +1,34 @@
+import pytest
+
+from storage import FileStore
+from sqlite_store import SqliteStore
+
+ITEM = {"category": "음식", "name": "포도", "risk": "고위험", "why": "신부전"}
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def make_store(request, data_dir):
+    if request.param == "file":
+        return FileStore
+    return lambda owner: SqliteStore(str(data_dir / "petmate.db"), owner)
+
+
+def test_reset_profiles_keeps_shared_and_other_owners_data(make_store):
+    alice, bob = make_store("alice"), make_store("bob")
+    alice.add_pet({"id": "a1", "name": "초코", "species": "개", "weight_kg": 4.0})
+    bob.add_pet({"id": "b1", "name": "보리", "species": "고양이", "weight_kg": 3.0})
+    alice.add_unsafe_item(ITEM)
+    before = [i["name"] for i in alice.unsafe_items()]
+
+    alice.reset_profiles()
+
+    assert alice.pets() == []
+    assert [p["id"] for p in bob.pets()] == ["b1"]
+    assert [i["name"] for i in bob.unsafe_items()] == before
+
+
+def test_reset_unsafe_items_replaces_shared_list(make_store):
+    store = make_store("admin")
+    store.add_unsafe_item(ITEM)
+    store.reset_unsafe_items([ITEM])
+    assert [i["name"] for i in make_store("bob").unsafe_items()] == ["포도"]
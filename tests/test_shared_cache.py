@@ -0,0 +1,159 @@
+import os
+
+import pytest
+
+import storage
+from storage import (
+    LOG_COLS, SharedCache, _apply_log_ids, _build_log_ids, append_csv, compact_csv, delete_csv_rows,
+    tombstone_path,
+)
+
+COLS = LOG_COLS["feed"]
+
+
+def _row(log_id, pet_id="p1", day="2026-10-01", amount=10):
+    return {"log_id": log_id, "pet_id": pet_id, "date": day, "amount_g": amount, "memo": ""}
+
+
+def _write_raw(path, text, mode="a"):
+    """다른 프로세스가 쓴 것처럼 잠금/캐시를 거치지 않고 직접 쓴다"""
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.write(text)
+    # 같은 나노초 안에 다시 쓰여도 서명이 바뀌도록 mtime을 밀어 둔다
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """새 캐시 + 전체 읽기/꼬리 읽기 횟수"""
+    cache, calls = SharedCache(), {"full": 0, "tail": 0}
+    read_full, read_tail = SharedCache._read_full, SharedCache._read_tail
+
+    def full(self, *args):
+        calls["full"] += 1
+        return read_full(self, *args)
+
+    def tail(self, *args):
+        calls["tail"] += 1
+        return read_tail(self, *args)
+
+    monkeypatch.setattr(SharedCache, "_read_full", full)
+    monkeypatch.setattr(SharedCache, "_read_tail", tail)
+    cache.calls = calls
+    return cache
+
+
+@pytest.fixture
+def path(data_dir):
+    path = str(data_dir / "feed_log.csv")
+    append_csv(path, [_row("a", amount=10), _row("b", amount=20)], COLS)
+    return path
+
+
+def test_external_append_is_read_as_tail(cache, path):
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a", "b"]
+    _write_raw(path, "c,p1,2026-10-01,5,\n")
+
+    df = cache.csv(path, COLS)
+    assert df["log_id"].tolist() == ["a", "b", "c"]
+    assert str(df["pet_id"].dtype) == "category"
+    assert cache.calls == {"full": 1, "tail": 1}
+
+
+def test_incomplete_last_line_waits_for_newline(cache, path):
+    cache.csv(path, COLS)
+    _write_raw(path, "c,p1,2026-10-01,5")
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a", "b"]
+    _write_raw(path, ",\n")
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a", "b", "c"]
+    assert cache.calls["full"] == 1
+
+
+def test_truncated_file_falls_back_to_full_read(cache, path):
+    cache.csv(path, COLS)
+    _write_raw(path, ",".join(COLS) + "\nz,p1,2026-10-01,1,\n", mode="w")
+
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["z"]
+    assert cache.calls["full"] == 2
+
+
+def test_rewritten_file_of_same_size_falls_back_to_full_read(cache, path):
+    cache.csv(path, COLS)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    # 크기는 그대로 두고 내용만 바꾼 뒤 한 줄 추가
+    _write_raw(path, text.replace("a,p1", "x,p1") + "c,p1,2026-10-01,5,\n", mode="w")
+
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["x", "b", "c"]
+    assert cache.calls["full"] == 2
+
+
+def test_replaced_file_falls_back_to_full_read(cache, path):
+    cache.csv(path, COLS)
+    tmp = path + ".new"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(",".join(COLS) + "\na,p1,2026-10-01,10,\nb,p1,2026-10-01,20,\nc,p1,2026-10-01,5,\n")
+    os.replace(tmp, path)
+
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a", "b", "c"]
+    assert cache.calls["full"] == 2
+
+
+def test_tombstones_hide_rows_and_update_totals(cache, path):
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 30}
+
+    delete_csv_rows(path, ["a"], COLS)
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["b"]
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 20}
+    assert cache.calls["full"] == 1
+
+    # 톰스톤 파일을 다른 프로세스가 덧붙여도 꼬리만 읽는다
+    _write_raw(tombstone_path(path), "b\n")
+    assert cache.csv(path, COLS).empty
+    assert cache.daily_totals(path, COLS, "amount_g") == {}
+    assert cache.calls["full"] == 1
+
+
+def test_totals_after_append_delete_and_compaction(cache, path):
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 30}
+    append_csv(path, [_row("c", day="2026-10-02", amount=7), _row("d", pet_id="p2", amount=3)], COLS)
+    delete_csv_rows(path, ["b"], COLS)
+    expected = {("p1", "2026-10-01"): 10, ("p1", "2026-10-02"): 7, ("p2", "2026-10-01"): 3}
+    assert cache.daily_totals(path, COLS, "amount_g") == expected
+
+    compact_csv(path, COLS)
+    assert not os.path.exists(tombstone_path(path))
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["a", "c", "d"]
+    assert cache.daily_totals(path, COLS, "amount_g") == {k: v for k, v in expected.items() if v}
+    assert cache.calls["full"] == 2
+
+
+def test_tail_read_leaves_previous_entry_untouched(cache, path):
+    totals = cache.daily_totals(path, COLS, "amount_g")
+    log_ids = cache.csv_index(path, COLS, "log_ids", _build_log_ids, _apply_log_ids)
+
+    _write_raw(path, "c,p1,2026-10-01,5,\n")
+    delete_csv_rows(path, ["a"], COLS)
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 25}
+    assert cache.csv_index(path, COLS, "log_ids", _build_log_ids, _apply_log_ids) == {"b", "c"}
+
+    # 이전에 받아 간 값은 다른 세션이 읽는 중일 수 있으므로 그대로 남아 있어야 한다
+    assert totals == {("p1", "2026-10-01"): 30}
+    assert log_ids == {"a", "b"}
+
+
+def test_failed_tail_read_does_not_apply_rows_twice(cache, path, monkeypatch):
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 30}
+    _write_raw(path, "c,p1,2026-10-01,5,\n")
+    _write_raw(tombstone_path(path), "a\n")
+
+    parse = storage._parse_tombstones
+    with monkeypatch.context() as m:
+        m.setattr(storage, "_parse_tombstones", lambda raw: (_ for _ in ()).throw(OSError("boom")))
+        with pytest.raises(OSError):
+            cache.csv(path, COLS)
+    assert storage._parse_tombstones is parse
+
+    assert cache.csv(path, COLS)["log_id"].tolist() == ["b", "c"]
+    assert cache.daily_totals(path, COLS, "amount_g") == {("p1", "2026-10-01"): 25}
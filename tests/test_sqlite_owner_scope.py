@@ -0,0 +1,71 @@
+import pytest
+
+from sqlite_store import SqliteStore
+
+DAY = "2026-10-01"
+
+
+@pytest.fixture
+def stores(data_dir):
+    db = str(data_dir / "petmate.db")
+    alice, bob = SqliteStore(db, "alice"), SqliteStore(db, "bob")
+    bob.add_pet({"id": "bob-pet", "name": "보리", "species": "개", "weight_kg": 3.0})
+    bob.add_med_schedule({"id": "bob-med", "pet_id": "bob-pet", "drug": "심장약", "times": ["09:00"],
+                          "start": DAY, "end": ""})
+    bob.set_med_taken("bob-pet", DAY, "bob-med", "09:00", "09:01")
+    bob.add_hospital_event({"id": "bob-event", "pet_id": "bob-pet", "title": "접종", "dt": f"{DAY}T10:00"})
+    bob.add_log("feed", [{"log_id": "bob-log", "pet_id": "bob-pet", "date": DAY, "amount_g": 50, "memo": ""}])
+    return alice, bob
+
+
+def test_other_owner_cannot_delete_by_id(stores):
+    alice, bob = stores
+    alice.delete_med_schedule({"id": "bob-med"})
+    alice.delete_hospital_event("bob-event")
+    alice.delete_logs("feed", ["bob-log"])
+
+    assert [m["id"] for m in bob.med_schedules("bob-pet")] == ["bob-med"]
+    assert bob.med_day_log("bob-pet", DAY) == {"bob-med_09:00": "09:01"}
+    assert [e["id"] for e in bob.hospital_events("bob-pet")] == ["bob-event"]
+    assert bob.log_range("feed", "bob-pet", DAY, DAY)["log_id"].tolist() == ["bob-log"]
+
+
+def test_other_owner_cannot_change_med_log(stores):
+    alice, bob = stores
+    alice.set_med_taken("bob-pet", DAY, "bob-med", "09:00", "")
+    alice.set_med_taken("bob-pet", DAY, "bob-med", "21:00", "21:00")
+    assert bob.med_day_log("bob-pet", DAY) == {"bob-med_09:00": "09:01"}
+
+
+def test_other_owner_cannot_add_to_pet(stores):
+    alice, bob = stores
+    alice.add_pet({"id": "alice-pet", "name": "나비", "species": "고양이", "weight_kg": 4.0})
+    alice.add_med_schedule({"id": "alice-med", "pet_id": "bob-pet", "drug": "구충제", "times": ["21:00"],
+                            "start": DAY, "end": ""})
+    alice.add_hospital_event({"id": "alice-event", "pet_id": "bob-pet", "title": "검진", "dt": f"{DAY}T11:00"})
+    alice.add_log("feed", [{"log_id": "alice-log", "pet_id": "bob-pet", "date": DAY, "amount_g": 30, "memo": ""},
+                           {"log_id": "alice-own", "pet_id": "alice-pet", "date": DAY, "amount_g": 20, "memo": ""}])
+
+    assert [m["id"] for m in bob.med_schedules("bob-pet")] == ["bob-med"]
+    assert [e["id"] for e in bob.hospital_events("bob-pet")] == ["bob-event"]
+    assert bob.log_range("feed", "bob-pet", DAY, DAY)["log_id"].tolist() == ["bob-log"]
+    assert alice.log_total("feed", "alice-pet", DAY) == 20
+
+
+def test_other_owner_cannot_read_by_pet_id(stores):
+    alice, bob = stores
+    assert alice.med_schedules("bob-pet") == []
+    assert alice.med_day_log("bob-pet", DAY) == {}
+    assert alice.hospital_events("bob-pet") == []
+    assert alice.log_total("feed", "bob-pet", DAY) == 0
+    assert alice.log_range("feed", "bob-pet", DAY, DAY).empty
+    assert alice.log_rollup("feed", "bob-pet", DAY, DAY, "D").sum() == 0
+    assert bob.log_total("feed", "bob-pet", DAY) == 50
+
+
+def test_admin_view_sees_every_owner(stores):
+    _, bob = stores
+    admin = SqliteStore(bob.db_path, None)
+    assert admin.log_total("feed", "bob-pet", DAY) == 50
+    admin.delete_hospital_event("bob-event")
+    assert bob.hospital_events("bob-pet") == []
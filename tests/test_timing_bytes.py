@@ -0,0 +1,47 @@
+import pytest
+
+import storage
+import timing
+from storage import LOG_COLS, append_csv, delete_csv_rows, load_csv, load_json, save_json
+
+COLS = LOG_COLS["feed"]
+ROW = {"log_id": "a", "pet_id": "p1", "date": "2026-10-01", "amount_g": 10, "memo": ""}
+
+
+def _io(data_dir):
+    json_path, csv_path = str(data_dir / "pets.json"), str(data_dir / "feed_log.csv")
+    save_json(json_path, [{"id": "p1"}])
+    load_json(json_path, [])
+    append_csv(csv_path, [ROW], COLS)
+    load_csv(csv_path, COLS)
+    delete_csv_rows(csv_path, ["a"], COLS)
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    def set_on(on):
+        monkeypatch.setattr(timing, "_enabled", on)
+    return set_on
+
+
+def test_byte_sizes_are_not_computed_when_profiling_is_off(data_dir, profiling, monkeypatch):
+    profiling(False)
+
+    def fail(*args):
+        raise AssertionError("계측이 꺼져 있으면 크기를 계산하지 않는다")
+
+    monkeypatch.setattr(storage, "add_bytes", fail)
+    _io(data_dir)
+
+
+def test_bytes_are_counted_when_profiling_is_on(data_dir, profiling):
+    profiling(True)
+    timing.begin_run()
+    try:
+        _io(data_dir)
+        run = timing._current.run
+        assert run["read"] > 0
+        assert run["written"] > 0
+    finally:
+        timing.end_run()
+        timing.clear_runs()
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+
+from storage import IndexedJson, cached_json, load_json, update_json
+
+
+def _append(item):
+    return lambda data: data + [item]
+
+
+def test_concurrent_writers_lose_no_updates(data_dir):
+    path = str(data_dir / "items.json")
+    threads, per_thread = 8, 25
+
+    def writer(t):
+        for i in range(per_thread):
+            update_json(path, [], _append(f"{t}-{i}"))
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    data = load_json(path, [])
+    assert len(data) == threads * per_thread
+    assert set(data) == {f"{t}-{i}" for t in range(threads) for i in range(per_thread)}
+    # 스레드마다 자기 변경 순서는 유지된다
+    for t in range(threads):
+        mine = [x for x in data if x.startswith(f"{t}-")]
+        assert mine == [f"{t}-{i}" for i in range(per_thread)]
+
+
+def test_failing_update_does_not_block_others(data_dir):
+    path = str(data_dir / "items.json")
+    update_json(path, [], _append("a"))
+
+    def boom(data):
+        raise RuntimeError("boom")
+
+    try:
+        update_json(path, [], boom)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("변경 함수의 예외가 호출한 쪽으로 전달되어야 한다")
+    update_json(path, [], _append("b"))
+    assert load_json(path, []) == ["a", "b"]
+
+
+class _Counting:
+    """IndexedJson용 인덱스: id → 레코드, 몇 번 새로 만들었는지 센다"""
+    builds = 0
+
+    def __init__(self, data):
+        type(self).builds += 1
+        self.by_id = {r["id"]: r for r in data}
+
+
+def _indexed(path):
+    _Counting.builds = 0
+    return IndexedJson(path, [], _Counting)
+
+
+def test_index_is_reused_and_patched_in_place(data_dir):
+    path = str(data_dir / "items.json")
+    indexed = _indexed(path)
+    assert indexed.index().by_id == {}
+    assert indexed.index() is indexed.index()
+
+    item = {"id": "x"}
+    indexed.update(_append(item), lambda index: index.by_id.__setitem__("x", item))
+    assert indexed.index().by_id == {"x": item}
+    assert _Counting.builds == 1
+
+
+def test_index_rebuilds_when_file_changes_outside(data_dir):
+    path = str(data_dir / "items.json")
+    indexed = _indexed(path)
+    indexed.update(_append({"id": "x"}), lambda index: index.by_id.__setitem__("x", {"id": "x"}))
+    assert set(indexed.index().by_id) == {"x"}
+
+    # 다른 프로세스가 파일을 교체
+    tmp = path + ".other"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump([{"id": "y"}, {"id": "z"}], f)
+    os.replace(tmp, path)
+
+    assert set(indexed.index().by_id) == {"y", "z"}
+    assert _Counting.builds == 2
+
+
+def test_index_rebuilds_when_another_writer_raced(data_dir):
+    path = str(data_dir / "items.json")
+    indexed = _indexed(path)
+    indexed.index()
+    # 인덱스를 거치지 않은 쓰기 뒤에는 apply 대신 새로 만든다
+    update_json(path, [], _append({"id": "other"}))
+    indexed.update(_append({"id": "mine"}), lambda index: index.by_id.__setitem__("mine", {"id": "mine"}))
+
+    assert set(indexed.index().by_id) == {"other", "mine"}
+    assert cached_json(path, []) == [{"id": "other"}, {"id": "mine"}]
+    assert _Counting.builds == 2
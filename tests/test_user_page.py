@@ -0,0 +1,45 @@
+import pytest
+
+import storage
+from storage import FileStore, search_users
+from sqlite_store import SqliteStore
+
+
+NAMES = ["admin", "Bob", "bobby", "alice", "robot", "b_o%b"]
+
+
+def _with_users(store):
+    for name in NAMES:
+        store.add_user({"username": name, "password": "x"})
+    return store
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, data_dir):
+    if request.param == "file":
+        return _with_users(FileStore("admin"))
+    return _with_users(SqliteStore(str(data_dir / "petmate.db"), "admin"))
+
+
+def test_search_and_pages(store):
+    total, page = store.user_page("bo", 0, 2)
+    assert total == 3
+    assert [u["username"] for u in page] == ["Bob", "bobby"]
+    assert [u["username"] for u in store.user_page("bo", 2, 2)[1]] == ["robot"]
+    assert store.user_page("", 0, 0)[0] == 6
+    # 검색어의 %, _는 문자 그대로
+    assert [u["username"] for u in store.user_page("_o%", 0, 10)[1]] == ["b_o%b"]
+
+
+def test_file_search_is_reused_until_users_change(data_dir, monkeypatch):
+    store = _with_users(FileStore("admin"))
+    first = search_users("bo")
+    assert search_users("BO") is first
+
+    # 이어서 입력한 검색어는 앞선 결과 안에서만 찾는다 (앞선 결과를 일부러 줄여 확인)
+    with monkeypatch.context() as m:
+        m.setitem(storage._user_searches, "bo", [first[1]])
+        assert [u["username"] for u in search_users("bob")] == ["bobby"]
+
+    store.add_user({"username": "bobo", "password": "x"})
+    assert [u["username"] for u in store.user_page("bo", 0, 10)[1]] == ["Bob", "bobby", "robot", "bobo"]
@@ -0,0 +1,49 @@
+from datetime import datetime
+from functools import lru_cache
+
+from dateutil import tz
+
+# 시간대를 정하지 않은 사용자(기존 회원)의 시간대
+DEFAULT_TZ = "Asia/Seoul"
+
+# 설정에서 고를 수 있는 시간대 (IANA 이름)
+TIMEZONE_CHOICES = [
+    "Asia/Seoul",
+    "Asia/Tokyo",
+    "Asia/Shanghai",
+    "Asia/Singapore",
+    "Asia/Kolkata",
+    "Australia/Sydney",
+    "Europe/London",
+    "Europe/Berlin",
+    "America/New_York",
+    "America/Chicago",
+    "America/Los_Angeles",
+    "Pacific/Honolulu",
+    "UTC",
+]
+
+
+# ===================== 시간대 =====================
+@lru_cache(maxsize=64)
+def get_zone(name):
+    """IANA 이름 → tzinfo. 프로세스에서 이름마다 한 번만 찾고, 모르는 이름이면 기본 시간대"""
+    return tz.gettz(name or DEFAULT_TZ) or tz.gettz(DEFAULT_TZ)
+
+
+def user_zone(user):
+    """회원 레코드의 시간대 이름 (없으면 기본값)"""
+    return (user or {}).get("tz") or DEFAULT_TZ
+
+
+# ===================== 현지 시각 =====================
+# 날짜/일시는 모두 사용자의 현지 벽시계 기준(naive)으로 저장한다.
+# "오늘", 복약 기록 날짜, 병원 일정 일시가 같은 시간대를 따르도록 현재 시각도 여기서만 만든다.
+def now_in(name):
+    """그 시간대의 현재 현지 시각 (naive)"""
+    return datetime.now(get_zone(name)).replace(tzinfo=None)
+
+
+def to_epoch(local_dt, name):
+    """그 시간대의 현지 시각(naive) → 타임스탬프"""
+    return local_dt.replace(tzinfo=get_zone(name)).timestamp()
@@ -0,0 +1,260 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("petmate.startup")
+
+# 실행별 계측(PETMATE_PROFILE=1 또는 관리자 화면에서 켜기). 최근 실행 기록은 이 개수만큼만 남긴다
+PROFILE_ENABLED = os.environ.get("PETMATE_PROFILE", "0") == "1"
+RUN_BUFFER_SIZE = 500
+
+# cProfile 결과에서 보여 줄 함수 수
+PROFILE_TOP = 40
+
+_lock = threading.Lock()
+_loads = {}    # 데이터셋 -> {"count", "rows", "total_ms", "max_ms", "last_ms"} (rows는 마지막 로드 결과 행 수)
+_startup = {}  # 프로세스 첫 실행의 단계별 시간 (ms)
+
+_enabled = PROFILE_ENABLED
+_runs = deque(maxlen=RUN_BUFFER_SIZE)  # 끝난 실행 기록 (링 버퍼)
+_current = threading.local()           # 스크립트 스레드마다 진행 중인 실행 기록
+_last_profile = {}                     # 마지막 cProfile 결과 {"page", "at", "text"}
+
+
+# ===================== 데이터셋 로드 시간 =====================
+def dataset_name(path):
+    """data/users/<아이디>/feed_log.csv → feed_log (사용자 구분 없이 데이터셋별로 모은다)"""
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+
+def record_load(name, ms, rows=0):
+    with _lock:
+        stat = _loads.setdefault(name, {"count": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+        stat["count"] += 1
+        stat["rows"] = rows
+        stat["total_ms"] += ms
+        stat["max_ms"] = max(stat["max_ms"], ms)
+        stat["last_ms"] = ms
+
+
+@contextmanager
+def timed_load(path):
+    """파일을 읽어 파싱하는 구간. 읽은 결과의 행 수는 yield한 dict의 "rows"에 넣는다"""
+    info = {"rows": 0}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        record_load(dataset_name(path), (time.perf_counter() - start) * 1000, info["rows"])
+
+
+def load_stats():
+    """데이터셋별 로드 횟수/시간 (처음 읽은 뒤에는 변경분만 읽으므로 대부분 한 번)"""
+    with _lock:
+        return [
+            {
+                "데이터셋": name,
+                "로드 횟수": s["count"],
+                "행 수": s["rows"],
+                "합계(ms)": round(s["total_ms"], 1),
+                "최대(ms)": round(s["max_ms"], 1),
+                "마지막(ms)": round(s["last_ms"], 1),
+            }
+            for name, s in sorted(_loads.items())
+        ]
+
+
+# ===================== 시작 시간 =====================
+def mark_startup(step, ms):
+    """프로세스에서 처음 기록된 값만 남긴다 (콜드 스타트 기준)"""
+    with _lock:
+        if step in _startup:
+            return
+        _startup[step] = round(ms, 1)
+    logger.info("startup %s: %.1f ms", step, ms)
+
+
+def startup_stats():
+    with _lock:
+        return dict(_startup)
+
+
+# ===================== 실행별 계측 =====================
+# 꺼져 있으면 span()은 미리 만들어 둔 빈 객체를 돌려주므로 비용은 플래그 확인 한 번뿐이다.
+# 켜져 있으면 스크립트 실행 한 번(begin_run ~ end_run) 동안의 구간별 시간/횟수와 읽고 쓴 바이트를 모아
+# 링 버퍼에 넣는다.
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        run = getattr(_current, "run", None)
+        if run is not None:
+            stat = run["spans"].setdefault(self.name, [0, 0.0])
+            stat[0] += 1
+            stat[1] += (time.perf_counter() - self.start) * 1000
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def profiling_enabled():
+    return _enabled
+
+
+def set_profiling(on):
+    global _enabled
+    _enabled = bool(on)
+
+
+def span(name):
+    """with span("load_csv"): ... 구간 시간을 현재 실행 기록에 더한다"""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def add_bytes(direction, n):
+    """읽은("read") / 쓴("written") 바이트 수를 현재 실행 기록에 더한다.
+    크기 계산에 비용이 드는 호출부는 profiling_enabled()일 때만 부른다"""
+    if _enabled:
+        run = getattr(_current, "run", None)
+        if run is not None:
+            run[direction] += n
+
+
+def begin_run(profile=False):
+    """스크립트 실행 시작. profile=True면 이번 실행을 cProfile로도 잰다"""
+    old = getattr(_current, "run", None)
+    if old is not None and old.get("profiler"):
+        # st.stop()/st.rerun()으로 end_run 없이 끝난 실행의 프로파일러는 멈춘다
+        old["profiler"].disable()
+    if not (_enabled or profile):
+        _current.run = None
+        return
+    run = {"page": "", "start": time.perf_counter(), "spans": {}, "read": 0, "written": 0, "profiler": None}
+    if profile:
+        run["profiler"] = cProfile.Profile()
+        run["profiler"].enable()
+    _current.run = run
+
+
+def set_run_page(page):
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run["page"] = page
+
+
+def end_run():
+    run = getattr(_current, "run", None)
+    _current.run = None
+    if run is None:
+        return
+    total_ms = (time.perf_counter() - run["start"]) * 1000
+    if run["profiler"] is not None:
+        run["profiler"].disable()
+        out = io.StringIO()
+        pstats.Stats(run["profiler"], stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        with _lock:
+            _last_profile.update(page=run["page"], total_ms=round(total_ms, 1),
+                                 at=time.strftime("%Y-%m-%d %H:%M:%S"), text=out.getvalue())
+    if _enabled:
+        _runs.append({
+            "page": run["page"],
+            "total_ms": total_ms,
+            "spans": {name: tuple(stat) for name, stat in run["spans"].items()},
+            "read": run["read"],
+            "written": run["written"],
+        })
+
+
+def traced(name):
+    """조각(st.fragment)처럼 스크립트 밖에서 다시 실행되는 함수용 데코레이터.
+    실행 도중에 불리면 그 실행의 구간으로, 단독으로 불리면 실행 하나로 기록한다"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            if getattr(_current, "run", None) is not None:
+                with span(name):
+                    return fn(*args, **kwargs)
+            begin_run()
+            set_run_page(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end_run()
+        return inner
+    return wrap
+
+
+# ===================== 계측 결과 =====================
+def _percentile(ordered, q):
+    """정렬된 값의 q 백분위 (nearest-rank)"""
+    return ordered[max(0, -(-len(ordered) * q // 100) - 1)]
+
+
+def _pcts(values):
+    ordered = sorted(values)
+    return {f"p{q}": round(_percentile(ordered, q), 1) for q in (50, 95, 99)}
+
+
+def run_stats():
+    """링 버퍼의 실행 기록 → (페이지별 표, 구간별 표). 시간은 ms, 바이트는 KB"""
+    runs = list(_runs)
+    pages = {}
+    for r in runs:
+        pages.setdefault(r["page"] or "-", []).append(r)
+    page_rows = []
+    for page, rs in sorted(pages.items()):
+        page_rows.append({
+            "페이지": page,
+            "실행 수": len(rs),
+            **{f"{k}(ms)": v for k, v in _pcts([r["total_ms"] for r in rs]).items()},
+            **{f"읽기 {k}(KB)": round(v / 1024, 1) for k, v in _pcts([r["read"] for r in rs]).items()},
+            **{f"쓰기 {k}(KB)": round(v / 1024, 1) for k, v in _pcts([r["written"] for r in rs]).items()},
+        })
+
+    spans = {}
+    for r in runs:
+        for name, (count, ms) in r["spans"].items():
+            spans.setdefault(name, []).append((count, ms))
+    span_rows = [{
+        "구간": name,
+        "실행 수": len(stats),
+        "실행당 호출": round(sum(c for c, _ in stats) / len(stats), 1),
+        **{f"{k}(ms)": v for k, v in _pcts([ms for _, ms in stats]).items()},
+    } for name, stats in sorted(spans.items())]
+    return page_rows, span_rows
+
+
+def clear_runs():
+    _runs.clear()
+
+
+def last_profile():
+    with _lock:
+        return dict(_last_profile)